@@ -0,0 +1,61 @@
+"""Compare two result files written by routes.py, e.g. of a branch and of main.
+
+Every route measured in both files is listed with the chosen latency
+percentile of each and the relative change. The script exits with status 1
+if any route got slower by more than ``--threshold`` percent.
+
+Usage: python benchmarks/compare.py BASE.json NEW.json [--metric p95] [--threshold 10]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+METRICS = ["mean", "p50", "p95", "p99"]
+
+
+def load(path: Path) -> dict:
+    return json.loads(path.read_text())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--metric", choices=METRICS, default="p50", help="Latency percentile to compare.")
+    parser.add_argument("--threshold", type=float, default=10, help="Percent change reported as a regression.")
+    args = parser.parse_args()
+
+    base, new = load(args.base), load(args.new)
+    if base["meta"]["dataset"] != new["meta"]["dataset"]:
+        print("Warning: the results were measured on different datasets.")
+    print(f"{args.metric} latency, {base['meta']['commit']} -> {new['meta']['commit']}")
+
+    key = f"{args.metric}_ms"
+    regressions = 0
+    for driver, routes in new["results"].items():
+        base_routes = base["results"].get(driver, {})
+        for route, result in routes.items():
+            if route not in base_routes:
+                print(f"{driver:>6} {route[:60]:<60} new")
+                continue
+            before = base_routes[route][key]
+            after = result[key]
+            change = (after - before) / before * 100 if before else 0.0
+            if change > args.threshold:
+                mark = "slower"
+                regressions += 1
+            elif change < -args.threshold:
+                mark = "faster"
+            else:
+                mark = ""
+            print(f"{driver:>6} {route[:60]:<60} {before:9.2f} -> {after:9.2f} ms  {change:+7.1f}%  {mark}")
+
+    print(f"{regressions} routes slower by more than {args.threshold:g}%.")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Generate a synthetic dataset (database and uploads) for the benchmarks.
+
+Rows are spread over ``--years`` from ``--start`` at the given rates per day.
+Every photo row points at one of ``--photo-files`` shared, content-addressed
+files. The same arguments and ``--seed`` always produce the same dataset, so
+results of different commits stay comparable.
+
+All users have the password ``bench``; ``admin`` is an admin.
+
+Usage: python benchmarks/generate.py OUTPUT [--years 5] [--feedings-per-day 12] [--force]
+"""
+
+import argparse
+import datetime
+import hashlib
+import io
+import os
+import random
+import shutil
+import sqlite3
+from collections.abc import Iterator
+from pathlib import Path
+
+
+PASSWORD = "bench"  # noqa: S105
+ACTIVITY_TYPES = ["sleeping", "tummy_time", "walking", "running", "swimming"]
+DOCTORS = ["Dr. Nováková", "Dr. Svoboda", "Dr. Dvořák"]
+# Share of feedings which are pumped
+PUMPED_SHARE = 0.2
+
+
+def dt(value: datetime.datetime) -> str:
+    """Format a datetime the way SQLAlchemy stores it in SQLite."""
+    return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def spread(rng: random.Random, days: int, start: datetime.datetime, per_day: float) -> Iterator[datetime.datetime]:
+    """Yield `per_day` timestamps per day in order, evenly spaced with some jitter."""
+    if per_day <= 0:
+        return
+    step = 24 * 60 / per_day
+    for i in range(int(days * per_day)):
+        jitter = rng.uniform(0, 0.5) * step
+        yield start + datetime.timedelta(minutes=i * step + jitter)
+
+
+def make_photo_files(rng: random.Random, folder: Path, count: int) -> list[tuple[str, str]]:
+    """Write `count` distinct files into a content-addressed upload folder. Returns ``(sha256, ext)`` pairs."""
+    try:
+        from PIL import Image  # noqa: PLC0415
+    except ImportError:
+        Image = None  # noqa: N806
+
+    files = []
+    for _ in range(count):
+        if Image is not None:
+            color = tuple(rng.randrange(256) for _ in range(3))
+            buffer = io.BytesIO()
+            Image.new("RGB", (1600, 1200), color).save(buffer, "JPEG", quality=85)
+            data, ext = buffer.getvalue(), ".jpg"
+        else:
+            # Videos get no variants, so any bytes will do without Pillow
+            data, ext = rng.randbytes(256 * 1024), ".mp4"
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = folder / sha256[:2] / sha256[2:4] / f"{sha256}{ext}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        files.append((sha256, ext))
+    return files
+
+
+def create_schema(path: Path, upload_folder: Path) -> None:
+    os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    os.environ["UPLOAD_FOLDER"] = str(upload_folder)
+    from lucinka.app import create_app  # noqa: PLC0415
+    from lucinka.models import db  # noqa: PLC0415
+
+    with create_app(dev=True).app_context():
+        db.create_all()
+        db.engine.dispose()
+
+
+def fill(connection: sqlite3.Connection, rng: random.Random, args: argparse.Namespace, photos: list) -> None:
+    from werkzeug.security import generate_password_hash  # noqa: PLC0415
+
+    start = datetime.datetime.combine(args.start, datetime.time())
+    days = round(args.years * 365.25)
+    password_hash = generate_password_hash(PASSWORD)
+    users = [(1, "admin", password_hash, 1)]
+    users += [(i + 1, f"user{i}", password_hash, 0) for i in range(1, args.users)]
+    connection.executemany("INSERT INTO users (id, username, password_hash, is_admin) VALUES (?, ?, ?, ?)", users)
+    user_ids = [user[0] for user in users]
+
+    connection.executemany(
+        "INSERT INTO login_stats (user_id, login_dt) VALUES (?, ?)",
+        ((rng.choice(user_ids), dt(ts)) for ts in spread(rng, days, start, args.logins_per_day)),
+    )
+
+    def feedings() -> Iterator[tuple]:
+        for ts in spread(rng, days, start, args.feedings_per_day):
+            pumped = rng.random() < PUMPED_SHARE
+            left = None if pumped else rng.randint(0, 20)
+            right = None if pumped else rng.randint(0, 20)
+            ml = rng.randrange(30, 180, 10) if pumped else 0
+            end = ts + datetime.timedelta(minutes=(left or 0) + (right or 0) or 15)
+            yield dt(ts), dt(ts), dt(end), left, right, pumped, not pumped, ml
+
+    connection.executemany(
+        "INSERT INTO breastfeeding (user_id, created_dt, start_dt, end_dt, left_duration, right_duration,"
+        " is_pumped, is_breast, ml_amount) VALUES (1, ?, ?, ?, ?, ?, ?, ?, ?)",
+        feedings(),
+    )
+
+    def activities() -> Iterator[tuple]:
+        for ts in spread(rng, days, start, args.activities_per_day):
+            end = ts + datetime.timedelta(minutes=rng.randint(10, 180))
+            yield rng.choice(ACTIVITY_TYPES), dt(ts), dt(end), dt(ts)
+
+    connection.executemany(
+        "INSERT INTO activities (user_id, activity_type, start_dt, end_dt, created_dt) VALUES (1, ?, ?, ?, ?)",
+        activities(),
+    )
+
+    def measurements() -> Iterator[tuple]:
+        # Weekly, following a rough growth curve
+        for day in range(0, days, 7):
+            ts = start + datetime.timedelta(days=day)
+            weight = 3.3 + 12 * (1 - 0.998**day) + rng.uniform(-0.1, 0.1)
+            yield dt(ts), ts.date().isoformat(), round(weight, 2), round(50 + 0.03 * day, 1)
+
+    connection.executemany(
+        "INSERT INTO data (user_id, created_dt, date, weight, height, notes) VALUES (1, ?, ?, ?, ?, NULL)",
+        measurements(),
+    )
+    connection.executemany(
+        "INSERT INTO visits (user_id, created_dt, date, doctor, location, type, notes) VALUES (1, ?, ?, ?, ?, ?, ?)",
+        (
+            (dt(ts), dt(ts), rng.choice(DOCTORS), "Praha", rng.choice(["checkup", "vaccination"]), None)
+            for ts in spread(rng, days, start, 1 / 30)
+        ),
+    )
+    if photos:
+        connection.executemany(
+            "INSERT INTO photos (user_id, created_dt, date, notes, sha256, ext) VALUES (1, ?, ?, ?, ?, ?)",
+            ((dt(ts), dt(ts), "", *rng.choice(photos)) for ts in spread(rng, days, start, args.photos_per_day)),
+        )
+    connection.commit()
+
+
+def finish(upload_folder: Path) -> None:
+    """Fill in what the app maintains on writes: daily rollups, the change log and photo variants."""
+    from sqlalchemy import text  # noqa: PLC0415
+
+    from lucinka.app import create_app  # noqa: PLC0415
+    from lucinka.models import SYNCED_TABLES, db, record_changes  # noqa: PLC0415
+    from lucinka.rollups import rebuild_rollups  # noqa: PLC0415
+    from lucinka.thumbnails import Image, build_all_variants  # noqa: PLC0415
+
+    if Image is not None:
+        build_all_variants(upload_folder)
+
+    with create_app(dev=True).app_context():
+        rebuild_rollups()
+        connection = db.session.connection()
+        for table in SYNCED_TABLES:
+            ids = db.session.execute(text(f"SELECT id FROM {table} ORDER BY id")).scalars().all()  # noqa: S608
+            record_changes(connection, table, ids)
+        db.session.commit()
+        db.engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", type=Path, help="Folder for app.db and the photos folder.")
+    parser.add_argument("--years", type=float, default=5)
+    parser.add_argument("--start", type=datetime.date.fromisoformat, default=datetime.date(2021, 1, 1))
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--feedings-per-day", type=float, default=12)
+    parser.add_argument("--activities-per-day", type=float, default=6)
+    parser.add_argument("--photos-per-day", type=float, default=3)
+    parser.add_argument("--photo-files", type=int, default=50, help="Distinct files shared by all photo rows.")
+    parser.add_argument("--logins-per-day", type=float, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--force", action="store_true", help="Replace an existing dataset.")
+    args = parser.parse_args()
+
+    database = args.output / "app.db"
+    upload_folder = args.output / "photos"
+    if database.exists():
+        if not args.force:
+            parser.error(f"{database} exists, pass --force to replace it")
+        database.unlink()
+        shutil.rmtree(upload_folder, ignore_errors=True)
+    upload_folder.mkdir(parents=True, exist_ok=True)
+
+    rng = random.Random(args.seed)  # noqa: S311
+    photos = make_photo_files(rng, upload_folder, args.photo_files) if args.photos_per_day else []
+    create_schema(database, upload_folder)
+    with sqlite3.connect(database) as connection:
+        fill(connection, rng, args, photos)
+        counts = {
+            table: connection.execute(f"SELECT count(*) FROM {table}").fetchone()[0]  # noqa: S608
+            for table in ("users", "login_stats", "data", "visits", "breastfeeding", "activities", "photos")
+        }
+    connection.close()
+    finish(upload_folder)
+    # A single file without -wal/-shm siblings, which is what routes.py copies
+    with sqlite3.connect(database) as connection:
+        connection.execute("PRAGMA journal_mode=DELETE")
+    connection.close()
+    print(f"Wrote {database} ({database.stat().st_size // 1024} KiB)")
+    for table, count in counts.items():
+        print(f"{table:>14}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Compare SQLite query plans and timings of the list queries with and without the time column indexes.
+
+Usage: python benchmarks/query_plans.py [--rows 200000] [--repeat 20]
+"""
+
+import argparse
+import datetime
+import os
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+
+TIME_COLUMNS = {
+    "login_stats": "login_dt",
+    "data": "date",
+    "visits": "date",
+    "breastfeeding": "start_dt",
+    "photos": "date",
+    "activities": "start_dt",
+}
+
+
+def create_schema(path: Path) -> None:
+    os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    from lucinka.app import create_app  # noqa: PLC0415
+    from lucinka.models import db  # noqa: PLC0415
+
+    app = create_app(dev=True)
+    with app.app_context():
+        db.create_all()
+
+
+def fill(connection: sqlite3.Connection, rows: int) -> None:
+    start = datetime.datetime(2024, 1, 1)  # noqa: DTZ001
+    connection.execute("INSERT INTO users (id, username, password_hash, is_admin) VALUES (1, 'bench', '', 1)")
+    timestamps = [(start + datetime.timedelta(minutes=7 * i)).isoformat(sep=" ") for i in range(rows)]
+    now = start.isoformat(sep=" ")
+    connection.executemany(
+        "INSERT INTO breastfeeding (user_id, created_dt, start_dt, end_dt, left_duration, right_duration,"
+        " is_pumped, is_breast, ml_amount) VALUES (1, ?, ?, ?, 10, 10, 0, 1, 0)",
+        ((now, ts, ts) for ts in timestamps),
+    )
+    connection.executemany(
+        "INSERT INTO activities (user_id, activity_type, start_dt, end_dt, created_dt) VALUES (1, 'sleeping', ?, ?, ?)",
+        ((ts, ts if i % 1000 else None, now) for i, ts in enumerate(timestamps)),
+    )
+    connection.executemany(
+        "INSERT INTO login_stats (user_id, login_dt) VALUES (1, ?)",
+        ((ts,) for ts in timestamps),
+    )
+    connection.executemany(
+        "INSERT INTO data (user_id, created_dt, date, weight) VALUES (1, ?, ?, 4.2)",
+        ((now, ts[:10]) for ts in timestamps),
+    )
+    connection.executemany(
+        "INSERT INTO visits (user_id, created_dt, date, doctor, location, type) VALUES (1, ?, ?, '', '', '')",
+        ((now, ts) for ts in timestamps),
+    )
+    connection.executemany(
+        "INSERT INTO photos (user_id, created_dt, date, ext) VALUES (1, ?, ?, '.jpg')",
+        ((now, ts) for ts in timestamps),
+    )
+    connection.commit()
+
+
+def queries() -> list[tuple[str, str, tuple]]:
+    result = []
+    for table, column in TIME_COLUMNS.items():
+        order = f"ORDER BY {column} DESC, id DESC"
+        result += [
+            (f"{table}: first page", f"SELECT * FROM {table} {order} LIMIT 50", ()),  # noqa: S608
+            (
+                f"{table}: one week",
+                f"SELECT * FROM {table} WHERE {column} >= ? AND {column} < ? {order}",  # noqa: S608
+                ("2024-06-01", "2024-06-08"),
+            ),
+        ]
+    result.append(("activities: running", "SELECT * FROM activities WHERE end_dt IS NULL", ()))
+    return result
+
+
+def measure(connection: sqlite3.Connection, repeat: int) -> dict[str, tuple[str, float]]:
+    results = {}
+    for name, sql, params in queries():
+        plan = "; ".join(row[3] for row in connection.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+        begin = time.perf_counter()
+        for _ in range(repeat):
+            connection.execute(sql, params).fetchall()
+        results[name] = plan, (time.perf_counter() - begin) / repeat * 1000
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000, help="Rows per table.")
+    parser.add_argument("--repeat", type=int, default=20, help="Executions per query.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        create_schema(path)
+        connection = sqlite3.connect(path)
+        fill(connection, args.rows)
+
+        indexes = connection.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND name NOT LIKE 'sqlite_%' "
+            "AND tbl_name != 'users'",
+        ).fetchall()
+        for name, _ in indexes:
+            connection.execute(f"DROP INDEX {name}")
+        without = measure(connection, args.repeat)
+        for _, sql in indexes:
+            connection.execute(sql)
+        connection.execute("ANALYZE")
+        with_indexes = measure(connection, args.repeat)
+        connection.close()
+
+    for name, (plan, ms) in without.items():
+        indexed_plan, indexed_ms = with_indexes[name]
+        print(f"{name}")
+        print(f"  without indexes {ms:9.3f} ms  {plan}")
+        print(f"  with indexes    {indexed_ms:9.3f} ms  {indexed_plan}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Compare the latency of /api/login with the in-memory and the SQLite rate limit storage.
+
+Logins are attempted with an unknown user, so that password hashing does not
+hide the cost of the limiter. Each attempt comes from a different address to
+stay below the limit.
+
+Usage: python benchmarks/ratelimit.py [--requests 2000]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from http import HTTPStatus
+from pathlib import Path
+
+
+STORAGES = ["memory://", "sqlite:///{tmp}/ratelimit.db"]
+
+
+def measure(storage_uri: str, db_path: Path, requests: int) -> list[float]:
+    os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+    os.environ["RATELIMIT_STORAGE_URI"] = storage_uri
+    from lucinka.app import create_app  # noqa: PLC0415
+    from lucinka.models import db  # noqa: PLC0415
+
+    app = create_app(dev=True)
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+
+    timings = []
+    for i in range(requests):
+        # A different client address per request keeps every attempt below the limit
+        environ = {"REMOTE_ADDR": f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"}
+        begin = time.perf_counter()
+        response = client.post("/api/login", json={"username": "nobody", "password": "x"}, environ_base=environ)
+        timings.append((time.perf_counter() - begin) * 1000)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, response.status_code
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="Login attempts per storage.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for storage in STORAGES:
+            storage_uri = storage.format(tmp=tmp)
+            timings = measure(storage_uri, Path(tmp) / "bench.db", args.requests)
+            quantiles = statistics.quantiles(timings, n=100)
+            print(
+                f"{storage.split(':')[0]:>7}: mean {statistics.fmean(timings):.3f} ms"
+                f"  p50 {quantiles[49]:.3f} ms  p95 {quantiles[94]:.3f} ms  p99 {quantiles[98]:.3f} ms",
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,542 @@
+"""Measure the latency and throughput of every route on a dataset made by generate.py.
+
+Each route is requested through the Flask test client, one request at a time,
+and through a local HTTP server by ``--threads`` clients at once. Each driver
+works on its own copy of the dataset, so write routes of one run do not skew
+the other. A few warm-up requests per route are not counted.
+
+Results (p50/p95/p99 latency in milliseconds and requests per second) are
+printed and written as JSON, by default to ``benchmarks/results/<commit>.json``,
+for ``benchmarks/compare.py``. Routes without a scenario below are reported as
+uncovered. The rate limiter is disabled so that repeated logins are not
+rejected.
+
+Usage: python benchmarks/routes.py DATASET [--driver both] [--requests 200] [--threads 8] [--only /api/data]
+"""
+
+import argparse
+import collections
+import datetime
+import http.client
+import itertools
+import json
+import logging
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+
+if TYPE_CHECKING:
+    from flask import Flask
+
+ROOT = Path(__file__).parents[1]
+WARMUP = 3
+# Timestamps of rows created by the benchmark, after any generated data
+FUTURE = datetime.datetime(2040, 1, 1, tzinfo=datetime.UTC)
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    body: bytes = b""
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class Response:
+    status: int
+    headers: dict[str, str]
+    body: bytes
+
+
+def json_request(method: str, path: str, data: object) -> Request:
+    return Request(method, path, json.dumps(data).encode(), {"Content-Type": "application/json"})
+
+
+def multipart_request(path: str, fields: dict[str, str], filename: str, content: bytes) -> Request:
+    boundary = "lucinka-benchmark-boundary"
+    parts = [
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in fields.items()
+    ]
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="photo"; filename="{filename}"\r\n'
+        f"Content-Type: application/octet-stream\r\n\r\n".encode()
+        + content
+        + f"\r\n--{boundary}--\r\n".encode(),
+    )
+    return Request("POST", path, b"".join(parts), {"Content-Type": f"multipart/form-data; boundary={boundary}"})
+
+
+class Context:
+    """What scenarios need to build their requests: the dataset and an untimed way to prepare state."""
+
+    def __init__(self, send: Callable[[Request], Response], database: Path, upload_folder: Path) -> None:
+        self.send = send
+        self.database = database
+        self.upload_folder = upload_folder
+        self._counter = itertools.count()
+        # Uploads reuse a file of the dataset
+        sha256, ext = self.query("SELECT sha256, ext FROM photos WHERE sha256 IS NOT NULL LIMIT 1")[0]
+        self.photo_ext = ext
+        self.photo = (upload_folder / sha256[:2] / sha256[2:4] / f"{sha256}{ext}").read_bytes()
+
+    def query(self, sql: str, params: tuple = ()) -> list[tuple]:
+        with sqlite3.connect(self.database) as connection:
+            return connection.execute(sql, params).fetchall()
+
+    def unique(self) -> int:
+        return next(self._counter)
+
+    def timestamp(self) -> str:
+        return (FUTURE + datetime.timedelta(minutes=self.unique())).isoformat()
+
+    def created_ids(self, table: str, create: Callable[[], None]) -> list[int]:
+        """Run `create` and return the ids of the rows it added to `table`."""
+        before = self.query(f"SELECT coalesce(max(id), 0) FROM {table}")[0][0]  # noqa: S608
+        create()
+        return [row[0] for row in self.query(f"SELECT id FROM {table} WHERE id > ? ORDER BY id", (before,))]  # noqa: S608
+
+    def start_upload(self) -> str:
+        body = {"filename": f"bench{self.photo_ext}", "size": len(self.photo), "date": self.timestamp()}
+        return json.loads(self.send(json_request("POST", "/api/uploads", body)).body)["id"]
+
+
+@dataclass
+class Scenario:
+    name: str
+    # Builds the given number of requests, preparing whatever they need
+    build: Callable[[Context, int], list[Request]]
+    # At most this many requests are measured (for slow routes)
+    limit: int | None = None
+    # Only wait for the first chunk of the body (for endless streams)
+    stream: bool = False
+
+    @property
+    def method(self) -> str:
+        return self.name.split()[0]
+
+    @property
+    def rule(self) -> str:
+        return self.name.split()[1].split("?")[0]
+
+
+def same(method: str, path: str) -> Callable[[Context, int], list[Request]]:
+    return lambda _ctx, n: [Request(method, path)] * n
+
+
+def entry(table: str, ctx: Context) -> dict:
+    if table == "data":
+        return {"date": ctx.timestamp()[:10], "weight": 4.2, "height": 55}
+    if table == "visits":
+        return {"date": ctx.timestamp(), "doctor": "Dr. Bench", "location": "Praha", "type": "checkup"}
+    if table == "breastfeeding":
+        start = ctx.timestamp()
+        return {"start_dt": start, "end_dt": start, "left_duration": 10, "right_duration": 5}
+    return {"activity_type": "sleeping", "start_dt": ctx.timestamp(), "end_dt": None}
+
+
+def add(table: str) -> Callable[[Context, int], list[Request]]:
+    return lambda ctx, n: [json_request("POST", f"/api/{table}", entry(table, ctx)) for _ in range(n)]
+
+
+def add_bulk(table: str, size: int = 100) -> Callable[[Context, int], list[Request]]:
+    def build(ctx: Context, n: int) -> list[Request]:
+        return [
+            json_request(
+                "POST",
+                f"/api/{table}/bulk",
+                [{**entry(table, ctx), "idempotency_key": f"bench-{ctx.unique()}"} for _ in range(size)],
+            )
+            for _ in range(n)
+        ]
+
+    return build
+
+
+def add_photo(ctx: Context) -> Request:
+    return multipart_request("/api/photos", {"date": ctx.timestamp()}, f"bench{ctx.photo_ext}", ctx.photo)
+
+
+def delete(table: str) -> Callable[[Context, int], list[Request]]:
+    def build(ctx: Context, n: int) -> list[Request]:
+        def create() -> None:
+            if table == "photos":
+                for _ in range(n):
+                    ctx.send(add_photo(ctx))
+            elif table == "visits":
+                for request in add(table)(ctx, n):
+                    ctx.send(request)
+            else:
+                for offset in range(0, n, 1000):
+                    ctx.send(add_bulk(table, min(1000, n - offset))(ctx, 1)[0])
+
+        return [Request("DELETE", f"/api/{table}/{row_id}") for row_id in ctx.created_ids(table, create)]
+
+    return build
+
+
+def update_activities(ctx: Context, n: int) -> list[Request]:
+    ids = [row[0] for row in ctx.query("SELECT id FROM activities ORDER BY id DESC LIMIT ?", (n,))]
+    return [json_request("PATCH", f"/api/activities/{row_id}", {"end_dt": ctx.timestamp()}) for row_id in ids]
+
+
+def serve_photos(query: str = "") -> Callable[[Context, int], list[Request]]:
+    def build(ctx: Context, n: int) -> list[Request]:
+        rows = ctx.query("SELECT DISTINCT sha256, ext FROM photos WHERE sha256 IS NOT NULL")
+        paths = itertools.cycle(f"/api/photos/{sha[:2]}/{sha[2:4]}/{sha}{ext}{query}" for sha, ext in rows)
+        return [Request("GET", next(paths)) for _ in range(n)]
+
+    return build
+
+
+def uploads(action: str) -> Callable[[Context, int], list[Request]]:
+    def build(ctx: Context, n: int) -> list[Request]:
+        if action == "start":
+            return [
+                json_request("POST", "/api/uploads", {"filename": "bench.jpg", "size": 1024, "date": ctx.timestamp()})
+                for _ in range(n)
+            ]
+        if action == "status":
+            return [Request("GET", f"/api/uploads/{ctx.start_upload()}")] * n
+        upload_ids = [ctx.start_upload() for _ in range(n)]
+        if action == "chunk":
+            return [Request("PUT", f"/api/uploads/{upload_id}?offset=0", ctx.photo) for upload_id in upload_ids]
+        if action == "cancel":
+            return [Request("DELETE", f"/api/uploads/{upload_id}") for upload_id in upload_ids]
+        for upload_id in upload_ids:
+            ctx.send(Request("PUT", f"/api/uploads/{upload_id}?offset=0", ctx.photo))
+        return [Request("POST", f"/api/uploads/{upload_id}/finalize") for upload_id in upload_ids]
+
+    return build
+
+
+def export_tables_only(ctx: Context, n: int) -> list[Request]:
+    skip = [f"photos/{path.relative_to(ctx.upload_folder).as_posix()}" for path in ctx.upload_folder.rglob("*.*")]
+    return [json_request("POST", "/api/export.zip", {"skip": skip})] * n
+
+
+LOGIN = {"username": "admin", "password": "bench"}
+
+SCENARIOS = [
+    Scenario("GET /", same("GET", "/")),
+    Scenario("GET /<path:filename>", same("GET", "/assets/index.js")),
+    Scenario("GET /healthz", same("GET", "/healthz")),
+    Scenario("POST /api/login", lambda _ctx, n: [json_request("POST", "/api/login", LOGIN)] * n, limit=50),
+    Scenario("POST /api/logout", same("POST", "/api/logout")),
+    Scenario("GET /api/users", same("GET", "/api/users")),
+    Scenario("GET /api/current-user", same("GET", "/api/current-user")),
+    Scenario(
+        "GET /api/bundle?keys=user,data,visits,breastfeeding,photos,activities",
+        same("GET", "/api/bundle?keys=user,data,visits,breastfeeding,photos,activities"),
+        limit=10,
+    ),
+    Scenario("GET /api/sync?since=0", same("GET", "/api/sync?since=0")),
+    Scenario("GET /api/events", same("GET", "/api/events"), stream=True),
+    Scenario("GET /api/login-stats", same("GET", "/api/login-stats"), limit=50),
+    Scenario("GET /api/data", same("GET", "/api/data")),
+    Scenario("POST /api/data", add("data")),
+    Scenario("POST /api/data/bulk", add_bulk("data")),
+    Scenario("DELETE /api/data/<int:entry_id>", delete("data")),
+    Scenario("GET /api/visits", same("GET", "/api/visits")),
+    Scenario("POST /api/visits", add("visits")),
+    Scenario("DELETE /api/visits/<int:visit_id>", delete("visits")),
+    Scenario("GET /api/breastfeeding", same("GET", "/api/breastfeeding"), limit=20),
+    Scenario("GET /api/breastfeeding?limit=100", same("GET", "/api/breastfeeding?limit=100")),
+    Scenario("GET /api/breastfeeding/stats/daily", same("GET", "/api/breastfeeding/stats/daily")),
+    Scenario("GET /api/breastfeeding/stats/hourly", same("GET", "/api/breastfeeding/stats/hourly")),
+    Scenario("GET /api/breastfeeding/stats/monthly", same("GET", "/api/breastfeeding/stats/monthly")),
+    Scenario("GET /api/breastfeeding/stats/timeline", same("GET", "/api/breastfeeding/stats/timeline")),
+    Scenario("POST /api/breastfeeding", add("breastfeeding")),
+    Scenario("POST /api/breastfeeding/bulk", add_bulk("breastfeeding")),
+    Scenario("DELETE /api/breastfeeding/<int:breastfeeding_id>", delete("breastfeeding")),
+    Scenario("GET /api/activities", same("GET", "/api/activities"), limit=20),
+    Scenario("POST /api/activities", add("activities")),
+    Scenario("POST /api/activities/bulk", add_bulk("activities")),
+    Scenario("PATCH /api/activities/<int:activity_id>", update_activities),
+    Scenario("DELETE /api/activities/<int:activity_id>", delete("activities")),
+    Scenario("GET /api/photos", same("GET", "/api/photos"), limit=50),
+    Scenario("POST /api/photos", lambda ctx, n: [add_photo(ctx) for _ in range(n)], limit=50),
+    Scenario("GET /api/photos/<path:filename>", serve_photos()),
+    Scenario("GET /api/photos/<path:filename>?size=thumb", serve_photos("?size=thumb")),
+    Scenario("DELETE /api/photos/<int:photo_id>", delete("photos"), limit=50),
+    Scenario("POST /api/uploads", uploads("start")),
+    Scenario("GET /api/uploads/<upload_id>", uploads("status")),
+    Scenario("PUT /api/uploads/<upload_id>", uploads("chunk"), limit=50),
+    Scenario("POST /api/uploads/<upload_id>/finalize", uploads("finalize"), limit=50),
+    Scenario("DELETE /api/uploads/<upload_id>", uploads("cancel")),
+    Scenario("GET /api/export.zip", same("GET", "/api/export.zip"), limit=5),
+    Scenario("POST /api/export.zip", export_tables_only, limit=5),
+]
+
+
+class ClientDriver:
+    """Requests sent one at a time through the Flask test client."""
+
+    name = "client"
+
+    def __init__(self, app: "Flask") -> None:
+        self.client = app.test_client(use_cookies=False)
+        self.cookie = ""
+
+    def send(self, request: Request, *, stream: bool = False) -> Response:
+        response = self.client.open(
+            request.path,
+            method=request.method,
+            data=request.body,
+            headers={**request.headers, "Cookie": self.cookie},
+            buffered=False,
+        )
+        body = next(iter(response.response), b"") if stream else response.get_data()
+        response.close()
+        return Response(response.status_code, response.headers, body)
+
+    def run(self, requests: list[Request], *, stream: bool = False) -> tuple[list[float], list[int], float]:
+        timings = []
+        statuses = []
+        begin = time.perf_counter()
+        for request in requests:
+            start = time.perf_counter()
+            statuses.append(self.send(request, stream=stream).status)
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings, statuses, time.perf_counter() - begin
+
+    def close(self) -> None:
+        pass
+
+
+class HTTPDriver:
+    """Requests sent by several threads at once, each over its own keep-alive connection, to a local server."""
+
+    name = "http"
+
+    def __init__(self, app: "Flask", threads: int) -> None:
+        from werkzeug.serving import make_server  # noqa: PLC0415
+
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        self.server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.pool = ThreadPoolExecutor(threads)
+        self.cookie = ""
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if getattr(self._local, "connection", None) is None:
+            self._local.connection = http.client.HTTPConnection("127.0.0.1", self.server.server_port, timeout=120)
+        return self._local.connection
+
+    def _reset(self) -> None:
+        self._local.connection.close()
+        self._local.connection = None
+
+    def send(self, request: Request, *, stream: bool = False) -> Response:
+        headers = {**request.headers, "Cookie": self.cookie}
+        for attempt in range(2):
+            try:
+                connection = self._connection()
+                connection.request(request.method, request.path, body=request.body or None, headers=headers)
+                response = connection.getresponse()
+                body = response.read1(65536) if stream else response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionError):
+                # The server closed an idle keep-alive connection
+                self._reset()
+                if attempt:
+                    raise
+        if stream or response.will_close:
+            self._reset()
+        return Response(response.status, dict(response.getheaders()), body)
+
+    def run(self, requests: list[Request], *, stream: bool = False) -> tuple[list[float], list[int], float]:
+        def timed(request: Request) -> tuple[float, int]:
+            start = time.perf_counter()
+            status = self.send(request, stream=stream).status
+            return (time.perf_counter() - start) * 1000, status
+
+        begin = time.perf_counter()
+        results = list(self.pool.map(timed, requests))
+        return [r[0] for r in results], [r[1] for r in results], time.perf_counter() - begin
+
+    def close(self) -> None:
+        self.pool.shutdown()
+        self.server.shutdown()
+
+
+def make_static_folder(folder: Path) -> None:
+    """Stand-ins for the built frontend, which the benchmark does not need to build."""
+    (folder / "assets").mkdir(parents=True)
+    (folder / "index.html").write_text('<!doctype html><script src="/assets/index.js"></script>' + " " * 2000)
+    (folder / "assets" / "index.js").write_text("".join(f"const v{i} = {i} * 2;\n" for i in range(10000)))
+
+
+def create_app(dataset: Path, tmp: Path):
+    """Create the production app on a fresh copy of the dataset."""
+    shutil.copy(dataset / "app.db", tmp / "app.db")
+    shutil.copytree(dataset / "photos", tmp / "photos")
+    static_folder = tmp / "static"
+    make_static_folder(static_folder)
+    os.environ.update(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp / 'app.db'}",
+            "UPLOAD_FOLDER": str(tmp / "photos"),
+            "STATIC_FOLDER": str(static_folder),
+            "SECRET_KEY": "benchmark-secret-key",
+            # Streams end quickly so that the HTTP server does not keep a thread per measured request
+            "EVENTS_MAX_STREAMS": "100000",
+            "EVENTS_HEARTBEAT": "1",
+            "EVENTS_STREAM_DURATION": "1",
+        },
+    )
+    from lucinka.app import create_app as _create_app  # noqa: PLC0415
+
+    app = _create_app(dev=False)
+    for limiter in app.extensions["limiter"]:
+        limiter.enabled = False
+    return app
+
+
+def summarize(timings: list[float], statuses: list[int], wall: float) -> dict:
+    quantiles = statistics.quantiles(timings, n=100, method="inclusive") if len(timings) > 1 else timings * 99
+    return {
+        "requests": len(timings),
+        "errors": sum(status >= HTTPStatus.BAD_REQUEST for status in statuses),
+        "statuses": dict(collections.Counter(map(str, statuses))),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "p50_ms": round(quantiles[49], 3),
+        "p95_ms": round(quantiles[94], 3),
+        "p99_ms": round(quantiles[98], 3),
+        "max_ms": round(max(timings), 3),
+        "throughput_rps": round(len(timings) / wall, 1),
+    }
+
+
+def measure(
+    driver: ClientDriver | HTTPDriver,
+    ctx: Context,
+    scenarios: list[Scenario],
+    requests: int,
+) -> dict[str, dict]:
+    results = {}
+    for scenario in scenarios:
+        count = min(requests, scenario.limit or requests)
+        built = scenario.build(ctx, WARMUP + count)
+        driver.run(built[:WARMUP], stream=scenario.stream)
+        result = summarize(*driver.run(built[WARMUP:], stream=scenario.stream))
+        results[scenario.name] = result
+        print(
+            f"{driver.name:>6} {scenario.name[:60]:<60} p50 {result['p50_ms']:9.2f}  p95 {result['p95_ms']:9.2f}"
+            f"  p99 {result['p99_ms']:9.2f} ms  {result['throughput_rps']:8.1f}/s"
+            + (f"  {result['errors']} errors {result['statuses']}" if result["errors"] else ""),
+            flush=True,
+        )
+    return results
+
+
+def coverage(app: "Flask", scenarios: list[Scenario]) -> tuple[list[Scenario], list[str]]:
+    """Return the scenarios of existing routes and the routes no scenario covers.
+
+    A route counts as covered when any of its URL rules has a scenario (e.g.
+    ``/`` for all the frontend pages).
+    """
+    rules = {
+        (method, rule.rule): rule.endpoint
+        for rule in app.url_map.iter_rules()
+        for method in rule.methods - {"HEAD", "OPTIONS"}
+    }
+    existing = [scenario for scenario in scenarios if (scenario.method, scenario.rule) in rules]
+    covered = {(scenario.method, rules[scenario.method, scenario.rule]) for scenario in existing}
+    uncovered = sorted(
+        f"{method} {rule}" for (method, rule), endpoint in rules.items() if (method, endpoint) not in covered
+    )
+    return existing, uncovered
+
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],  # noqa: S607
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],  # noqa: S607
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("dataset", type=Path, help="Folder written by generate.py.")
+    parser.add_argument("--driver", choices=["client", "http", "both"], default="both")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per route.")
+    parser.add_argument("--threads", type=int, default=8, help="Concurrent clients of the HTTP driver.")
+    parser.add_argument("--only", help="Only run routes whose name contains this.")
+    parser.add_argument("--output", type=Path, help="Results file (default: benchmarks/results/<commit>.json).")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    drivers = ["client", "http"] if args.driver == "both" else [args.driver]
+    results = {}
+    uncovered = []
+    for name in drivers:
+        with tempfile.TemporaryDirectory() as tmp:
+            app = create_app(args.dataset, Path(tmp))
+            driver = ClientDriver(app) if name == "client" else HTTPDriver(app, args.threads)
+            try:
+                login = driver.send(json_request("POST", "/api/login", LOGIN))
+                assert login.status == HTTPStatus.OK, login.body
+                driver.cookie = login.headers["Set-Cookie"].split(";")[0]
+                ctx = Context(driver.send, Path(tmp) / "app.db", Path(tmp) / "photos")
+                scenarios, uncovered = coverage(app, SCENARIOS)
+                scenarios = [s for s in scenarios if not args.only or args.only in s.name]
+                results[name] = measure(driver, ctx, scenarios, args.requests)
+            finally:
+                driver.close()
+
+    for route in uncovered:
+        print(f"No scenario for {route}")
+
+    output = args.output or ROOT / "benchmarks" / "results" / f"{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with sqlite3.connect(args.dataset / "app.db") as connection:
+        tables = ("users", "login_stats", "data", "visits", "breastfeeding", "activities", "photos")
+        counts = {t: connection.execute(f"SELECT count(*) FROM {t}").fetchone()[0] for t in tables}  # noqa: S608
+    connection.close()
+    meta = {
+        "commit": commit,
+        "created": datetime.datetime.now(datetime.UTC).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "fast_json": os.environ.get("FAST_JSON", ""),
+        "requests": args.requests,
+        "threads": args.threads,
+        "dataset": counts,
+    }
+    output.write_text(json.dumps({"meta": meta, "results": results, "uncovered": uncovered}, indent=2))
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Check that the CLI and migrations start within a fixed time budget.
+
+Each command runs with ``python -X importtime`` several times. The best wall
+time and the total import time of that run are compared with the budget, and
+the script exits with status 1 if any command is over it. Pass ``--verbose``
+to list the slowest imports.
+
+Usage: python benchmarks/startup.py [--runs 5] [--verbose]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).parents[1]
+
+# Budgets in milliseconds: (wall time, import time). Importing lucinka.app (Flask,
+# SQLAlchemy ORM, marshmallow, ...) alone takes several hundred milliseconds, so
+# these fail as soon as either command starts building the app again. Which
+# modules get imported is checked by tests/test_cli.py; this only tracks time.
+BUDGETS = {
+    "lucinka --help": (300, 150),
+    "alembic upgrade head": (1000, 800),
+}
+
+
+def commands(database: Path) -> dict[str, tuple[list[str], dict[str, str]]]:
+    env = {**os.environ, "PYTHONPATH": str(ROOT), "SQLALCHEMY_DATABASE_URI": f"sqlite:///{database}"}
+    return {
+        "lucinka --help": (["-m", "lucinka", "--help"], env),
+        "alembic upgrade head": (["-m", "alembic", "upgrade", "head"], env),
+    }
+
+
+def parse_importtime(stderr: str) -> list[tuple[int, str]]:
+    """Return ``(self time in microseconds, module)`` for every import reported by ``-X importtime``."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, module = line.removeprefix("import time:").split("|")
+        imports.append((int(self_us), module.strip()))
+    return imports
+
+
+def run(args: list[str], env: dict[str, str]) -> tuple[float, list[tuple[int, str]]]:
+    begin = time.perf_counter()
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", *args],
+        env=env,
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return (time.perf_counter() - begin) * 1000, parse_importtime(result.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Runs per command, the fastest one counts.")
+    parser.add_argument("--verbose", action="store_true", help="List the slowest imports of each command.")
+    args = parser.parse_args()
+
+    over_budget = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (command, env) in commands(Path(tmp) / "startup.db").items():
+            # The first run creates the database, later ones only start up
+            run(command, env)
+            wall_ms, imports = min((run(command, env) for _ in range(args.runs)), key=lambda r: r[0])
+            import_ms = sum(self_us for self_us, _ in imports) / 1000
+            wall_budget, import_budget = BUDGETS[name]
+            ok = wall_ms <= wall_budget and import_ms <= import_budget
+            over_budget |= not ok
+            print(
+                f"{'ok  ' if ok else 'OVER'} {name}: wall {wall_ms:.0f}/{wall_budget} ms,"
+                f" imports {import_ms:.0f}/{import_budget} ms",
+            )
+            if args.verbose:
+                for self_us, module in sorted(imports, reverse=True)[:15]:
+                    print(f"       {self_us / 1000:7.1f} ms  {module}")
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
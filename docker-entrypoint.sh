@@ -3,5 +3,5 @@
 echo "Running database migrations..."
 alembic upgrade head
 
-echo "Starting flask server..."
-lucinka run --port=5000
\ No newline at end of file
+echo "Starting server..."
+exec lucinka serve --port=5000 --workers="${WORKERS:-2}" --threads="${THREADS:-4}"
\ No newline at end of file
@@ -1,13 +1,24 @@
 from datetime import datetime
+from functools import cache
+from pathlib import Path
+from typing import TextIO
 
 import click
 
-from lucinka.app import create_app
-from lucinka.models import Breastfeeding, DataEntry, User, Visit, db
-from lucinka.users import create_user as _create_user
 
+# Kept in sync with lucinka.transfer.TABLES, which is too expensive to import for --help
+TRANSFER_TABLES = ["data", "visits", "breastfeeding", "activities"]
+# Invalid rows listed by `lucinka import`
+MAX_REPORTED_ERRORS = 20
 
-app = create_app(dev=True)
+
+# Most commands need neither the app nor its dependencies, so both are imported
+# and created on first use to keep the CLI fast to start.
+@cache
+def get_app():
+    from lucinka.app import create_app
+
+    return create_app(dev=True)
 
 
 @click.group()
@@ -19,16 +30,56 @@ def cli() -> None:
 @click.option("--port", default=5000, help="Port to run the server on.")
 def run(port: int) -> None:
     """Run the development server."""
+    from lucinka.app import create_app
+
     app = create_app(dev=False)
     app.run(debug=False, host="0.0.0.0", port=port)
 
 
+@cli.command("serve")
+@click.option("--host", default="0.0.0.0", help="Address to bind to.")  # noqa: S104
+@click.option("--port", default=5000, help="Port to run the server on.")
+@click.option("--workers", default=2, help="Number of worker processes.")
+@click.option("--threads", default=4, help="Number of threads per worker for requests.")
+@click.option(
+    "--event-streams",
+    default=2,
+    envvar="EVENTS_MAX_STREAMS",
+    help="Server-sent event streams per worker, each served by an extra thread.",
+)
+@click.option("--keepalive", default=5, help="Seconds to keep idle connections open.")
+@click.option("--timeout", default=60, help="Seconds before a silent worker is restarted.")
+@click.option("--graceful-timeout", default=30, help="Seconds to finish in-flight requests on shutdown.")
+def serve(  # noqa: PLR0913
+    host: str,
+    port: int,
+    workers: int,
+    threads: int,
+    event_streams: int,
+    keepalive: int,
+    timeout: int,
+    graceful_timeout: int,
+) -> None:
+    """Run the production server."""
+    from lucinka.server import serve as _serve
+
+    _serve(
+        host=host,
+        port=port,
+        workers=workers,
+        threads=threads,
+        event_streams=event_streams,
+        keepalive=keepalive,
+        timeout=timeout,
+        graceful_timeout=graceful_timeout,
+    )
+
+
 @cli.command("debug")
 @click.option("--port", default=5000, help="Port to run the server on.")
 def debug(port: int) -> None:
     """Run the development server."""
-    app = create_app(dev=True)
-    app.run(debug=True, port=port)
+    get_app().run(debug=True, port=port)
 
 
 @cli.group()
@@ -46,10 +97,22 @@ def data() -> None:
     """Data management commands."""
 
 
+@cli.group()
+def static() -> None:
+    """Static asset commands."""
+
+
+@cli.group()
+def photos() -> None:
+    """Photo management commands."""
+
+
 @user.command("list")
 def list_users() -> None:
     """List all users."""
-    with app.app_context():
+    from lucinka.models import User
+
+    with get_app().app_context():
         users = User.query.all()
         for user in users:
             if user.is_admin:
@@ -61,7 +124,9 @@ def list_users() -> None:
 @admin.command("list")
 def list_admins() -> None:
     """List all admin users."""
-    with app.app_context():
+    from lucinka.models import User
+
+    with get_app().app_context():
         admins = User.query.filter_by(is_admin=True)
         for admin in admins:
             click.secho(f"{admin.username}", fg="blue")
@@ -72,8 +137,12 @@ def list_admins() -> None:
 @click.argument("password")
 def create_admin(username: str, password: str) -> None:
     """Create an admin user."""
-    with app.app_context():
+    from lucinka.users import create_user as _create_user
+    from lucinka.users import invalidate_user_cache
+
+    with get_app().app_context():
         _create_user(username, password, is_admin=True)
+        invalidate_user_cache()
         click.secho(f"Admin user {username} created.", fg="green")
 
 
@@ -82,8 +151,12 @@ def create_admin(username: str, password: str) -> None:
 @click.argument("password")
 def create_user(username: str, password: str) -> None:
     """Create a user."""
-    with app.app_context():
+    from lucinka.users import create_user as _create_user
+    from lucinka.users import invalidate_user_cache
+
+    with get_app().app_context():
         _create_user(username, password, is_admin=False)
+        invalidate_user_cache()
         click.secho(f"User {username} created.", fg="green")
 
 
@@ -91,11 +164,15 @@ def create_user(username: str, password: str) -> None:
 @click.argument("username")
 def delete_user(username: str) -> None:
     """Delete a user."""
-    with app.app_context():
+    from lucinka.models import User, db
+    from lucinka.users import invalidate_user_cache
+
+    with get_app().app_context():
         user = User.query.filter_by(username=username).first()
         if user:
             db.session.delete(user)
             db.session.commit()
+            invalidate_user_cache()
             click.secho(f"User {username} deleted.", fg="green")
         else:
             click.secho(f"User {username} not found.", fg="red")
@@ -104,19 +181,33 @@ def delete_user(username: str) -> None:
 @data.command("list")
 def list_data() -> None:
     """List all data entries."""
-    with app.app_context():
-        for entry in DataEntry.query.order_by(DataEntry.date).all():
+    from lucinka.models import Breastfeeding, DataEntry, Visit
+
+    with get_app().app_context():
+        for entry in DataEntry.query.order_by(DataEntry.date).yield_per(1000):
             click.secho(f"{entry.id} | {entry.date} | {entry.weight}kg | {entry.height}cm | {entry.notes}", fg="blue")
-        for visit in Visit.query.order_by(Visit.date).all():
-            click.secho(f"{visit.id} | {visit.date} | {visit.doctor} | {visit.location} | Type: {visit.type} | Notes: {visit.notes}", fg="green")
-        for breastfeeding in Breastfeeding.query.order_by(Breastfeeding.date).all():
-            click.secho(f"{breastfeeding.id} | {breastfeeding.date} | Breast: {breastfeeding.breast} | Left Duration: {breastfeeding.left_duration}min | Right Duration: {breastfeeding.right_duration}min", fg="magenta")
+        for visit in Visit.query.order_by(Visit.date).yield_per(1000):
+            click.secho(
+                f"{visit.id} | {visit.date} | {visit.doctor} | {visit.location} | Type: {visit.type}"
+                f" | Notes: {visit.notes}",
+                fg="green",
+            )
+        for breastfeeding in Breastfeeding.query.order_by(Breastfeeding.start_dt).yield_per(1000):
+            click.secho(
+                f"{breastfeeding.id} | {breastfeeding.start_dt} - {breastfeeding.end_dt}"
+                f" | Left Duration: {breastfeeding.left_duration}min"
+                f" | Right Duration: {breastfeeding.right_duration}min | {breastfeeding.ml_amount}ml",
+                fg="magenta",
+            )
+
 
 @data.command("delete")
 @click.argument("data_id", type=int)
 def delete_data(data_id: int) -> None:
     """Delete a data entry by ID."""
-    with app.app_context():
+    from lucinka.models import DataEntry, db
+
+    with get_app().app_context():
         entry = DataEntry.query.get(data_id)
         if entry:
             db.session.delete(entry)
@@ -126,6 +217,65 @@ def delete_data(data_id: int) -> None:
             click.secho(f"Data entry {data_id} not found.", fg="red")
 
 
+@data.command("rebuild-rollups")
+def rebuild_data_rollups() -> None:
+    """Recompute the daily rollup table from all feedings and activities."""
+    from lucinka.rollups import rebuild_rollups
+
+    with get_app().app_context():
+        count = rebuild_rollups()
+        click.secho(f"Rebuilt {count} daily rollups.", fg="green")
+
+
+@static.command("compress")
+@click.argument("folder", type=click.Path(exists=True, file_okay=False, path_type=Path), required=False)
+@click.option("--min-size", default=1024, help="Skip files smaller than this many bytes.")
+def compress_static_files(folder: Path | None, min_size: int) -> None:
+    """Pre-compress static assets into .br/.gz siblings."""
+    from lucinka.compression import compress_static
+
+    folder = folder or Path(get_app().static_folder)
+    count = compress_static(folder, min_size=min_size)
+    click.secho(f"Wrote {count} compressed files in {folder}.", fg="green")
+
+
+@photos.command("build-thumbnails")
+@click.option("--force", is_flag=True, help="Regenerate variants that already exist.")
+@click.option("--workers", type=int, default=None, help="Number of processes (defaults to the number of cores).")
+def build_thumbnails(*, force: bool, workers: int | None) -> None:
+    """Generate thumbnail and medium-size variants for all photos."""
+    from lucinka.thumbnails import build_all_variants
+
+    count, skipped = build_all_variants(Path(get_app().config["UPLOAD_FOLDER"]), force=force, workers=workers)
+    click.secho(f"Generated variants for {count} photos.", fg="green")
+    for path in skipped:
+        click.secho(f"Skipped {path}, it is not a readable image.", fg="yellow")
+
+
+@photos.command("rehome")
+def rehome() -> None:
+    """Move photos stored under their id into the content-addressed layout and record their hash."""
+    from lucinka.storage import rehome_photos
+
+    with get_app().app_context():
+        count, missing = rehome_photos(Path(get_app().config["UPLOAD_FOLDER"]))
+    click.secho(f"Rehomed {count} photos.", fg="green")
+    for photo_id in missing:
+        click.secho(f"File for photo {photo_id} is missing.", fg="yellow")
+
+
+@photos.command("expire-uploads")
+@click.option("--max-age", type=float, default=None, help="Hours since the last chunk (defaults to UPLOAD_EXPIRY).")
+def expire_photo_uploads(max_age: float | None) -> None:
+    """Delete unfinished resumable uploads that were abandoned."""
+    from lucinka.uploads import expire_uploads
+
+    config = get_app().config
+    max_age = config["UPLOAD_EXPIRY"] if max_age is None else max_age * 60 * 60
+    count = expire_uploads(Path(config["UPLOAD_FOLDER"]), max_age)
+    click.secho(f"Deleted {count} abandoned uploads.", fg="green")
+
+
 @data.command("add")
 @click.argument("date")
 @click.option("--user", type=str, required=True, help="Username of the user.")
@@ -134,7 +284,9 @@ def delete_data(data_id: int) -> None:
 @click.option("--notes", type=str, required=False, help="Additional notes.")
 def add_data(date: str, user: str, weight: float, height: float, notes: str) -> None:
     """Add a new data entry."""
-    with app.app_context():
+    from lucinka.models import DataEntry, User, db
+
+    with get_app().app_context():
         dt = datetime.fromisoformat(date)
         user = User.query.filter_by(username=user).first()
         if not user:
@@ -146,5 +298,126 @@ def add_data(date: str, user: str, weight: float, height: float, notes: str) ->
         click.secho(f"Data entry added: {entry.date} | {entry.weight}kg | {entry.height}cm | {entry.notes}", fg="green")
 
 
+@cli.command("backup")
+@click.argument("backup_dir", type=click.Path(file_okay=False, path_type=Path))
+@click.option("--photos", "with_photos", is_flag=True, help="Also copy new and changed uploads.")
+@click.option("--pages", default=1024, help="Database pages copied per step.")
+def backup(*, backup_dir: Path, with_photos: bool, pages: int) -> None:
+    """Take a consistent snapshot of the live database into BACKUP_DIR."""
+    from sqlalchemy import make_url
+
+    from lucinka.backup import create_snapshot
+
+    config = get_app().config
+    database = Path(make_url(config["SQLALCHEMY_DATABASE_URI"]).database)
+    upload_folder = Path(config["UPLOAD_FOLDER"]) if with_photos else None
+    snapshot, manifest = create_snapshot(database, backup_dir, upload_folder=upload_folder, pages=pages)
+    click.secho(f"Wrote snapshot {snapshot} ({manifest['database']['size']} bytes).", fg="green")
+    if with_photos:
+        click.secho(f"Copied {manifest['photos_copied']} of {len(manifest['photos'])} uploads.", fg="green")
+
+
+@cli.command("restore")
+@click.argument("snapshot", type=click.Path(exists=True, file_okay=False, path_type=Path))
+@click.option("--photos", "with_photos", is_flag=True, help="Also restore missing and changed uploads.")
+@click.option("--check", is_flag=True, help="Only verify the checksums of the snapshot.")
+def restore(*, snapshot: Path, with_photos: bool, check: bool) -> None:
+    """Restore a snapshot written by `lucinka backup`.
+
+    SNAPSHOT is a snapshot folder, or a backup folder to restore its latest snapshot.
+    """
+    from sqlalchemy import make_url
+
+    from lucinka.backup import BackupError, restore_snapshot, snapshots, verify_snapshot
+    from lucinka.users import invalidate_user_cache
+
+    if not (snapshot / "manifest.json").is_file():
+        if not (existing := snapshots(snapshot)):
+            click.secho(f"No snapshots found in {snapshot}.", fg="red")
+            raise SystemExit(1)
+        snapshot = existing[-1]
+
+    if check:
+        try:
+            problems = verify_snapshot(snapshot)
+        except BackupError as e:
+            problems = [str(e)]
+        for problem in problems:
+            click.secho(problem, fg="red")
+        if problems:
+            raise SystemExit(1)
+        click.secho(f"Snapshot {snapshot} is intact.", fg="green")
+        return
+
+    config = get_app().config
+    database = Path(make_url(config["SQLALCHEMY_DATABASE_URI"]).database)
+    upload_folder = Path(config["UPLOAD_FOLDER"]) if with_photos else None
+    try:
+        count = restore_snapshot(snapshot, database, upload_folder=upload_folder)
+    except BackupError as e:
+        click.secho(str(e), fg="red")
+        raise SystemExit(1) from None
+    with get_app().app_context():
+        invalidate_user_cache()
+    click.secho(f"Restored {snapshot}.", fg="green")
+    if with_photos:
+        click.secho(f"Restored {count} uploads.", fg="green")
+
+
+@cli.command("export")
+@click.option("--table", type=click.Choice(TRANSFER_TABLES), required=True, help="Table to export.")
+@click.option("--format", "output_format", type=click.Choice(["csv", "jsonl"]), default="jsonl", help="Output format.")
+@click.option("--output", type=click.File("w", encoding="utf-8"), default="-", help="Output file (default: stdout).")
+def export_table(table: str, output_format: str, output: TextIO) -> None:
+    """Export all rows of a table as CSV or JSON lines."""
+    from lucinka.transfer import export_table as _export_table
+
+    with get_app().app_context():
+        count = _export_table(table, output, output_format)
+    click.secho(f"Exported {count} rows from {table}.", fg="green", err=True)
+
+
+@cli.command("import")
+@click.argument("source", type=click.File("r", encoding="utf-8"))
+@click.option("--table", type=click.Choice(TRANSFER_TABLES), required=True, help="Table to import into.")
+@click.option("--format", "input_format", type=click.Choice(["csv", "jsonl"]), default="jsonl", help="Input format.")
+@click.option("--user", type=str, required=True, help="Username of the user owning the rows.")
+@click.option("--batch-size", default=5000, help="Rows inserted per transaction.")
+@click.option("--dry-run", is_flag=True, help="Only validate the rows.")
+def import_table(  # noqa: PLR0913
+    *,
+    source: TextIO,
+    table: str,
+    input_format: str,
+    user: str,
+    batch_size: int,
+    dry_run: bool,
+) -> None:
+    """Import rows exported with `lucinka export` (or written by hand) into a table."""
+    from lucinka.models import User
+    from lucinka.transfer import import_rows, read_rows
+
+    with get_app().app_context():
+        owner = User.query.filter_by(username=user).first()
+        if not owner:
+            click.secho(f"User {user} not found.", fg="red")
+            raise SystemExit(1)
+        rows = read_rows(source, input_format)
+        valid, inserted, errors = import_rows(table, rows, user_id=owner.id, batch_size=batch_size, dry_run=dry_run)
+
+    for line_num, messages in errors[:MAX_REPORTED_ERRORS]:
+        click.secho(f"Line {line_num}: {messages}", fg="red")
+    if len(errors) > MAX_REPORTED_ERRORS:
+        click.secho(f"... and {len(errors) - MAX_REPORTED_ERRORS} more invalid rows.", fg="red")
+    if dry_run:
+        click.secho(f"{valid} valid and {len(errors)} invalid rows.", fg="yellow" if errors else "green")
+    else:
+        click.secho(f"Imported {inserted} rows into {table} ({valid - inserted} skipped).", fg="green")
+    if errors:
+        if not dry_run:
+            click.secho("Stopped at the first batch with invalid rows.", fg="red")
+        raise SystemExit(1)
+
+
 if __name__ == "__main__":
     cli()
@@ -3,8 +3,7 @@ from logging.config import fileConfig
 from alembic import context
 from sqlalchemy import engine_from_config, pool
 
-from lucinka.app import create_app
-from lucinka.models import Base
+from lucinka.config import Config
 
 
 # this is the Alembic Config object
@@ -14,14 +13,22 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
-# Get Flask app and its config
-app = create_app(dev=True)
-with app.app_context():
-    # Override sqlalchemy.url with app's database URI
-    config.set_main_option("sqlalchemy.url", app.config["SQLALCHEMY_DATABASE_URI"])
+# Override sqlalchemy.url with the app's database URI, without building the whole app
+config.set_main_option("sqlalchemy.url", Config(dev=True).SQLALCHEMY_DATABASE_URI)
 
-# Add model's MetaData object for 'autogenerate' support
-target_metadata = Base.metadata
+
+def get_target_metadata():
+    """Model's MetaData object for 'autogenerate' support.
+
+    Importing the models pulls in Flask, so this is skipped when only
+    running migrations.
+    """
+    cmd = getattr(config.cmd_opts, "cmd", None)
+    if not getattr(config.cmd_opts, "autogenerate", False) and (not cmd or cmd[0].__name__ != "check"):
+        return None
+    from lucinka.models import Base  # noqa: PLC0415
+
+    return Base.metadata
 
 
 def run_migrations() -> None:
@@ -35,7 +42,7 @@ def run_migrations() -> None:
     with connectable.connect() as connection:
         context.configure(
             connection=connection,
-            target_metadata=target_metadata,
+            target_metadata=get_target_metadata(),
         )
 
         with context.begin_transaction():
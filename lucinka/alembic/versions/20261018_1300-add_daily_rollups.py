@@ -0,0 +1,70 @@
+"""add daily rollups
+
+Revision ID: add_daily_rollups
+Revises: add_table_versions
+Create Date: 2026-10-18 13:00:00.000000
+
+Existing rows are backfilled here; `lucinka data rebuild-rollups` can be used
+to recompute the table at any time.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_daily_rollups'
+down_revision: Union[str, None] = 'add_table_versions'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'daily_rollups',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('category', sa.Text(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('pumped_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('left_minutes', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('right_minutes', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('pumped_ml', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('bottle_ml', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('minutes', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('day', 'category')
+    )
+
+    connection = op.get_bind()
+    connection.execute(
+        sa.text("""
+            INSERT INTO daily_rollups
+                (day, category, count, pumped_count, left_minutes, right_minutes, pumped_ml, bottle_ml)
+            SELECT date(start_dt),
+                   'breastfeeding',
+                   count(*),
+                   sum(is_pumped),
+                   sum(CASE WHEN is_pumped THEN 0 ELSE coalesce(left_duration, 0) END),
+                   sum(CASE WHEN is_pumped THEN 0 ELSE coalesce(right_duration, 0) END),
+                   sum(CASE WHEN is_pumped THEN ml_amount ELSE 0 END),
+                   sum(CASE WHEN is_breast THEN 0 ELSE ml_amount END)
+            FROM breastfeeding
+            GROUP BY date(start_dt)
+        """)
+    )
+    connection.execute(
+        sa.text("""
+            INSERT INTO daily_rollups (day, category, count, minutes)
+            SELECT date(start_dt),
+                   activity_type,
+                   count(*),
+                   sum((CAST(strftime('%s', end_dt) AS INTEGER) - CAST(strftime('%s', start_dt) AS INTEGER)) / 60)
+            FROM activities
+            WHERE end_dt IS NOT NULL
+            GROUP BY date(start_dt), activity_type
+        """)
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('daily_rollups')
@@ -0,0 +1,42 @@
+"""add time column indexes
+
+Revision ID: add_time_column_indexes
+Revises: add_daily_rollups
+Create Date: 2026-10-18 14:00:00.000000
+
+List endpoints order (and range-filter) by the time column and the id, so
+the indexes cover exactly that key.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_time_column_indexes'
+down_revision: Union[str, None] = 'add_daily_rollups'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ('login_stats', 'login_dt'),
+    ('data', 'date'),
+    ('visits', 'date'),
+    ('breastfeeding', 'start_dt'),
+    ('photos', 'date'),
+    ('activities', 'start_dt'),
+]
+
+
+def upgrade() -> None:
+    for table, column in INDEXES:
+        op.create_index(f'ix_{table}_{column}_id', table, [column, 'id'])
+    op.create_index('ix_activities_running', 'activities', ['end_dt'], sqlite_where=sa.text('end_dt IS NULL'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_activities_running', table_name='activities')
+    for table, column in INDEXES:
+        op.drop_index(f'ix_{table}_{column}_id', table_name=table)
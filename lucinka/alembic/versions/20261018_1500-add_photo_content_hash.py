@@ -0,0 +1,31 @@
+"""add photo content hash
+
+Revision ID: add_photo_content_hash
+Revises: add_time_column_indexes
+Create Date: 2026-10-18 15:00:00.000000
+
+Photos are stored by the sha256 of their content. Existing rows keep a NULL
+hash (and their id-based file name) until `lucinka photos rehome` is run.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_photo_content_hash'
+down_revision: Union[str, None] = 'add_time_column_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('photos', sa.Column('sha256', sa.Text(), nullable=True))
+    op.create_index('ix_photos_sha256', 'photos', ['sha256'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_photos_sha256', table_name='photos')
+    with op.batch_alter_table('photos') as batch_op:
+        batch_op.drop_column('sha256')
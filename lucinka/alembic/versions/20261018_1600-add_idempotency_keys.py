@@ -0,0 +1,36 @@
+"""add idempotency keys
+
+Revision ID: add_idempotency_keys
+Revises: add_photo_content_hash
+Create Date: 2026-10-18 16:00:00.000000
+
+Entries created through the bulk endpoints carry a client-supplied key so
+that retried requests do not insert them twice.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_idempotency_keys'
+down_revision: Union[str, None] = 'add_photo_content_hash'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ['data', 'breastfeeding', 'activities']
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.add_column(table, sa.Column('idempotency_key', sa.Text(), nullable=True))
+        op.create_index(f'ix_{table}_idempotency_key', table, ['idempotency_key'], unique=True)
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_idempotency_key', table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('idempotency_key')
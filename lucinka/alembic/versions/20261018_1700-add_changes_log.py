@@ -0,0 +1,45 @@
+"""add changes log
+
+Revision ID: add_changes_log
+Revises: add_idempotency_keys
+Create Date: 2026-10-18 17:00:00.000000
+
+Existing rows are logged as written so that a sync from version 0 returns
+the full state.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_changes_log'
+down_revision: Union[str, None] = 'add_idempotency_keys'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SYNCED_TABLES = ['data', 'visits', 'breastfeeding', 'activities', 'photos']
+
+
+def upgrade() -> None:
+    op.create_table(
+        'changes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('table_name', sa.Text(), nullable=False),
+        sa.Column('row_id', sa.Integer(), nullable=False),
+        sa.Column('deleted', sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sqlite_autoincrement=True,
+    )
+    op.create_index('ix_changes_table_name_row_id', 'changes', ['table_name', 'row_id'], unique=True)
+    for table in SYNCED_TABLES:
+        op.execute(
+            f"INSERT INTO changes (table_name, row_id, deleted) SELECT '{table}', id, 0 FROM {table} ORDER BY id"  # noqa: S608
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_changes_table_name_row_id', table_name='changes')
+    op.drop_table('changes')
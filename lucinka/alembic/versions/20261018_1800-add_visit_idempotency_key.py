@@ -0,0 +1,31 @@
+"""add visit idempotency key
+
+Revision ID: add_visit_idempotency_key
+Revises: add_changes_log
+Create Date: 2026-10-18 18:00:00.000000
+
+Imported visits carry a key too, so that importing an export twice does not
+insert them twice.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_visit_idempotency_key'
+down_revision: Union[str, None] = 'add_changes_log'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('visits', sa.Column('idempotency_key', sa.Text(), nullable=True))
+    op.create_index('ix_visits_idempotency_key', 'visits', ['idempotency_key'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_visits_idempotency_key', table_name='visits')
+    with op.batch_alter_table('visits') as batch_op:
+        batch_op.drop_column('idempotency_key')
@@ -0,0 +1,35 @@
+"""add settings
+
+Revision ID: add_settings
+Revises: add_visit_idempotency_key
+Create Date: 2026-10-18 19:00:00.000000
+
+Holds the random id of the database, which prefixes the idempotency keys
+derived for exported rows so that they do not collide across databases.
+"""
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_settings'
+down_revision: Union[str, None] = 'add_visit_idempotency_key'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    settings = op.create_table(
+        'settings',
+        sa.Column('name', sa.Text(), nullable=False),
+        sa.Column('value', sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.bulk_insert(settings, [{'name': 'database_id', 'value': uuid.uuid4().hex}])
+
+
+def downgrade() -> None:
+    op.drop_table('settings')
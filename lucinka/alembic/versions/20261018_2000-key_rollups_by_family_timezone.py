@@ -0,0 +1,82 @@
+"""key rollups by family timezone
+
+Revision ID: key_rollups_by_family_timezone
+Revises: add_settings
+Create Date: 2026-10-18 20:00:00.000000
+
+The daily rollups are keyed by local days in FAMILY_TIMEZONE instead of UTC
+days, so that they serve the stats queried with its offset. Existing rollups
+are recomputed here; `lucinka data rebuild-rollups` does the same after the
+timezone changes.
+"""
+import os
+from datetime import UTC, datetime
+from typing import Sequence, Union
+from zoneinfo import ZoneInfo
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'key_rollups_by_family_timezone'
+down_revision: Union[str, None] = 'add_settings'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ('count', 'pumped_count', 'left_minutes', 'right_minutes', 'pumped_ml', 'bottle_ml', 'minutes')
+
+
+def _rebuild(zone: ZoneInfo) -> None:
+    connection = op.get_bind()
+    rollups = {}
+
+    def add(start_dt: str, category: str, **totals: int) -> None:
+        day = datetime.fromisoformat(start_dt).replace(tzinfo=UTC).astimezone(zone).date()
+        bucket = rollups.setdefault((day, category), dict.fromkeys(COLUMNS, 0))
+        bucket['count'] += 1
+        for name, value in totals.items():
+            bucket[name] += value
+
+    feedings = connection.execute(sa.text("""
+        SELECT start_dt, is_pumped, is_breast, left_duration, right_duration, ml_amount FROM breastfeeding
+    """))
+    for start_dt, is_pumped, is_breast, left_duration, right_duration, ml_amount in feedings:
+        add(
+            start_dt,
+            'breastfeeding',
+            pumped_count=int(bool(is_pumped)),
+            left_minutes=0 if is_pumped else left_duration or 0,
+            right_minutes=0 if is_pumped else right_duration or 0,
+            pumped_ml=(ml_amount or 0) if is_pumped else 0,
+            bottle_ml=0 if is_breast else (ml_amount or 0),
+        )
+
+    activities = connection.execute(sa.text("""
+        SELECT start_dt, activity_type,
+               (CAST(strftime('%s', end_dt) AS INTEGER) - CAST(strftime('%s', start_dt) AS INTEGER)) / 60
+        FROM activities
+        WHERE end_dt IS NOT NULL
+    """))
+    for start_dt, activity_type, minutes in activities:
+        add(start_dt, activity_type, minutes=minutes)
+
+    connection.execute(sa.text('DELETE FROM daily_rollups'))
+    if rollups:
+        connection.execute(
+            sa.text("""
+                INSERT INTO daily_rollups
+                    (day, category, count, pumped_count, left_minutes, right_minutes, pumped_ml, bottle_ml, minutes)
+                VALUES (:day, :category, :count, :pumped_count, :left_minutes, :right_minutes, :pumped_ml,
+                        :bottle_ml, :minutes)
+            """),
+            [{'day': day.isoformat(), 'category': category, **totals} for (day, category), totals in rollups.items()],
+        )
+
+
+def upgrade() -> None:
+    _rebuild(ZoneInfo(os.environ.get('FAMILY_TIMEZONE', 'UTC')))
+
+
+def downgrade() -> None:
+    _rebuild(ZoneInfo('UTC'))
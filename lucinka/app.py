@@ -1,21 +1,33 @@
 import datetime
-from functools import wraps
-from pathlib import Path
+import logging
 
-from flask import Flask, app, jsonify, request, send_from_directory, session
+from flask import Flask, jsonify, session
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from sqlalchemy import text
 from webargs.flaskparser import use_kwargs
 
+from lucinka.compression import init_compression, send_static
 from lucinka.config import Config
-from lucinka.models import Activity, Breastfeeding, DataEntry, LoginRecord, Photo, User, Visit, db
+from lucinka.models import (
+    Activity,
+    Breastfeeding,
+    DataEntry,
+    LoginRecord,
+    Photo,
+    User,
+    Visit,
+    db,
+)
+from lucinka.ratelimit import SQLiteStorage  # noqa: F401 (registers the sqlite:// limiter storage)
+from lucinka.routes import archive, bulk, photos, stats, sync, uploads
 from lucinka.schemas import (
     AddActivitySchema,
     AddBreastfeedingSchema,
     AddDataEntrySchema,
-    AddPhotoSchema,
     AddVisitSchema,
+    BundleSchema,
     GetActivitySchema,
     GetBreastfeedingSchema,
     GetDataEntrySchema,
@@ -23,66 +35,51 @@ from lucinka.schemas import (
     GetPhotoSchema,
     GetUserSchema,
     GetVisitSchema,
+    ListArgsSchema,
     LoginSchema,
+    TimeSeriesArgsSchema,
     UpdateActivitySchema,
 )
+from lucinka.serialization import FastJSONProvider
+from lucinka.sqlite import init_sqlite
+from lucinka.users import current_user
+from lucinka.views import (
+    admin_required,
+    conditional,
+    dump_list,
+    list_response,
+    login_required,
+    read_snapshot,
+)
 
 
-ALLOWED_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".mp4", ".mov", ".avi", ".mkv"}
 DB_PATH = "db/app.db"
 db_context = None  # Store database content globally
 
 
-def utcnow():
-    return datetime.datetime.now(datetime.UTC)
-
-
-def login_required(f):
-    """Decorator to require login for certain routes."""
-
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if "user_id" not in session:
-            return jsonify({"error": "Authentication required"}), 401
-        return f(*args, **kwargs)
-
-    return decorated_function
-
-
-def admin_required(f):
-    """Decorator to require admin privileges."""
-
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if "user_id" not in session:
-            return jsonify({"error": "Authentication required"}), 401
-
-        user = User.query.get(session["user_id"])
-        if not user or not user.is_admin:
-            return jsonify({"error": "Admin privileges required"}), 403
-
-        return f(*args, **kwargs)
-
-    return decorated_function
-
-
 def create_app(*, dev: bool = False, testing: bool = False) -> Flask:
     """Application factory pattern."""
     # Load configuration
     config = Config(dev=dev, testing=testing)
     app = Flask(__name__, static_url_path=config.STATIC_URL_PATH, static_folder=config.STATIC_FOLDER)
     app.config.from_object(config)
+    if config.FAST_JSON:
+        app.json = FastJSONProvider(app)
+    # The storage is chosen by RATELIMIT_STORAGE_URI
     limiter = Limiter(
         get_remote_address,
         app=app,
-        storage_uri="memory://",
     )
 
+    app.logger.setLevel(logging.INFO)
+
     # Initialize extensions
     db.init_app(app)
+    init_sqlite(app)
+    init_compression(app)
 
     if dev:
-        CORS(app)  # Allow frontend to connect
+        CORS(app, expose_headers=["X-Next-Cursor"])  # Allow frontend to connect
 
     app.config["UPLOAD_FOLDER"] = config.UPLOAD_FOLDER
     app.config["MAX_CONTENT_LENGTH"] = 16 * 1024 * 1024  # 16MB max file size
@@ -97,7 +94,13 @@ def create_app(*, dev: bool = False, testing: bool = False) -> Flask:
     @app.get("/activities")
 
     def index():
-        return send_from_directory(app.static_folder, "index.html")
+        return send_static(app, "index.html")
+
+    @app.get("/healthz")
+    @limiter.exempt
+    def healthz():
+        db.session.execute(text("SELECT 1"))
+        return jsonify({"status": "ok"})
 
     @app.get("/api/users")
     @admin_required
@@ -108,19 +111,37 @@ def create_app(*, dev: bool = False, testing: bool = False) -> Flask:
     @app.get("/api/current-user")
     @login_required
     def get_current_user():
-        user_id = session["user_id"]
-        if not user_id:
-            return jsonify({"error": "Not logged in"}), 401
-        user = User.query.get(user_id)
+        user = current_user()
         if not user:
             return jsonify({"error": "User not found"}), 404
         return jsonify(GetUserSchema().dump(user))
 
+    @app.get("/api/bundle")
+    @login_required
+    @read_snapshot
+    @conditional("users", "data", "visits", "breastfeeding", "photos", "activities")
+    @use_kwargs(BundleSchema, location="query")
+    def get_bundle(keys: list[str]):
+        """Return several lists at once, authenticating and querying within a single session."""
+        user = current_user()
+        if not user:
+            return jsonify({"error": "User not found"}), 404
+        loaders = {
+            "user": lambda: GetUserSchema().dump(user),
+            "data": lambda: dump_list(GetDataEntrySchema, DataEntry.date)[0],
+            "visits": lambda: dump_list(GetVisitSchema, Visit.date)[0],
+            "breastfeeding": lambda: dump_list(GetBreastfeedingSchema, Breastfeeding.start_dt, descending=True)[0],
+            "photos": lambda: dump_list(GetPhotoSchema, Photo.date, descending=True)[0],
+            "activities": lambda: dump_list(GetActivitySchema, Activity.start_dt, descending=True)[0],
+        }
+        return jsonify({key: loaders[key]() for key in dict.fromkeys(keys)})
+
     @app.get("/api/login-stats")
     @admin_required
-    def get_login_stats():
-        stats = LoginRecord.query.all()
-        return jsonify(GetLoginRecordSchema(many=True).dump(stats))
+    @conditional("login_stats")
+    @use_kwargs(ListArgsSchema, location="query")
+    def get_login_stats(**list_args: object):
+        return list_response(*dump_list(GetLoginRecordSchema, LoginRecord.login_dt, **list_args))
 
     @app.post("/api/login")
     @limiter.limit("20 per hour")
@@ -145,19 +166,17 @@ def create_app(*, dev: bool = False, testing: bool = False) -> Flask:
 
     @app.get("/api/data")
     @login_required
-    def get_data():
-        data = DataEntry.query.order_by(DataEntry.date).all()
-        return jsonify(GetDataEntrySchema(many=True).dump(data))
+    @conditional("data")
+    @use_kwargs(TimeSeriesArgsSchema, location="query")
+    def get_data(**list_args: object):
+        return list_response(*dump_list(GetDataEntrySchema, DataEntry.date, **list_args))
 
     @app.post("/api/data")
     @admin_required
     @use_kwargs(AddDataEntrySchema)
     def add_data(date: str, weight: float, height: float, notes: str):
         user_id = session["user_id"]
-        user = User.query.get(user_id)
-        if not user:
-            return jsonify({"error": "User not found"}), 404
-        data_entry = DataEntry(date=date, weight=weight, height=height, notes=notes, user=user)
+        data_entry = DataEntry(date=date, weight=weight, height=height, notes=notes, user_id=user_id)
         db.session.add(data_entry)
         db.session.commit()
         return jsonify({}), 201
@@ -174,19 +193,17 @@ def create_app(*, dev: bool = False, testing: bool = False) -> Flask:
 
     @app.get("/api/visits")
     @login_required
-    def get_visits():
-        visits = Visit.query.order_by(Visit.date).all()
-        return jsonify(GetVisitSchema(many=True).dump(visits))
+    @conditional("visits")
+    @use_kwargs(ListArgsSchema, location="query")
+    def get_visits(**list_args: object):
+        return list_response(*dump_list(GetVisitSchema, Visit.date, **list_args))
 
     @app.post("/api/visits")
     @admin_required
     @use_kwargs(AddVisitSchema)
     def add_visit(date: str, doctor: str, location: str, type: str, notes: str):
         user_id = session["user_id"]
-        user = User.query.get(user_id)
-        if not user:
-            return jsonify({"error": "User not found"}), 404
-        visit = Visit(date=date, doctor=doctor, location=location, type=type, notes=notes, user=user)
+        visit = Visit(date=date, doctor=doctor, location=location, type=type, notes=notes, user_id=user_id)
         db.session.add(visit)
         db.session.commit()
         return jsonify({}), 201
@@ -203,9 +220,10 @@ def create_app(*, dev: bool = False, testing: bool = False) -> Flask:
 
     @app.get("/api/breastfeeding")
     @login_required
-    def get_breastfeeding():
-        breastfeeding = Breastfeeding.query.order_by(Breastfeeding.start_dt.desc()).all()
-        return jsonify(GetBreastfeedingSchema(many=True).dump(breastfeeding))
+    @conditional("breastfeeding")
+    @use_kwargs(TimeSeriesArgsSchema, location="query")
+    def get_breastfeeding(**list_args: object):
+        return list_response(*dump_list(GetBreastfeedingSchema, Breastfeeding.start_dt, descending=True, **list_args))
 
     @app.post("/api/breastfeeding")
     @admin_required
@@ -220,9 +238,6 @@ def create_app(*, dev: bool = False, testing: bool = False) -> Flask:
         ml_amount: int = 0,
     ):
         user_id = session["user_id"]
-        user = User.query.get(user_id)
-        if not user:
-            return jsonify({"error": "User not found"}), 404
         breastfeeding = Breastfeeding(
             start_dt=start_dt,
             end_dt=end_dt,
@@ -231,7 +246,7 @@ def create_app(*, dev: bool = False, testing: bool = False) -> Flask:
             is_pumped=is_pumped,
             is_breast=is_breast,
             ml_amount=ml_amount,
-            user=user,
+            user_id=user_id,
         )
         db.session.add(breastfeeding)
         db.session.commit()
@@ -249,9 +264,10 @@ def create_app(*, dev: bool = False, testing: bool = False) -> Flask:
 
     @app.get("/api/activities")
     @login_required
-    def get_activities():
-        activities = Activity.query.order_by(Activity.start_dt.desc()).all()
-        return jsonify(GetActivitySchema(many=True).dump(activities))
+    @conditional("activities")
+    @use_kwargs(TimeSeriesArgsSchema, location="query")
+    def get_activities(**list_args: object):
+        return list_response(*dump_list(GetActivitySchema, Activity.start_dt, descending=True, **list_args))
 
     @app.post("/api/activities")
     @admin_required
@@ -263,9 +279,6 @@ def create_app(*, dev: bool = False, testing: bool = False) -> Flask:
         notes: str = None,
     ):
         user_id = session["user_id"]
-        user = User.query.get(user_id)
-        if not user:
-            return jsonify({"error": "User not found"}), 404
 
         activity = Activity(
             user_id=user_id,
@@ -299,70 +312,12 @@ def create_app(*, dev: bool = False, testing: bool = False) -> Flask:
         db.session.commit()
         return jsonify({}), 204
 
-    @app.post("/api/photos")
-    @admin_required
-    @use_kwargs(
-        AddPhotoSchema,
-        location="form",
-    )
-    def add_photo(date: datetime.datetime, notes: str):
-        user_id = session["user_id"]
-        user = User.query.get(user_id)
-        if not user:
-            return jsonify({"error": "User not found"}), 404
-
-        # Check if file is in request
-        if "photo" not in request.files:
-            return jsonify({"error": "No file part"}), 422
-
-        file = request.files["photo"]
-        ext = Path(file.filename).suffix
-        if not file or ext not in ALLOWED_EXTENSIONS:
-            return jsonify({"error": "Invalid file"}), 400
-
-        photo = Photo(
-            date=date,
-            notes=notes,
-            ext=ext,
-            user=user,
-        )
-        db.session.add(photo)
-        db.session.commit()
-
-        # Save the file
-        filepath = app.config["UPLOAD_FOLDER"] / photo.storage_filename
-        try:
-            file.save(filepath)
-        except OSError as e:
-            print(f"Error saving file: {e}")
-            db.session.delete(photo)
-            db.session.commit()
-            return jsonify({"error": "Failed to save file"}), 500
-
-        return jsonify({}), 201
-
-    @app.get("/api/photos")
-    @login_required
-    def get_photos():
-        photos = Photo.query.order_by(Photo.date.desc()).all()
-        return jsonify(GetPhotoSchema(many=True).dump(photos))
-
-    # Serve uploaded images
-    @app.get("/api/photos/<filename>")
-    @login_required
-    def serve_photo(filename: str):
-        return send_from_directory(app.config["UPLOAD_FOLDER"], filename)
-
-    @app.delete("/api/photos/<int:photo_id>")
-    @admin_required
-    def delete_photo(photo_id: int):
-        photo = Photo.query.get(photo_id)
-        if not photo:
-            return jsonify({"error": "Photo not found"}), 404
-        db.session.delete(photo)
-        db.session.commit()
-        Path.unlink(app.config["UPLOAD_FOLDER"] / photo.storage_filename)
-        return jsonify({}), 204
+    app.register_blueprint(photos.blueprint)
+    app.register_blueprint(uploads.blueprint)
+    app.register_blueprint(bulk.blueprint)
+    app.register_blueprint(stats.blueprint)
+    app.register_blueprint(sync.blueprint)
+    app.register_blueprint(archive.blueprint)
 
     return app
 
@@ -0,0 +1,139 @@
+import datetime
+import hashlib
+import io
+import json
+import zipfile
+from collections.abc import Iterator
+from pathlib import Path
+
+from marshmallow import Schema
+
+from lucinka.models import Activity, Breastfeeding, DataEntry, LoginRecord, Photo, User, Visit
+from lucinka.schemas import (
+    GetActivitySchema,
+    GetBreastfeedingSchema,
+    GetDataEntrySchema,
+    GetLoginRecordSchema,
+    GetPhotoSchema,
+    GetUserSchema,
+    GetVisitSchema,
+)
+from lucinka.serialization import FastSerializer
+from lucinka.storage import CHUNK_SIZE, iter_photos
+from lucinka.transfer import export_rows
+
+
+# Table name -> (model, schema); each is dumped to ``<table>.json``
+ARCHIVE_TABLES: dict[str, tuple[type, type[Schema]]] = {
+    "users": (User, GetUserSchema),
+    "login_stats": (LoginRecord, GetLoginRecordSchema),
+    "data": (DataEntry, GetDataEntrySchema),
+    "visits": (Visit, GetVisitSchema),
+    "breastfeeding": (Breastfeeding, GetBreastfeedingSchema),
+    "activities": (Activity, GetActivitySchema),
+    "photos": (Photo, GetPhotoSchema),
+}
+MANIFEST = "manifest.json"
+# Zip timestamps cannot predate 1980
+ZIP_EPOCH = datetime.datetime(1980, 1, 1, tzinfo=datetime.UTC).timestamp()
+
+
+class _Sink(io.RawIOBase):
+    """A write-only, unseekable file collecting what `zipfile` writes until it is drained.
+
+    Being unseekable makes `zipfile` write sizes and checksums after each
+    entry instead of seeking back to fill them in.
+    """
+
+    def __init__(self) -> None:
+        self._chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes | bytearray | memoryview) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _entry(name: str, compress_type: int, date_time: datetime.datetime) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(name, date_time=date_time.timetuple()[:6])
+    info.compress_type = compress_type
+    return info
+
+
+def stream_archive(
+    upload_folder: Path,
+    *,
+    skip: frozenset[str] = frozenset(),
+    batch_size: int = 1000,
+) -> Iterator[bytes]:
+    """Yield a zip file with a JSON dump of every table and every uploaded file.
+
+    Tables are read `batch_size` rows at a time and files `CHUNK_SIZE` bytes at
+    a time, and the zip is handed out as it is written, so memory use does not
+    depend on the size of the archive. Large archives and files use ZIP64.
+
+    Entries named in `skip` (e.g. files kept from an interrupted download) are
+    left out. The last entry, ``manifest.json``, lists the size and sha256 of
+    every included entry and the names of the skipped ones.
+    """
+    for chunk in _write_archive(upload_folder, skip, batch_size):
+        # Deflate holds back small writes, and an empty chunk would end a chunked response
+        if chunk:
+            yield chunk
+
+
+def _write_archive(upload_folder: Path, skip: frozenset[str], batch_size: int) -> Iterator[bytes]:
+    now = datetime.datetime.now(datetime.UTC)
+    manifest = {"created": now.isoformat(), "entries": {}, "skipped": sorted(skip)}
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w") as archive:
+        for table, (model, schema) in ARCHIVE_TABLES.items():
+            name = f"{table}.json"
+            if name in skip:
+                continue
+            serializer = FastSerializer.for_schema(schema, model)
+            digest = hashlib.sha256()
+            size = 0
+            # The size of a dump is not known in advance, so always allow ZIP64
+            with archive.open(_entry(name, zipfile.ZIP_DEFLATED, now), "w", force_zip64=True) as f:
+                for i, row in enumerate(export_rows(serializer, model, batch_size)):
+                    data = (b",\n" if i else b"[\n") + json.dumps(row, ensure_ascii=False).encode()
+                    f.write(data)
+                    digest.update(data)
+                    size += len(data)
+                    if i % batch_size == batch_size - 1:
+                        yield sink.drain()
+                data = b"\n]\n" if size else b"[]\n"
+                f.write(data)
+                digest.update(data)
+                size += len(data)
+            manifest["entries"][name] = {"size": size, "sha256": digest.hexdigest()}
+            yield sink.drain()
+
+        for path in iter_photos(upload_folder):
+            name = f"photos/{path.relative_to(upload_folder).as_posix()}"
+            if name in skip:
+                continue
+            stat = path.stat()
+            # Media is already compressed, deflating it again only costs time. Zip timestamps are local time.
+            modified = datetime.datetime.fromtimestamp(max(stat.st_mtime, ZIP_EPOCH))  # noqa: DTZ006
+            info = _entry(name, zipfile.ZIP_STORED, modified)
+            info.file_size = stat.st_size
+            digest = hashlib.sha256()
+            with path.open("rb") as src, archive.open(info, "w") as f:
+                while chunk := src.read(CHUNK_SIZE):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    yield sink.drain()
+            manifest["entries"][name] = {"size": stat.st_size, "sha256": digest.hexdigest()}
+            yield sink.drain()
+
+        archive.writestr(_entry(MANIFEST, zipfile.ZIP_DEFLATED, now), json.dumps(manifest, indent=2))
+    yield sink.drain()
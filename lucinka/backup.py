@@ -0,0 +1,299 @@
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+from collections.abc import Callable
+from pathlib import Path
+
+from lucinka.models import SYNCED_TABLES
+from lucinka.storage import CHUNK_SIZE, hash_file, iter_photos
+
+
+MANIFEST = "manifest.json"
+DATABASE = "app.db"
+# Photos shared by all snapshots in a backup folder, so each file is copied only once
+PHOTOS = "photos"
+# Pages copied per step of the SQLite backup API (with the default page size 4 KiB, 4 MiB per step)
+STEP_PAGES = 1024
+
+
+class BackupError(Exception):
+    pass
+
+
+def _sha256_copy(source: Path, target: Path) -> str:
+    """Copy `source` to `target` through a temporary file and return the hash of the copied bytes."""
+    digest = hashlib.sha256()
+    tmp = target.with_name(f".{target.name}.tmp")
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with source.open("rb") as src, tmp.open("wb") as dst:
+        while chunk := src.read(CHUNK_SIZE):
+            digest.update(chunk)
+            dst.write(chunk)
+        dst.flush()
+        os.fsync(dst.fileno())
+    tmp.replace(target)
+    return digest.hexdigest()
+
+
+def _fsync(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def snapshots(backup_dir: Path) -> list[Path]:
+    """Complete snapshots in `backup_dir`, oldest first."""
+    if not backup_dir.is_dir():
+        return []
+    return sorted(path.parent for path in backup_dir.glob(f"*/{MANIFEST}"))
+
+
+def load_manifest(snapshot: Path) -> dict:
+    try:
+        return json.loads((snapshot / MANIFEST).read_text())
+    except (OSError, ValueError) as e:
+        msg = f"{snapshot} is not a snapshot: {e}"
+        raise BackupError(msg) from e
+
+
+def backup_database(database: Path, target: Path, *, pages: int = STEP_PAGES, progress: Callable | None = None) -> None:
+    """Copy a live SQLite database to `target` with the online backup API.
+
+    The database is copied `pages` at a time, each step holding only a short
+    read lock, so the app keeps serving (and writing) meanwhile. SQLite
+    restarts the copy by itself if another connection writes in between, so
+    the result is always a consistent snapshot.
+    """
+    source = sqlite3.connect(database)
+    destination = sqlite3.connect(target)
+    try:
+        source.backup(destination, pages=pages, progress=progress)
+        # A self-contained file without -wal/-shm siblings
+        destination.execute("PRAGMA journal_mode=DELETE")
+        if (result := destination.execute("PRAGMA quick_check").fetchone()[0]) != "ok":
+            msg = f"Integrity check of the copy failed: {result}"
+            raise BackupError(msg)
+    finally:
+        destination.close()
+        source.close()
+
+
+def backup_photos(folder: Path, store: Path, previous: dict) -> tuple[dict, int]:
+    """Copy new and changed uploads into the shared photo store of a backup folder.
+
+    `previous` maps relative paths to entries of the last manifest. Files whose
+    size and modification time did not change since are neither hashed nor
+    copied again.
+
+    Returns the manifest entries of all uploads and the number of copied files.
+    """
+    entries = {}
+    copied = 0
+    for path in iter_photos(folder):
+        relative = path.relative_to(folder).as_posix()
+        stat = path.stat()
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        known = previous.get(relative)
+        target = store / relative
+        if (
+            known
+            and known["size"] == entry["size"]
+            and known["mtime_ns"] == entry["mtime_ns"]
+            and target.is_file()
+            and target.stat().st_size == entry["size"]
+        ):
+            entry["sha256"] = known["sha256"]
+        else:
+            entry["sha256"] = _sha256_copy(path, target)
+            copied += 1
+        entries[relative] = entry
+    return entries, copied
+
+
+def create_snapshot(
+    database: Path,
+    backup_dir: Path,
+    *,
+    upload_folder: Path | None = None,
+    pages: int = STEP_PAGES,
+    progress: Callable | None = None,
+) -> tuple[Path, dict]:
+    """Write a new snapshot of the database (and optionally the uploads) to `backup_dir`.
+
+    Each snapshot is a folder with a copy of the database and a manifest with
+    checksums. Uploads go to a photo store shared by all snapshots. The
+    snapshot folder is only renamed into place once complete, so an
+    interrupted backup never looks like a valid snapshot.
+
+    Returns the path of the snapshot and its manifest.
+    """
+    backup_dir.mkdir(parents=True, exist_ok=True)
+    created = datetime.datetime.now(datetime.UTC)
+    snapshot = backup_dir / created.strftime("%Y%m%dT%H%M%S%fZ")
+    partial = backup_dir / f".{snapshot.name}.tmp"
+    partial.mkdir()
+    try:
+        backup_database(database, partial / DATABASE, pages=pages, progress=progress)
+        manifest = {
+            "created": created.isoformat(),
+            "database": {
+                "file": DATABASE,
+                "size": (partial / DATABASE).stat().st_size,
+                "sha256": hash_file(partial / DATABASE),
+            },
+        }
+        _fsync(partial / DATABASE)
+
+        if upload_folder is not None:
+            existing = snapshots(backup_dir)
+            previous = load_manifest(existing[-1]).get("photos", {}) if existing else {}
+            manifest["photos"], manifest["photos_copied"] = backup_photos(
+                upload_folder,
+                backup_dir / PHOTOS,
+                previous,
+            )
+
+        with (partial / MANIFEST).open("w") as f:
+            json.dump(manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        partial.rename(snapshot)
+    except BaseException:
+        shutil.rmtree(partial, ignore_errors=True)
+        raise
+    return snapshot, manifest
+
+
+def verify_snapshot(snapshot: Path) -> list[str]:
+    """Check the database and every photo of a snapshot against the manifest.
+
+    Returns a description of each problem found (an empty list if the snapshot is intact).
+    """
+    manifest = load_manifest(snapshot)
+    problems = []
+    files = [(snapshot / manifest["database"]["file"], manifest["database"])]
+    store = snapshot.parent / PHOTOS
+    files += [(store / relative, entry) for relative, entry in manifest.get("photos", {}).items()]
+    for path, entry in files:
+        if not path.is_file():
+            problems.append(f"{path} is missing")
+        elif path.stat().st_size != entry["size"]:
+            problems.append(f"{path} has the wrong size")
+        elif hash_file(path) != entry["sha256"]:
+            problems.append(f"{path} has the wrong checksum")
+    return problems
+
+
+def _tables(connection: sqlite3.Connection) -> set[str]:
+    query = "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+    return {name for (name,) in connection.execute(query)}
+
+
+def _versions(connection: sqlite3.Connection) -> dict:
+    """Read what must not go backwards when the database is replaced.
+
+    That is the change counter of every table, the highest change log id ever
+    handed out and the ids of all rows of the synced tables.
+    """
+    tables = _tables(connection)
+    versions = {"tables": dict.fromkeys(tables - {"alembic_version", "table_versions"}, 0), "changes": 0, "rows": {}}
+    if "table_versions" in tables:
+        versions["tables"].update(connection.execute("SELECT table_name, version FROM table_versions"))
+    if "changes" in tables:
+        sequence = connection.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+        versions["changes"] = sequence[0] if sequence else 0
+    for table in tables & set(SYNCED_TABLES):
+        versions["rows"][table] = {row_id for (row_id,) in connection.execute(f"SELECT id FROM {table}")}  # noqa: S608
+    return versions
+
+
+def _advance_versions(connection: sqlite3.Connection, before: dict) -> None:
+    """Move the versions of a restored database past those of the database it replaced.
+
+    Every table counter ends up higher than both the old and the restored one,
+    so no cached response matches again. The change log is written anew after
+    the highest id ever used: every restored row as written and every row
+    which only existed before as deleted. Clients syncing from any earlier
+    version thus get the restored state.
+    """
+    after = _versions(connection)
+    tables = before["tables"].keys() | after["tables"].keys()
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        if "table_versions" in _tables(connection):
+            connection.executemany(
+                "INSERT INTO table_versions (table_name, version) VALUES (?, ?)"
+                " ON CONFLICT (table_name) DO UPDATE SET version = excluded.version",
+                [
+                    (table, max(before["tables"].get(table, 0), after["tables"].get(table, 0)) + 1)
+                    for table in sorted(tables)
+                ],
+            )
+        if "changes" in _tables(connection):
+            connection.execute("DELETE FROM changes")
+            connection.execute("DELETE FROM sqlite_sequence WHERE name = 'changes'")
+            connection.execute(
+                "INSERT INTO sqlite_sequence (name, seq) VALUES ('changes', ?)",
+                (max(before["changes"], after["changes"]),),
+            )
+            for table in sorted(after["rows"]):
+                deleted = sorted(before["rows"].get(table, set()) - after["rows"][table])
+                connection.executemany(
+                    "INSERT INTO changes (table_name, row_id, deleted) VALUES (?, ?, 1)",
+                    [(table, row_id) for row_id in deleted],
+                )
+                connection.executemany(
+                    "INSERT INTO changes (table_name, row_id, deleted) VALUES (?, ?, 0)",
+                    [(table, row_id) for row_id in sorted(after["rows"][table])],
+                )
+        connection.execute("COMMIT")
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+
+
+def restore_snapshot(snapshot: Path, database: Path, *, upload_folder: Path | None = None) -> int:
+    """Restore a verified snapshot into `database` (and `upload_folder`).
+
+    The database is written with the backup API as well, so it is replaced in
+    a single transaction that other connections wait for, rather than
+    swapping the file under their feet. Table versions and the change log are
+    then moved past those of the replaced database, so that neither cached
+    responses nor sync cursors of clients refer to the old data. Uploads
+    missing or differing from the snapshot are copied back; other files in
+    `upload_folder` are kept.
+
+    Returns the number of restored uploads.
+    """
+    if problems := verify_snapshot(snapshot):
+        msg = f"Snapshot {snapshot.name} is damaged:\n" + "\n".join(problems)
+        raise BackupError(msg)
+
+    manifest = load_manifest(snapshot)
+    source = sqlite3.connect(f"file:{snapshot / manifest['database']['file']}?mode=ro", uri=True)
+    destination = sqlite3.connect(database, timeout=30, isolation_level=None)
+    try:
+        before = _versions(destination)
+        source.backup(destination)
+        _advance_versions(destination, before)
+    finally:
+        destination.close()
+        source.close()
+
+    restored = 0
+    if upload_folder is not None:
+        store = snapshot.parent / PHOTOS
+        for relative, entry in manifest.get("photos", {}).items():
+            target = upload_folder / relative
+            if target.is_file() and target.stat().st_size == entry["size"] and hash_file(target) == entry["sha256"]:
+                continue
+            if _sha256_copy(store / relative, target) != entry["sha256"]:
+                msg = f"{store / relative} changed while restoring"
+                raise BackupError(msg)
+            restored += 1
+    return restored
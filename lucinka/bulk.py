@@ -0,0 +1,62 @@
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from lucinka.models import bump_table_versions, db, record_changes
+from lucinka.rollups import apply_rollup_deltas, inserted_rollup_deltas
+
+
+# Upper bound on entries per request
+BULK_MAX_ENTRIES = 1000
+# Keys looked up per query, well below SQLite's limit on bound parameters (999 before SQLite 3.32)
+KEY_LOOKUP_CHUNK = 500
+
+
+def _new_entries(model: type, rows: list[dict]) -> list[dict]:
+    """Drop rows whose idempotency key is repeated in `rows` or already stored."""
+    seen = set()
+    unique = []
+    for row in rows:
+        key = row.get("idempotency_key")
+        if key is not None:
+            if key in seen:
+                continue
+            seen.add(key)
+        unique.append(row)
+    if not seen:
+        return unique
+    keys = list(seen)
+    existing = set()
+    for i in range(0, len(keys), KEY_LOOKUP_CHUNK):
+        chunk = keys[i : i + KEY_LOOKUP_CHUNK]
+        existing.update(db.session.scalars(select(model.idempotency_key).where(model.idempotency_key.in_(chunk))))
+    return [row for row in unique if row["idempotency_key"] not in existing]
+
+
+def _insert(model: type, rows: list[dict]) -> int:
+    new = _new_entries(model, rows)
+    if new:
+        connection = db.session.connection()
+        row_ids = connection.execute(insert(model.__table__).returning(model.__table__.c.id), new).scalars().all()
+        record_changes(connection, model.__tablename__, sorted(row_ids))
+        apply_rollup_deltas(connection, inserted_rollup_deltas(model, new))
+        bump_table_versions(connection, {model.__tablename__})
+    db.session.commit()
+    return len(new)
+
+
+def bulk_insert(model: type, entries: list[dict], *, user_id: int) -> int:
+    """Insert `entries` for a user in a single transaction using one executemany.
+
+    Entries whose idempotency key was stored before are skipped, so a client
+    can safely retry a request. Rollups, table versions and the change log
+    are updated here since Core inserts bypass the session flush events.
+
+    Returns the number of inserted rows.
+    """
+    rows = [{**entry, "user_id": user_id} for entry in entries]
+    try:
+        return _insert(model, rows)
+    except IntegrityError:
+        # A concurrent retry stored some of the keys first, look them up again
+        db.session.rollback()
+        return _insert(model, rows)
@@ -0,0 +1,110 @@
+import gzip
+import mimetypes
+import re
+from http import HTTPStatus
+from pathlib import Path
+
+from flask import Flask, Response, current_app, request, send_from_directory
+from werkzeug.security import safe_join
+
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+COMPRESSIBLE_SUFFIXES = {".html", ".js", ".mjs", ".css", ".json", ".svg", ".txt", ".map", ".xml"}
+# Vite emits content-hashed file names such as assets/index-B2xdjCk0.js
+HASHED_ASSET_RE = re.compile(r"^assets/.+-[\w-]{8,}\.\w+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+STATIC_EXTENSIONS = {"br": ".br", "gzip": ".gz"}
+
+
+def compress(data: bytes, encoding: str, *, best: bool = False) -> bytes:
+    """Compress `data` with the given content coding."""
+    if encoding == "br":
+        return brotli.compress(data, quality=11 if best else 5)
+    return gzip.compress(data, compresslevel=9 if best else 6, mtime=0)
+
+
+def etag_variants(etag: str) -> list[str]:
+    """All ETags a response may carry, depending on how it was encoded."""
+    return [etag, *(f"{etag}-{encoding}" for encoding in ENCODINGS)]
+
+
+def _compress_response(response: Response) -> Response:
+    response.vary.add("Accept-Encoding")
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or response.status_code != HTTPStatus.OK
+        or "Content-Encoding" in response.headers
+        or response.mimetype != "application/json"
+    ):
+        return response
+
+    data = response.get_data()
+    if len(data) < current_app.config["COMPRESS_MIN_SIZE"]:
+        return response
+    if not (encoding := request.accept_encodings.best_match(ENCODINGS)):
+        return response
+
+    response.set_data(compress(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak=weak)
+    return response
+
+
+def send_static(app: Flask, filename: str) -> Response:
+    """Serve a static file, preferring a pre-compressed ``.br``/``.gz`` sibling when the client accepts it."""
+    folder = app.static_folder
+    max_age = app.get_send_file_max_age(filename)
+    available = [
+        encoding
+        for encoding, extension in STATIC_EXTENSIONS.items()
+        if (path := safe_join(folder, f"{filename}{extension}")) and Path(path).is_file()
+    ]
+    if encoding := request.accept_encodings.best_match(available):
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        response = send_from_directory(
+            folder,
+            f"{filename}{STATIC_EXTENSIONS[encoding]}",
+            mimetype=mimetype,
+            max_age=max_age,
+        )
+        response.headers["Content-Encoding"] = encoding
+    else:
+        response = send_from_directory(folder, filename, max_age=max_age)
+    response.vary.add("Accept-Encoding")
+    if HASHED_ASSET_RE.match(filename):
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+def init_compression(app: Flask) -> None:
+    """Compress large API responses and serve pre-compressed static files."""
+    app.after_request(_compress_response)
+    if app.has_static_folder:
+        app.view_functions["static"] = lambda filename: send_static(app, filename)
+
+
+def compress_static(folder: Path, min_size: int = 1024) -> int:
+    """Write ``.gz`` (and ``.br`` if brotli is installed) siblings for compressible static files.
+
+    Returns the number of files written.
+    """
+    count = 0
+    for path in folder.rglob("*"):
+        if not path.is_file() or path.suffix not in COMPRESSIBLE_SUFFIXES or path.stat().st_size < min_size:
+            continue
+        data = path.read_bytes()
+        for encoding in ENCODINGS:
+            compressed = compress(data, encoding, best=True)
+            if len(compressed) < len(data):
+                path.with_name(path.name + STATIC_EXTENSIONS[encoding]).write_bytes(compressed)
+                count += 1
+    return count
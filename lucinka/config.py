@@ -23,6 +23,19 @@ class Config:
             db_uri = os.environ.get("SQLALCHEMY_DATABASE_URI")
             assert db_uri, "SQLALCHEMY_DATABASE_URI must be set in production."
         self.SQLALCHEMY_DATABASE_URI = os.environ.get("SQLALCHEMY_DATABASE_URI") or dev_db_path
+        self.SQLALCHEMY_ENGINE_OPTIONS = {
+            "pool_size": int(os.environ.get("DB_POOL_SIZE", "5")),
+            "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", "10")),
+            "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", "3600")),
+        }
+        self.SQLITE_PRAGMAS = {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT", "5000")),  # milliseconds
+            "cache_size": int(os.environ.get("SQLITE_CACHE_SIZE", "-20000")),  # negative means KiB
+            "mmap_size": int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+            "temp_store": "MEMORY",
+        }
         self.STATIC_URL_PATH = ""
 
         if dev:
@@ -39,7 +52,37 @@ class Config:
         self.UPLOAD_FOLDER = os.environ.get("UPLOAD_FOLDER") or default_upload_folder
         self.UPLOAD_FOLDER = Path(self.UPLOAD_FOLDER)
 
+        # Serialize list endpoints from plain column tuples instead of ORM objects and marshmallow
+        self.FAST_JSON = os.environ.get("FAST_JSON", "").lower() in {"1", "true", "yes"}
+
+        # Daily rollups are keyed by local days in this timezone, and serve the stats queried with its UTC offset.
+        # Run `lucinka data rebuild-rollups` after changing it.
+        self.FAMILY_TIMEZONE = os.environ.get("FAMILY_TIMEZONE", "UTC")
+
+        # API responses smaller than this (in bytes) are sent uncompressed
+        self.COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", "1024"))
+
+        # Largest file accepted through the resumable upload endpoints
+        self.UPLOAD_MAX_SIZE = int(os.environ.get("UPLOAD_MAX_SIZE", str(4 * 1024 * 1024 * 1024)))
+        # Seconds after the last chunk until an unfinished upload is deleted
+        self.UPLOAD_EXPIRY = int(os.environ.get("UPLOAD_EXPIRY", str(7 * 24 * 60 * 60)))
+
+        # Seconds a user's admin flag is cached by each worker process
+        self.USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", "60"))
+
+        # Rate limit counters, e.g. sqlite:////app/db/ratelimit.db to share them between workers and restarts.
+        # Any storage URI supported by the limits package works.
+        self.RATELIMIT_STORAGE_URI = os.environ.get("RATELIMIT_STORAGE_URI", "memory://")
+
+        # Server-sent event streams occupy a worker thread each, so they are capped per process.
+        # `lucinka serve` sets this to its --event-streams and adds as many threads.
+        self.EVENTS_MAX_STREAMS = int(os.environ.get("EVENTS_MAX_STREAMS", "2"))
+        self.EVENTS_HEARTBEAT = int(os.environ.get("EVENTS_HEARTBEAT", "15"))  # seconds
+        self.EVENTS_STREAM_DURATION = int(os.environ.get("EVENTS_STREAM_DURATION", "300"))  # seconds
+
         if testing:
             self.TESTING = True
             self.SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+            # In-memory databases use a static pool
+            self.SQLALCHEMY_ENGINE_OPTIONS = {}
             self.WTF_CSRF_ENABLED = False
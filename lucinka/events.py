@@ -0,0 +1,138 @@
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+
+from sqlalchemy import Engine, event, func, select
+from sqlalchemy.orm import Session
+
+from lucinka.models import Change
+
+
+# Seconds between SQLite polls for commits made by other worker processes
+POLL_INTERVAL = 0.5
+# Milliseconds a disconnected client waits before reconnecting
+RETRY_MS = 3000
+# Most changes sent in a single event
+MAX_BATCH = 500
+
+
+class ChangeNotifier:
+    """Wakes up event streams when something was committed.
+
+    Commits made in this process notify directly. Commits made by other worker
+    processes are picked up by a single watcher thread per process, which polls
+    SQLite's ``data_version`` (a counter that changes whenever another
+    connection commits).
+    """
+
+    def __init__(self) -> None:
+        self._condition = threading.Condition()
+        self._counter = 0
+        self._watcher: threading.Thread | None = None
+        self._streams = 0
+
+    @property
+    def counter(self) -> int:
+        return self._counter
+
+    def notify(self) -> None:
+        with self._condition:
+            self._counter += 1
+            self._condition.notify_all()
+
+    def wait(self, seen: int, timeout: float) -> bool:
+        """Block until the counter moves past `seen`. Returns ``False`` on timeout."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._counter != seen, timeout)
+
+    def open_stream(self, limit: int) -> bool:
+        """Reserve one of `limit` stream slots of this process."""
+        with self._condition:
+            if self._streams >= limit:
+                return False
+            self._streams += 1
+            return True
+
+    def close_stream(self) -> None:
+        with self._condition:
+            self._streams -= 1
+
+    def watch(self, database: str | None) -> None:
+        """Start watching the SQLite file at `database` for commits from other processes."""
+        if not database or database == ":memory:":
+            return
+        with self._condition:
+            if self._watcher is None:
+                self._watcher = threading.Thread(
+                    target=self._watch,
+                    args=(database,),
+                    name="change-watcher",
+                    daemon=True,
+                )
+                self._watcher.start()
+
+    def _watch(self, database: str) -> None:
+        connection = sqlite3.connect(f"file:{database}?mode=ro", uri=True, check_same_thread=False)
+        last = None
+        while True:
+            version = connection.execute("PRAGMA data_version").fetchone()[0]
+            if last is not None and version != last:
+                self.notify()
+            last = version
+            time.sleep(POLL_INTERVAL)
+
+
+notifier = ChangeNotifier()
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_commit(session: Session) -> None:  # noqa: ARG001
+    notifier.notify()
+
+
+def current_version(engine: Engine) -> int:
+    with engine.connect() as connection:
+        return connection.scalar(select(func.coalesce(func.max(Change.id), 0)))
+
+
+def _fetch_changes(engine: Engine, after: int) -> list:
+    # A short-lived connection per poll, so that a stream never pins a read transaction
+    query = select(Change.id, Change.table_name, Change.row_id, Change.deleted).where(Change.id > after)
+    with engine.connect() as connection:
+        return connection.execute(query.order_by(Change.id).limit(MAX_BATCH)).all()
+
+
+def format_event(changes: list) -> str:
+    data = [{"table": c.table_name, "id": c.row_id, "deleted": c.deleted} for c in changes]
+    return f"id: {changes[-1].id}\nevent: change\ndata: {json.dumps({'changes': data}, separators=(',', ':'))}\n\n"
+
+
+def stream_changes(engine: Engine, last_event_id: int | None, *, heartbeat: float, duration: float) -> Iterator[str]:
+    """Yield server-sent events for every batch of changes after `last_event_id`.
+
+    Without a `last_event_id`, only changes made after the stream opened are
+    sent. Event ids are change log versions, so a reconnecting client resumes
+    where it left off. The stream ends after `duration` seconds and the client
+    reconnects, which frees the worker thread now and then.
+
+    A heartbeat comment is sent whenever nothing was sent for `heartbeat`
+    seconds, however often commits without synced changes wake the stream.
+    """
+    yield f"retry: {RETRY_MS}\n\n"
+    after = current_version(engine) if last_event_id is None else last_event_id
+    deadline = time.monotonic() + duration
+    last_sent = time.monotonic()
+    while (now := time.monotonic()) < deadline:
+        # Read the counter first so that a commit made during the fetch is not missed
+        seen = notifier.counter
+        if changes := _fetch_changes(engine, after):
+            after = changes[-1].id
+            yield format_event(changes)
+            last_sent = time.monotonic()
+            continue
+        if now - last_sent >= heartbeat:
+            yield ": heartbeat\n\n"
+            last_sent = now
+        notifier.wait(seen, timeout=max(min(last_sent + heartbeat, deadline) - time.monotonic(), 0))
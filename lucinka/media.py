@@ -0,0 +1,110 @@
+import datetime
+import mimetypes
+import secrets
+from collections.abc import Iterator
+from pathlib import Path
+
+from flask import Response, abort, request, send_file
+from werkzeug.datastructures import Range
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+from werkzeug.http import is_resource_modified, parse_range_header
+from werkzeug.security import safe_join
+
+
+# Uploaded files never change content under the same name
+MEDIA_MAX_AGE = 365 * 24 * 60 * 60
+CHUNK_SIZE = 64 * 1024
+# Requests for more ranges are refused instead of answered with as many body parts
+MAX_RANGES = 16
+
+
+def _satisfiable_ranges(range_: Range, size: int) -> list[tuple[int, int]]:
+    """Resolve the ranges of a Range header to ``(start, stop)`` byte offsets within a file of `size` bytes."""
+    resolved = []
+    for first, end in range_.ranges:
+        if first < 0:
+            start, stop = max(size + first, 0), size
+        else:
+            start, stop = first, size if end is None else min(end, size)
+        if start < stop:
+            resolved.append((start, stop))
+    return resolved
+
+
+def _multipart_byteranges(path: Path, size: int, mimetype: str, ranges: list[tuple[int, int]]) -> Response:
+    boundary = secrets.token_hex(16)
+    headers = [
+        f"--{boundary}\r\nContent-Type: {mimetype}\r\nContent-Range: bytes {start}-{stop - 1}/{size}\r\n\r\n".encode()
+        for start, stop in ranges
+    ]
+    closing = f"\r\n--{boundary}--\r\n".encode()
+    length = sum(len(h) for h in headers) + sum(stop - start for start, stop in ranges)
+    length += 2 * (len(ranges) - 1) + len(closing)
+
+    def generate() -> Iterator[bytes]:
+        with path.open("rb") as f:
+            for index, (header, (start, stop)) in enumerate(zip(headers, ranges, strict=True)):
+                if index:
+                    yield b"\r\n"
+                yield header
+                f.seek(start)
+                remaining = stop - start
+                while remaining > 0:
+                    chunk = f.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        return
+                    remaining -= len(chunk)
+                    yield chunk
+        yield closing
+
+    response = Response(generate(), status=206, mimetype=f"multipart/byteranges; boundary={boundary}")
+    response.content_length = length
+    return response
+
+
+def send_media(folder: Path, filename: str) -> Response:
+    """Serve an uploaded file with range, conditional and long-lived caching support.
+
+    The strong ETag is derived from the size and modification time of the
+    file. Single ranges are handled by werkzeug; requests for up to
+    `MAX_RANGES` ranges are answered with a ``multipart/byteranges`` body.
+    """
+    path = safe_join(str(folder), filename)
+    if path is None or not Path(path).is_file():
+        abort(404)
+    path = Path(path)
+    stat = path.stat()
+    etag = f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+    last_modified = datetime.datetime.fromtimestamp(stat.st_mtime, datetime.UTC)
+
+    range_ = parse_range_header(request.headers.get("Range"))
+    response = None
+    if range_ is not None and not is_resource_modified(request.environ, etag, last_modified=last_modified):
+        # werkzeug would apply the range before checking If-None-Match and If-Modified-Since
+        response = Response(status=304)
+    elif (
+        range_ is not None
+        and range_.units == "bytes"
+        and len(range_.ranges) > 1
+        and (
+            "If-Range" not in request.headers
+            or not is_resource_modified(request.environ, etag, last_modified=last_modified, ignore_if_range=False)
+        )
+    ):
+        ranges = _satisfiable_ranges(range_, stat.st_size) if len(range_.ranges) <= MAX_RANGES else []
+        if not ranges:
+            raise RequestedRangeNotSatisfiable(length=stat.st_size)
+        mimetype = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        response = _multipart_byteranges(path, stat.st_size, mimetype, ranges)
+
+    if response is None:
+        response = send_file(path, etag=etag, last_modified=last_modified, max_age=MEDIA_MAX_AGE, conditional=True)
+    else:
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response.accept_ranges = "bytes"
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.max_age = MEDIA_MAX_AGE
+    response.cache_control.immutable = True
+    return response
@@ -1,13 +1,22 @@
 from __future__ import annotations
 
+import uuid
 from datetime import date, datetime
+from typing import TYPE_CHECKING
 
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import Integer, Text
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy import Connection, Integer, Text, case, cast, delete, event, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column
 from werkzeug.security import check_password_hash
 
 
+if TYPE_CHECKING:
+    from sqlalchemy.orm import UOWTransaction
+    from sqlalchemy.sql import ColumnElement
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -34,6 +43,7 @@ class User(db.Model):
 
 class LoginRecord(db.Model):
     __tablename__ = "login_stats"
+    __table_args__ = (db.Index("ix_login_stats_login_dt_id", "login_dt", "id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(Integer, db.ForeignKey("users.id"), nullable=False)
@@ -47,6 +57,10 @@ class LoginRecord(db.Model):
 
 class DataEntry(db.Model):
     __tablename__ = "data"
+    __table_args__ = (
+        db.Index("ix_data_date_id", "date", "id"),
+        db.Index("ix_data_idempotency_key", "idempotency_key", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(Integer, db.ForeignKey("users.id"), nullable=False)
@@ -55,6 +69,8 @@ class DataEntry(db.Model):
     weight: Mapped[float | None] = mapped_column(db.Float, nullable=True)
     height: Mapped[float | None] = mapped_column(db.Float, nullable=True)
     notes: Mapped[str | None] = mapped_column(db.Text, nullable=True)
+    # Client-supplied key of entries created through the bulk endpoints, used to skip retried inserts
+    idempotency_key: Mapped[str | None] = mapped_column(db.Text, nullable=True)
 
     user: Mapped[User] = db.relationship()
 
@@ -66,6 +82,10 @@ class DataEntry(db.Model):
 
 class Visit(db.Model):
     __tablename__ = "visits"
+    __table_args__ = (
+        db.Index("ix_visits_date_id", "date", "id"),
+        db.Index("ix_visits_idempotency_key", "idempotency_key", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(Integer, db.ForeignKey("users.id"), nullable=False)
@@ -75,6 +95,7 @@ class Visit(db.Model):
     location: Mapped[str] = mapped_column(db.Text, nullable=False)
     type: Mapped[str] = mapped_column(db.Text, nullable=False)
     notes: Mapped[str | None] = mapped_column(db.Text, nullable=True)
+    idempotency_key: Mapped[str | None] = mapped_column(db.Text, nullable=True)
 
     user: Mapped[User] = db.relationship()
 
@@ -84,6 +105,10 @@ class Visit(db.Model):
 
 class Breastfeeding(db.Model):
     __tablename__ = "breastfeeding"
+    __table_args__ = (
+        db.Index("ix_breastfeeding_start_dt_id", "start_dt", "id"),
+        db.Index("ix_breastfeeding_idempotency_key", "idempotency_key", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(Integer, db.ForeignKey("users.id"), nullable=False)
@@ -95,6 +120,7 @@ class Breastfeeding(db.Model):
     is_pumped: Mapped[bool] = mapped_column(db.Boolean, nullable=False, default=False)
     is_breast: Mapped[bool] = mapped_column(db.Boolean, nullable=False, default=True)
     ml_amount: Mapped[int] = mapped_column(db.Integer, nullable=False, default=0)
+    idempotency_key: Mapped[str | None] = mapped_column(db.Text, nullable=True)
 
     user: Mapped[User] = db.relationship()
 
@@ -104,19 +130,43 @@ class Breastfeeding(db.Model):
 
 class Photo(db.Model):
     __tablename__ = "photos"
+    __table_args__ = (
+        db.Index("ix_photos_date_id", "date", "id"),
+        db.Index("ix_photos_sha256", "sha256"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     date: Mapped[datetime] = mapped_column(db.DateTime, nullable=False)
     notes: Mapped[str | None] = mapped_column(db.Text, nullable=True)
     ext: Mapped[str] = mapped_column(db.Text, nullable=False)
+    # Hash of the file content. Photos uploaded before content-addressed storage
+    # are stored under their id until `lucinka photos rehome` is run.
+    sha256: Mapped[str | None] = mapped_column(db.Text, nullable=True)
     created_dt: Mapped[datetime] = mapped_column(db.DateTime, nullable=False, default=db.func.now())
     user_id: Mapped[int] = mapped_column(Integer, db.ForeignKey("users.id"), nullable=False)
 
     user: Mapped[User] = db.relationship()
 
-    @property
+    @hybrid_property
     def storage_filename(self) -> str:
-        return f"{self.id}{self.ext}"
+        if self.sha256 is None:
+            return f"{self.id}{self.ext}"
+        return f"{self.sha256[:2]}/{self.sha256[2:4]}/{self.sha256}{self.ext}"
+
+    @storage_filename.inplace.expression
+    @classmethod
+    def _storage_filename_expression(cls) -> ColumnElement[str]:
+        return case(
+            (cls.sha256.is_(None), cast(cls.id, Text) + cls.ext),
+            else_=(
+                db.func.substr(cls.sha256, 1, 2, type_=Text)
+                + "/"
+                + db.func.substr(cls.sha256, 3, 2, type_=Text)
+                + "/"
+                + cls.sha256
+                + cls.ext
+            ),
+        )
 
     def __repr__(self) -> str:
         return f"<Photo({self.id}) date={self.date} notes={self.notes} created_dt={self.created_dt} user_id={self.user_id}>"
@@ -124,6 +174,11 @@ class Photo(db.Model):
 
 class Activity(db.Model):
     __tablename__ = "activities"
+    __table_args__ = (
+        db.Index("ix_activities_start_dt_id", "start_dt", "id"),
+        db.Index("ix_activities_running", "end_dt", sqlite_where=db.text("end_dt IS NULL")),
+        db.Index("ix_activities_idempotency_key", "idempotency_key", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(Integer, db.ForeignKey("users.id"), nullable=False)
@@ -132,8 +187,153 @@ class Activity(db.Model):
     end_dt: Mapped[datetime | None] = mapped_column(db.DateTime, nullable=True)
     created_dt: Mapped[datetime] = mapped_column(db.DateTime, nullable=False, default=db.func.now())
     notes: Mapped[str | None] = mapped_column(db.Text, nullable=True)
+    idempotency_key: Mapped[str | None] = mapped_column(db.Text, nullable=True)
 
     user: Mapped[User] = db.relationship()
 
     def __repr__(self) -> str:
         return f"<Activity({self.id}) user_id={self.user_id} type={self.activity_type} start={self.start_dt} end={self.end_dt}>"
+
+
+class DailyRollup(db.Model):
+    """Per-day totals of feedings and activities, keyed by UTC day and category.
+
+    The category is ``breastfeeding`` for feeding totals or the activity type
+    for activity totals.
+    """
+
+    __tablename__ = "daily_rollups"
+
+    day: Mapped[date] = mapped_column(db.Date, primary_key=True)
+    category: Mapped[str] = mapped_column(Text, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    pumped_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    left_minutes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    right_minutes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    pumped_ml: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    bottle_ml: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    minutes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<DailyRollup({self.day}, {self.category}) count={self.count}>"
+
+
+class TableVersion(db.Model):
+    """Change counter per table, bumped whenever rows in the table are written."""
+
+    __tablename__ = "table_versions"
+
+    table_name: Mapped[str] = mapped_column(Text, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<TableVersion({self.table_name}) version={self.version}>"
+
+
+class Setting(db.Model):
+    """A value that belongs to the database as a whole, such as its random id."""
+
+    __tablename__ = "settings"
+
+    name: Mapped[str] = mapped_column(Text, primary_key=True)
+    value: Mapped[str] = mapped_column(Text, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<Setting({self.name}) value={self.value}>"
+
+
+class Change(db.Model):
+    """Change log of the synced tables, holding the latest change of every row.
+
+    The id grows monotonically and serves as the sync version. Deleted rows
+    are kept as tombstones so that clients learn about deletions.
+    """
+
+    __tablename__ = "changes"
+    __table_args__ = (
+        db.Index("ix_changes_table_name_row_id", "table_name", "row_id", unique=True),
+        # Never reuse the ids of removed entries, which would break the ordering
+        {"sqlite_autoincrement": True},
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    table_name: Mapped[str] = mapped_column(Text, nullable=False)
+    row_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    deleted: Mapped[bool] = mapped_column(db.Boolean, nullable=False, default=False)
+
+    def __repr__(self) -> str:
+        return f"<Change({self.id}) table={self.table_name} row_id={self.row_id} deleted={self.deleted}>"
+
+
+SYNCED_TABLES = ("data", "visits", "breastfeeding", "activities", "photos")
+
+
+def record_changes(connection: Connection, table: str, row_ids: list[int], *, deleted: bool = False) -> None:
+    """Log that rows of a synced table were written (or deleted) in the current transaction."""
+    if not row_ids:
+        return
+    # Only the latest change of a row is kept, moving it to the end of the log
+    connection.execute(delete(Change).where(Change.table_name == table, Change.row_id.in_(row_ids)))
+    connection.execute(
+        insert(Change),
+        [{"table_name": table, "row_id": row_id, "deleted": deleted} for row_id in row_ids],
+    )
+
+
+def bump_table_versions(connection: Connection, tables: set[str]) -> None:
+    """Increment the change counters of the given tables in the current transaction."""
+    if not tables:
+        return
+    stmt = insert(TableVersion).values([{"table_name": table, "version": 1} for table in sorted(tables)])
+    stmt = stmt.on_conflict_do_update(index_elements=["table_name"], set_={"version": TableVersion.version + 1})
+    connection.execute(stmt)
+
+
+def get_table_versions(tables: list[str]) -> dict[str, int]:
+    """Return the current change counters of the given tables."""
+    query = select(TableVersion.table_name, TableVersion.version).where(TableVersion.table_name.in_(tables))
+    versions = dict.fromkeys(tables, 0)
+    versions.update(db.session.execute(query).tuples().all())
+    return versions
+
+
+DATABASE_ID = "database_id"
+
+
+def get_database_id() -> str:
+    """Return the random id of this database, generating it on first use.
+
+    It tells the rows of this database apart from rows of other databases,
+    for example in the idempotency keys of exported rows.
+    """
+    query = select(Setting.value).where(Setting.name == DATABASE_ID)
+    if (database_id := db.session.scalar(query)) is None:
+        db.session.execute(insert(Setting).values(name=DATABASE_ID, value=uuid.uuid4().hex).on_conflict_do_nothing())
+        db.session.commit()
+        database_id = db.session.scalar(query)
+    return database_id
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_flushed_tables(session: Session, flush_context: UOWTransaction) -> None:  # noqa: ARG001
+    tables = {obj.__table__.name for obj in session.new | session.deleted}
+    tables |= {obj.__table__.name for obj in session.dirty if session.is_modified(obj)}
+    tables.discard(TableVersion.__tablename__)
+    bump_table_versions(session.connection(), tables)
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed_changes(session: Session, flush_context: UOWTransaction) -> None:  # noqa: ARG001
+    written: dict[str, list[int]] = {}
+    deleted: dict[str, list[int]] = {}
+    for obj in [*session.new, *(obj for obj in session.dirty if session.is_modified(obj))]:
+        if obj.__table__.name in SYNCED_TABLES:
+            written.setdefault(obj.__table__.name, []).append(obj.id)
+    for obj in session.deleted:
+        if obj.__table__.name in SYNCED_TABLES:
+            deleted.setdefault(obj.__table__.name, []).append(obj.id)
+    connection = session.connection()
+    for table, row_ids in written.items():
+        record_changes(connection, table, sorted(row_ids))
+    for table, row_ids in deleted.items():
+        record_changes(connection, table, sorted(row_ids), deleted=True)
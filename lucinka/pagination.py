@@ -0,0 +1,97 @@
+import base64
+import binascii
+import datetime
+import json
+
+from sqlalchemy import Date, Select, and_, or_
+from sqlalchemy.orm import InstrumentedAttribute, Query
+
+from lucinka.models import db
+
+
+def to_naive_utc(value: datetime.datetime) -> datetime.datetime:
+    """Convert an aware datetime to the naive UTC representation stored in the database."""
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.UTC).replace(tzinfo=None)
+    return value
+
+
+def encode_cursor(value: datetime.date | datetime.datetime, id_: int) -> str:
+    """Encode the sort key of the last returned row as an opaque cursor."""
+    payload = json.dumps([value.isoformat(), id_], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime, int]:
+    """Decode a cursor created by `encode_cursor`.
+
+    Raises `ValueError` if the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, id_ = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.datetime.fromisoformat(value), int(id_)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        msg = "Invalid cursor"
+        raise ValueError(msg) from e
+
+
+def _coerce(column: InstrumentedAttribute, value: datetime.datetime) -> datetime.date | datetime.datetime:
+    value = to_naive_utc(value)
+    if isinstance(column.type, Date):
+        return value.date()
+    return value
+
+
+def _fetch(query: Query | Select) -> list:
+    if isinstance(query, Select):
+        return db.session.execute(query).all()
+    return query.all()
+
+
+def paginate(  # noqa: PLR0913
+    query: Query | Select,
+    column: InstrumentedAttribute,
+    *,
+    descending: bool = False,
+    since: datetime.datetime | None = None,
+    until: datetime.datetime | None = None,
+    limit: int | None = None,
+    cursor: tuple[datetime.datetime, int] | None = None,
+) -> tuple[list, str | None]:
+    """Filter and order a list query by a time column using keyset pagination.
+
+    `query` is either an ORM query or a Core select which includes ``column``
+    and the id column. Rows are ordered by ``(column, id)``. ``since`` is
+    inclusive and ``until`` is exclusive. When ``limit`` is not given, all
+    matching rows are returned.
+
+    Returns the rows and the cursor for the next page (or ``None`` if there
+    are no more rows).
+    """
+    id_column = column.class_.id
+
+    if since is not None:
+        query = query.filter(column >= _coerce(column, since))
+    if until is not None:
+        query = query.filter(column < _coerce(column, until))
+    if cursor is not None:
+        value, last_id = cursor
+        value = _coerce(column, value)
+        if descending:
+            query = query.filter(or_(column < value, and_(column == value, id_column < last_id)))
+        else:
+            query = query.filter(or_(column > value, and_(column == value, id_column > last_id)))
+
+    query = query.order_by(column.desc(), id_column.desc()) if descending else query.order_by(column, id_column)
+
+    if limit is None:
+        return _fetch(query), None
+
+    rows = _fetch(query.limit(limit + 1))
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, column.key), last.id)
@@ -0,0 +1,91 @@
+import sqlite3
+import threading
+import time
+from typing import ClassVar
+
+from limits.storage import Storage
+
+
+# Seconds between sweeps of expired counters
+SWEEP_INTERVAL = 60
+
+_SCHEMA = "CREATE TABLE IF NOT EXISTS ratelimits (key TEXT PRIMARY KEY, count INTEGER NOT NULL, expiry REAL NOT NULL)"
+
+# Start a new window if the stored one has expired, otherwise add to it
+_INCR = """
+INSERT INTO ratelimits (key, count, expiry) VALUES (:key, :amount, :expiry)
+ON CONFLICT (key) DO UPDATE SET
+    count = CASE WHEN expiry <= :now THEN excluded.count ELSE count + excluded.count END,
+    expiry = CASE WHEN expiry <= :now THEN excluded.expiry ELSE expiry END
+RETURNING count
+"""
+
+
+class SQLiteStorage(Storage):
+    """Rate limit storage shared by all worker processes through a SQLite file.
+
+    Selected with ``RATELIMIT_STORAGE_URI=sqlite:////path/to/ratelimit.db``.
+    Every increment is a single upsert statement, which SQLite executes
+    atomically. Expired counters are swept at most once per `SWEEP_INTERVAL`.
+    Only the fixed window strategy (the default) is supported.
+    """
+
+    STORAGE_SCHEME: ClassVar[list[str]] = ["sqlite"]
+
+    # The signature of limits' Storage, which the storage registry instantiates
+    def __init__(self, uri: str, wrap_exceptions: bool = False, **options: object) -> None:  # noqa: FBT001, FBT002
+        self.path = uri.removeprefix("sqlite:///")
+        self._local = threading.local()
+        self._next_sweep = 0.0
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self._connection.execute(_SCHEMA)
+
+    @property
+    def base_exceptions(self) -> type[Exception]:
+        return sqlite3.Error
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, isolation_level=None, timeout=5)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _sweep(self, now: float) -> None:
+        if now >= self._next_sweep:
+            self._next_sweep = now + SWEEP_INTERVAL
+            self._connection.execute("DELETE FROM ratelimits WHERE expiry <= ?", (now,))
+
+    def incr(self, key: str, expiry: float, amount: int = 1) -> int:
+        now = time.time()
+        self._sweep(now)
+        params = {"key": key, "amount": amount, "expiry": now + expiry, "now": now}
+        return self._connection.execute(_INCR, params).fetchone()[0]
+
+    def get(self, key: str) -> int:
+        row = self._connection.execute(
+            "SELECT count FROM ratelimits WHERE key = ? AND expiry > ?",
+            (key, time.time()),
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key: str) -> float:
+        row = self._connection.execute("SELECT expiry FROM ratelimits WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else time.time()
+
+    def check(self) -> bool:
+        try:
+            self._connection.execute("SELECT 1")
+        except sqlite3.Error:
+            return False
+        return True
+
+    def reset(self) -> int:
+        return self._connection.execute("DELETE FROM ratelimits").rowcount
+
+    def clear(self, key: str) -> None:
+        self._connection.execute("DELETE FROM ratelimits WHERE key = ?", (key,))
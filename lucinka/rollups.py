@@ -0,0 +1,183 @@
+from collections.abc import Sequence
+from datetime import UTC, date, datetime
+from zoneinfo import ZoneInfo
+
+from flask import current_app
+from sqlalchemy import Connection, delete, event, func, insert, inspect, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, UOWTransaction
+
+from lucinka.models import Activity, Breastfeeding, DailyRollup, db
+
+
+FEEDING_CATEGORY = "breastfeeding"
+ROLLUP_COLUMNS = ("count", "pumped_count", "left_minutes", "right_minutes", "pumped_ml", "bottle_ml", "minutes")
+
+
+def rollup_timezone() -> ZoneInfo:
+    """The timezone whose local days the rollups are keyed by (``FAMILY_TIMEZONE``)."""
+    return ZoneInfo(current_app.config["FAMILY_TIMEZONE"])
+
+
+def local_day(value: datetime) -> date:
+    """The day in the rollup timezone of a naive UTC timestamp."""
+    return value.replace(tzinfo=UTC).astimezone(rollup_timezone()).date()
+
+
+def feeding_totals(  # noqa: PLR0913
+    *,
+    start_dt: datetime,
+    left_duration: int | None,
+    right_duration: int | None,
+    is_pumped: bool,
+    is_breast: bool,
+    ml_amount: int | None,
+    **kwargs: object,  # noqa: ARG001
+) -> tuple[date, str, dict[str, int]]:
+    """Return the rollup key and totals a single feeding contributes."""
+    totals = {
+        "count": 1,
+        "pumped_count": int(bool(is_pumped)),
+        "left_minutes": 0 if is_pumped else left_duration or 0,
+        "right_minutes": 0 if is_pumped else right_duration or 0,
+        "pumped_ml": (ml_amount or 0) if is_pumped else 0,
+        "bottle_ml": 0 if is_breast else (ml_amount or 0),
+    }
+    return local_day(start_dt), FEEDING_CATEGORY, totals
+
+
+def activity_totals(
+    *,
+    activity_type: str,
+    start_dt: datetime,
+    end_dt: datetime | None,
+    **kwargs: object,  # noqa: ARG001
+) -> tuple[date, str, dict[str, int]] | None:
+    """Return the rollup key and totals a single activity contributes.
+
+    Activities that are still running contribute nothing until they end.
+    The whole duration is attributed to the day the activity started.
+    """
+    if end_dt is None:
+        return None
+    # Whole seconds, truncated towards zero, the same as the backfill of the rollups migrations
+    seconds = int((end_dt.replace(microsecond=0) - start_dt.replace(microsecond=0)).total_seconds())
+    minutes = int(seconds / 60)
+    return local_day(start_dt), activity_type, {"count": 1, "minutes": minutes}
+
+
+def apply_rollup_deltas(connection: Connection, deltas: dict[tuple[date, str], dict[str, int]]) -> None:
+    """Add the given per-day deltas to the rollup table in the current transaction.
+
+    Rows left without any feeding or activity are deleted, so days and
+    categories only appear in the rollups while they have rows.
+    """
+    for (day, category), totals in deltas.items():
+        if not any(totals.values()):
+            continue
+        stmt = sqlite_insert(DailyRollup).values(day=day, category=category, **totals)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["day", "category"],
+            set_={name: getattr(DailyRollup, name) + value for name, value in totals.items()},
+        )
+        connection.execute(stmt)
+        if totals["count"] < 0:
+            connection.execute(
+                delete(DailyRollup).where(
+                    DailyRollup.day == day,
+                    DailyRollup.category == category,
+                    DailyRollup.count <= 0,
+                ),
+            )
+
+
+def _add(deltas: dict, contribution: tuple | None, sign: int) -> None:
+    if contribution is None:
+        return
+    day, category, totals = contribution
+    bucket = deltas.setdefault((day, category), dict.fromkeys(ROLLUP_COLUMNS, 0))
+    for name, value in totals.items():
+        bucket[name] += sign * value
+
+
+_totals_by_model = {Breastfeeding: feeding_totals, Activity: activity_totals}
+
+
+def _column_attrs(obj: object) -> list:
+    state = inspect(obj)
+    return [state.attrs[prop.key] for prop in state.mapper.column_attrs]
+
+
+def _current_values(obj: object) -> dict:
+    return {attr.key: attr.value for attr in _column_attrs(obj)}
+
+
+def _previous_values(obj: object) -> dict:
+    values = {}
+    for attr in _column_attrs(obj):
+        history = attr.history
+        values[attr.key] = history.deleted[0] if history.deleted else attr.value
+    return values
+
+
+def _normalize(values: dict) -> dict:
+    # Timestamps are stored as naive UTC; keep in-memory aware values consistent with that
+    for key in ("start_dt", "end_dt"):
+        if isinstance(values.get(key), datetime):
+            values[key] = values[key].replace(tzinfo=None)
+    return values
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_rollup_changes(
+    session: Session,
+    flush_context: UOWTransaction,  # noqa: ARG001
+    instances: Sequence[object] | None,  # noqa: ARG001
+) -> None:
+    # Previous values of updated and deleted rows must be read before the flush
+    deltas = session.info["rollup_deltas"] = {}
+    for obj in session.deleted:
+        if totals := _totals_by_model.get(type(obj)):
+            _add(deltas, totals(**_normalize(_previous_values(obj))), -1)
+    for obj in session.dirty:
+        if (totals := _totals_by_model.get(type(obj))) and session.is_modified(obj):
+            _add(deltas, totals(**_normalize(_previous_values(obj))), -1)
+            _add(deltas, totals(**_normalize(_current_values(obj))), 1)
+
+
+@event.listens_for(Session, "after_flush")
+def _update_rollups(session: Session, flush_context: UOWTransaction) -> None:  # noqa: ARG001
+    # New rows are handled after the flush so that column defaults are populated
+    deltas = session.info.pop("rollup_deltas", {})
+    for obj in session.new:
+        if totals := _totals_by_model.get(type(obj)):
+            _add(deltas, totals(**_normalize(_current_values(obj))), 1)
+    apply_rollup_deltas(session.connection(), deltas)
+
+
+def inserted_rollup_deltas(model: type, rows: list[dict]) -> dict[tuple[date, str], dict[str, int]]:
+    """Return the rollup deltas of rows inserted without going through the ORM unit of work."""
+    deltas = {}
+    if totals := _totals_by_model.get(model):
+        for row in rows:
+            _add(deltas, totals(**_normalize(dict(row))), 1)
+    return deltas
+
+
+def rebuild_rollups() -> int:
+    """Recompute the rollup table from scratch. Returns the number of rollup rows.
+
+    Needed after changing ``FAMILY_TIMEZONE``, as the rows are keyed by its local days.
+    """
+    deltas = {}
+    for model, totals in _totals_by_model.items():
+        rows = db.session.execute(select(*model.__table__.columns).execution_options(yield_per=1000)).mappings()
+        for row in rows:
+            _add(deltas, totals(**_normalize(dict(row))), 1)
+
+    db.session.execute(delete(DailyRollup))
+    if deltas:
+        values = [{"day": day, "category": category, **totals} for (day, category), totals in deltas.items()]
+        db.session.execute(insert(DailyRollup), values)
+    db.session.commit()
+    return db.session.scalar(select(func.count()).select_from(DailyRollup))
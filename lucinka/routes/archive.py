@@ -0,0 +1,28 @@
+from flask import Blueprint, current_app, stream_with_context
+from webargs.flaskparser import use_kwargs
+
+from lucinka.archive import stream_archive
+from lucinka.schemas import ExportArchiveSchema
+from lucinka.views import admin_required, utcnow
+
+
+# Download of all data and photos as a zip archive
+blueprint = Blueprint("archive", __name__)
+
+
+@blueprint.get("/api/export.zip")
+@blueprint.post("/api/export.zip")
+@admin_required
+@use_kwargs(ExportArchiveSchema, location="json")
+def export_archive(skip: list[str]):
+    """Stream a zip of all tables and uploaded files.
+
+    To resume an interrupted download, POST the names of the entries already
+    extracted; they are left out of the new archive.
+    """
+    stream = stream_archive(current_app.config["UPLOAD_FOLDER"], skip=frozenset(skip))
+    response = current_app.response_class(stream_with_context(stream), mimetype="application/zip")
+    filename = f"lucinka-{utcnow():%Y%m%d}.zip"
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,40 @@
+from flask import Blueprint, jsonify, session
+from webargs.flaskparser import use_args
+
+from lucinka.bulk import BULK_MAX_ENTRIES, bulk_insert
+from lucinka.models import Activity, Breastfeeding, DataEntry
+from lucinka.schemas import BulkAddActivitySchema, BulkAddBreastfeedingSchema, BulkAddDataEntrySchema
+from lucinka.views import admin_required
+
+
+def bulk_response(model: type, entries: list[dict]):
+    """Insert a list of entries posted to a bulk endpoint and report how many were new."""
+    if len(entries) > BULK_MAX_ENTRIES:
+        return jsonify({"error": f"At most {BULK_MAX_ENTRIES} entries per request"}), 413
+    inserted = bulk_insert(model, entries, user_id=session["user_id"])
+    return jsonify({"inserted": inserted, "skipped": len(entries) - inserted}), 201
+
+
+# Idempotent bulk inserts, e.g. of entries recorded offline
+blueprint = Blueprint("bulk", __name__)
+
+
+@blueprint.post("/api/data/bulk")
+@admin_required
+@use_args(BulkAddDataEntrySchema(many=True))
+def add_data_bulk(entries: list[dict]):
+    return bulk_response(DataEntry, entries)
+
+
+@blueprint.post("/api/breastfeeding/bulk")
+@admin_required
+@use_args(BulkAddBreastfeedingSchema(many=True))
+def add_breastfeeding_bulk(entries: list[dict]):
+    return bulk_response(Breastfeeding, entries)
+
+
+@blueprint.post("/api/activities/bulk")
+@admin_required
+@use_args(BulkAddActivitySchema(many=True))
+def add_activities_bulk(entries: list[dict]):
+    return bulk_response(Activity, entries)
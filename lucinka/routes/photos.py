@@ -0,0 +1,92 @@
+import datetime
+from pathlib import Path
+
+from flask import Blueprint, current_app, jsonify, request, session
+from webargs.flaskparser import use_kwargs
+from werkzeug.security import safe_join
+
+from lucinka.media import send_media
+from lucinka.models import Photo, db
+from lucinka.schemas import AddPhotoSchema, GetPhotoSchema, ListArgsSchema, PhotoSizeSchema
+from lucinka.storage import release_file, store_stream
+from lucinka.thumbnails import ensure_variant, submit_variants, variant_filename
+from lucinka.views import ALLOWED_EXTENSIONS, admin_required, conditional, dump_list, list_response, login_required
+
+
+# Photos stored by content hash, with resized variants generated on upload or on demand
+blueprint = Blueprint("photos", __name__)
+
+
+@blueprint.post("/api/photos")
+@admin_required
+@use_kwargs(
+    AddPhotoSchema,
+    location="form",
+)
+def add_photo(date: datetime.datetime, notes: str):
+    user_id = session["user_id"]
+
+    # Check if file is in request
+    if "photo" not in request.files:
+        return jsonify({"error": "No file part"}), 422
+
+    file = request.files["photo"]
+    ext = Path(file.filename).suffix
+    if not file or ext not in ALLOWED_EXTENSIONS:
+        return jsonify({"error": "Invalid file"}), 400
+
+    try:
+        # The file is released again if the photo cannot be committed
+        with store_stream(current_app.config["UPLOAD_FOLDER"], file.stream, ext) as sha256:
+            photo = Photo(
+                date=date,
+                notes=notes,
+                ext=ext,
+                sha256=sha256,
+                user_id=user_id,
+            )
+            db.session.add(photo)
+            db.session.commit()
+    except OSError:
+        current_app.logger.exception("Error saving file")
+        return jsonify({"error": "Failed to save file"}), 500
+
+    submit_variants(current_app.config["UPLOAD_FOLDER"] / photo.storage_filename)
+    return jsonify({}), 201
+
+
+@blueprint.get("/api/photos")
+@login_required
+@conditional("photos")
+@use_kwargs(ListArgsSchema, location="query")
+def get_photos(**list_args: object):
+    return list_response(*dump_list(GetPhotoSchema, Photo.date, descending=True, **list_args))
+
+
+# Serve uploaded images
+@blueprint.get("/api/photos/<path:filename>")
+@login_required
+@use_kwargs(PhotoSizeSchema, location="query")
+def serve_photo(filename: str, size: str | None):
+    # Unfinished uploads and temporary files are never served
+    if any(part.startswith(".") for part in filename.split("/")):
+        return jsonify({"error": "Photo not found"}), 404
+    if size is not None and (source := safe_join(current_app.config["UPLOAD_FOLDER"], filename)):
+        # Legacy uploads get their variants generated on first request
+        variant = ensure_variant(Path(source), size) if Path(source).is_file() else None
+        if variant is not None:
+            return send_media(current_app.config["UPLOAD_FOLDER"], variant_filename(filename, size))
+    return send_media(current_app.config["UPLOAD_FOLDER"], filename)
+
+
+@blueprint.delete("/api/photos/<int:photo_id>")
+@admin_required
+def delete_photo(photo_id: int):
+    photo = Photo.query.get(photo_id)
+    if not photo:
+        return jsonify({"error": "Photo not found"}), 404
+    db.session.delete(photo)
+    db.session.commit()
+    # Photos with the same content share one file, which is removed with its last reference
+    release_file(current_app.config["UPLOAD_FOLDER"], photo)
+    return jsonify({}), 204
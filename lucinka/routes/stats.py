@@ -0,0 +1,42 @@
+from flask import Blueprint, jsonify
+from webargs.flaskparser import use_kwargs
+
+from lucinka.schemas import StatsArgsSchema
+from lucinka.stats import daily_feeding_stats, hourly_feeding_stats, monthly_feeding_stats, timeline_feeding_stats
+from lucinka.views import conditional, login_required
+
+
+# Feeding totals aggregated per local day, hour and month
+blueprint = Blueprint("stats", __name__)
+
+
+@blueprint.get("/api/breastfeeding/stats/daily")
+@login_required
+@conditional("breastfeeding")
+@use_kwargs(StatsArgsSchema, location="query")
+def get_breastfeeding_daily_stats(**stats_args: object):
+    return jsonify(daily_feeding_stats(**stats_args))
+
+
+@blueprint.get("/api/breastfeeding/stats/hourly")
+@login_required
+@conditional("breastfeeding")
+@use_kwargs(StatsArgsSchema, location="query")
+def get_breastfeeding_hourly_stats(**stats_args: object):
+    return jsonify(hourly_feeding_stats(**stats_args))
+
+
+@blueprint.get("/api/breastfeeding/stats/timeline")
+@login_required
+@conditional("breastfeeding")
+@use_kwargs(StatsArgsSchema, location="query")
+def get_breastfeeding_timeline_stats(**stats_args: object):
+    return jsonify(timeline_feeding_stats(**stats_args))
+
+
+@blueprint.get("/api/breastfeeding/stats/monthly")
+@login_required
+@conditional("breastfeeding")
+@use_kwargs(StatsArgsSchema, location="query")
+def get_breastfeeding_monthly_stats(**stats_args: object):
+    return jsonify(monthly_feeding_stats(**stats_args))
@@ -0,0 +1,45 @@
+from flask import Blueprint, current_app, jsonify, request
+from webargs.flaskparser import use_kwargs
+
+from lucinka.events import notifier, stream_changes
+from lucinka.models import db
+from lucinka.schemas import SyncArgsSchema
+from lucinka.sync import changes_since
+from lucinka.views import conditional, login_required, read_snapshot
+
+
+# Incremental sync of the change log and server-sent change notifications
+blueprint = Blueprint("sync", __name__)
+
+
+@blueprint.get("/api/sync")
+@login_required
+@read_snapshot
+@conditional("data", "visits", "breastfeeding", "activities", "photos")
+@use_kwargs(SyncArgsSchema, location="query")
+def get_sync(since: int, limit: int):
+    """Return the rows written and deleted since the given change log version."""
+    return jsonify(changes_since(since, limit=limit))
+
+
+@blueprint.get("/api/events")
+@login_required
+def get_events():
+    """Stream change notifications as server-sent events."""
+    if not notifier.open_stream(current_app.config["EVENTS_MAX_STREAMS"]):
+        response = jsonify({"error": "Too many event streams"})
+        response.status_code = 503
+        response.retry_after = current_app.config["EVENTS_HEARTBEAT"]
+        return response
+    notifier.watch(db.engine.url.database)
+    stream = stream_changes(
+        db.engine,
+        request.headers.get("Last-Event-ID", type=int),
+        heartbeat=current_app.config["EVENTS_HEARTBEAT"],
+        duration=current_app.config["EVENTS_STREAM_DURATION"],
+    )
+    response = current_app.response_class(stream, mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    response.call_on_close(notifier.close_stream)
+    return response
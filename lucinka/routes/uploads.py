@@ -0,0 +1,123 @@
+import datetime
+from pathlib import Path
+
+from flask import Blueprint, current_app, jsonify, request, session
+from webargs.flaskparser import use_kwargs
+
+from lucinka.models import Photo, db
+from lucinka.schemas import GetPhotoSchema, StartUploadSchema, UploadChunkSchema
+from lucinka.thumbnails import submit_variants
+from lucinka.uploads import (
+    OffsetMismatchError,
+    UploadBusyError,
+    discard_upload,
+    expire_uploads,
+    finish_upload,
+    load_upload,
+    start_upload,
+    write_chunk,
+)
+from lucinka.views import ALLOWED_EXTENSIONS, admin_required
+
+
+# Resumable photo uploads, sent in chunks and finalized into a photo
+blueprint = Blueprint("uploads", __name__)
+
+
+def get_own_upload(upload_id: str) -> dict | None:
+    upload = load_upload(current_app.config["UPLOAD_FOLDER"], upload_id)
+    if not upload or upload["user_id"] != session["user_id"]:
+        return None
+    return upload
+
+
+@blueprint.post("/api/uploads")
+@admin_required
+@use_kwargs(StartUploadSchema)
+def start_photo_upload(filename: str, size: int, date: datetime.datetime, notes: str):
+    ext = Path(filename).suffix
+    if ext not in ALLOWED_EXTENSIONS:
+        return jsonify({"error": "Invalid file"}), 400
+    if size > current_app.config["UPLOAD_MAX_SIZE"]:
+        return jsonify({"error": "File too large"}), 413
+    # Abandoned uploads are cleaned up whenever a new one starts
+    expire_uploads(current_app.config["UPLOAD_FOLDER"], current_app.config["UPLOAD_EXPIRY"])
+    upload_id = start_upload(
+        current_app.config["UPLOAD_FOLDER"],
+        user_id=session["user_id"],
+        ext=ext,
+        size=size,
+        date=date,
+        notes=notes,
+    )
+    return jsonify({"id": upload_id, "offset": 0, "chunk_size": current_app.config["MAX_CONTENT_LENGTH"]}), 201
+
+
+@blueprint.get("/api/uploads/<upload_id>")
+@admin_required
+def get_photo_upload(upload_id: str):
+    upload = get_own_upload(upload_id)
+    if not upload:
+        return jsonify({"error": "Upload not found"}), 404
+    return jsonify({"id": upload_id, "offset": upload["offset"], "size": upload["size"]})
+
+
+@blueprint.put("/api/uploads/<upload_id>")
+@admin_required
+@use_kwargs(UploadChunkSchema, location="query")
+def put_photo_upload_chunk(upload_id: str, offset: int):
+    upload = get_own_upload(upload_id)
+    if not upload:
+        return jsonify({"error": "Upload not found"}), 404
+    try:
+        new_offset = write_chunk(current_app.config["UPLOAD_FOLDER"], upload, upload_id, offset, request.stream)
+    except OffsetMismatchError as e:
+        return jsonify({"error": "Offset mismatch", "offset": e.offset}), 409
+    except UploadBusyError:
+        return jsonify({"error": "Upload in progress", "offset": upload["offset"]}), 409
+    except ValueError:
+        return jsonify({"error": "Upload exceeds declared size", "offset": offset}), 413
+    return jsonify({"id": upload_id, "offset": new_offset})
+
+
+@blueprint.post("/api/uploads/<upload_id>/finalize")
+@admin_required
+def finalize_photo_upload(upload_id: str):
+    upload = get_own_upload(upload_id)
+    if not upload:
+        return jsonify({"error": "Upload not found"}), 404
+    if upload["offset"] != upload["size"]:
+        return jsonify({"error": "Upload incomplete", "offset": upload["offset"]}), 409
+
+    try:
+        # The file is released again if the photo cannot be committed
+        with finish_upload(current_app.config["UPLOAD_FOLDER"], upload_id, upload["ext"]) as sha256:
+            photo = Photo(
+                date=upload["date"],
+                notes=upload["notes"],
+                ext=upload["ext"],
+                sha256=sha256,
+                user_id=session["user_id"],
+            )
+            db.session.add(photo)
+            db.session.commit()
+    except UploadBusyError:
+        return jsonify({"error": "Upload in progress", "offset": upload["offset"]}), 409
+    except FileNotFoundError:
+        # Finalized by a concurrent request
+        return jsonify({"error": "Upload not found"}), 404
+    except OSError:
+        current_app.logger.exception("Error saving file")
+        return jsonify({"error": "Failed to save file"}), 500
+
+    submit_variants(current_app.config["UPLOAD_FOLDER"] / photo.storage_filename)
+    return jsonify(GetPhotoSchema().dump(photo)), 201
+
+
+@blueprint.delete("/api/uploads/<upload_id>")
+@admin_required
+def cancel_photo_upload(upload_id: str):
+    if not get_own_upload(upload_id):
+        return jsonify({"error": "Upload not found"}), 404
+    discard_upload(current_app.config["UPLOAD_FOLDER"], upload_id)
+    return jsonify({}), 204
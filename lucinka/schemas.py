@@ -1,12 +1,23 @@
 import datetime
+from collections.abc import Mapping
 
-from marshmallow import Schema, fields
+from marshmallow import Schema, ValidationError, fields, validate
+from webargs.fields import DelimitedList
+
+from lucinka.pagination import decode_cursor
 
 
 def utcnow():
     return datetime.datetime.now(datetime.UTC)
 
 
+def format_utc_datetime(value: datetime.datetime | None) -> str | None:
+    """Format a naive UTC datetime with millisecond precision and a 'Z' suffix."""
+    if value is None:
+        return None
+    return value.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
 class UTCDateTime(fields.DateTime):
     """DateTime field that ensures UTC timezone indicator is included in output."""
 
@@ -15,10 +26,45 @@ class UTCDateTime(fields.DateTime):
             return None
         # Ensure the datetime is formatted with 'Z' suffix to indicate UTC
         if isinstance(value, datetime.datetime):
-            return value.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+            return format_utc_datetime(value)
         return super()._serialize(value, attr, obj, **kwargs)
 
 
+class Cursor(fields.Str):
+    """Opaque keyset pagination cursor."""
+
+    def _deserialize(
+        self,
+        value: object,
+        attr: str | None,
+        data: Mapping[str, object] | None,
+        **kwargs: object,
+    ) -> tuple[datetime.datetime, int]:
+        value = super()._deserialize(value, attr, data, **kwargs)
+        try:
+            return decode_cursor(value)
+        except ValueError as e:
+            raise ValidationError(str(e)) from e
+
+
+class ListArgsSchema(Schema):
+    since = fields.DateTime(load_default=None)
+    until = fields.DateTime(load_default=None)
+    limit = fields.Int(load_default=None, validate=validate.Range(min=1, max=1000))
+    cursor = Cursor(load_default=None)
+
+
+class TimeSeriesArgsSchema(ListArgsSchema):
+    output_format = fields.Str(data_key="format", load_default="json", validate=validate.OneOf(["json", "columnar"]))
+
+
+class StatsArgsSchema(Schema):
+    since = fields.DateTime(load_default=None)
+    until = fields.DateTime(load_default=None)
+    # Minutes east of UTC used to bucket timestamps into local days/hours (e.g. 60 for CET)
+    tz_offset = fields.Int(load_default=0, validate=validate.Range(min=-14 * 60, max=14 * 60))
+
+
 class GetUserSchema(Schema):
     id = fields.Int(dump_only=True)
     username = fields.Str(dump_only=True)
@@ -94,6 +140,29 @@ class AddPhotoSchema(Schema):
     notes = fields.Str(load_default="")
 
 
+class SyncArgsSchema(Schema):
+    since = fields.Int(load_default=0, validate=validate.Range(min=0))
+    limit = fields.Int(load_default=1000, validate=validate.Range(min=1, max=5000))
+
+
+class ExportArchiveSchema(Schema):
+    # Names of entries the client already has from an interrupted download
+    skip = fields.List(fields.Str(), load_default=list)
+
+
+class PhotoSizeSchema(Schema):
+    size = fields.Str(load_default=None, validate=validate.OneOf(["thumb", "medium"]))
+
+
+class StartUploadSchema(AddPhotoSchema):
+    filename = fields.Str(required=True)
+    size = fields.Int(required=True, validate=validate.Range(min=1))
+
+
+class UploadChunkSchema(Schema):
+    offset = fields.Int(required=True, validate=validate.Range(min=0))
+
+
 class GetActivitySchema(Schema):
     id = fields.Int(dump_only=True)
     activity_type = fields.Str(dump_only=True)
@@ -113,6 +182,47 @@ class UpdateActivitySchema(Schema):
     end_dt = fields.DateTime(required=True)
 
 
+class IdempotencyKeySchema(Schema):
+    idempotency_key = fields.Str(load_default=None, validate=validate.Length(min=1, max=128))
+
+
+class BulkAddDataEntrySchema(AddDataEntrySchema, IdempotencyKeySchema):
+    pass
+
+
+class BulkAddBreastfeedingSchema(AddBreastfeedingSchema, IdempotencyKeySchema):
+    pass
+
+
+class BulkAddActivitySchema(AddActivitySchema, IdempotencyKeySchema):
+    pass
+
+
+class BulkAddVisitSchema(AddVisitSchema, IdempotencyKeySchema):
+    pass
+
+
+class ExportKeySchema(Schema):
+    # The stored key, or one derived from the id, so that importing an export twice inserts nothing new
+    idempotency_key = fields.Str(dump_only=True)
+
+
+class ExportDataEntrySchema(ExportKeySchema, GetDataEntrySchema):
+    pass
+
+
+class ExportVisitSchema(ExportKeySchema, GetVisitSchema):
+    pass
+
+
+class ExportBreastfeedingSchema(ExportKeySchema, GetBreastfeedingSchema):
+    pass
+
+
+class ExportActivitySchema(ExportKeySchema, GetActivitySchema):
+    pass
+
+
 class GetPhotoSchema(Schema):
     id = fields.Int(dump_only=True)
     filename = fields.Method("get_filename", dump_only=True)
@@ -121,3 +231,10 @@ class GetPhotoSchema(Schema):
 
     def get_filename(self, obj):
         return obj.storage_filename
+
+
+BUNDLE_KEYS = ("user", "data", "visits", "breastfeeding", "photos", "activities")
+
+
+class BundleSchema(Schema):
+    keys = DelimitedList(fields.Str(validate=validate.OneOf(BUNDLE_KEYS)), required=True)
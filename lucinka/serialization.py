@@ -0,0 +1,160 @@
+import dataclasses
+import datetime
+import decimal
+import json
+import uuid
+from collections.abc import Callable, Sequence
+from typing import ClassVar
+
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+from marshmallow import Schema, fields
+from sqlalchemy import Row, Select, Text, cast, func, select
+from sqlalchemy.sql import ColumnElement
+from werkzeug.http import http_date
+
+from lucinka.models import DATABASE_ID, Activity, Breastfeeding, DataEntry, Photo, Setting, Visit
+from lucinka.schemas import (
+    ExportActivitySchema,
+    ExportBreastfeedingSchema,
+    ExportDataEntrySchema,
+    ExportVisitSchema,
+    GetPhotoSchema,
+    UTCDateTime,
+    format_utc_datetime,
+)
+
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _export_key(model: type) -> Callable[[], ColumnElement]:
+    # Prefixed with the id of the database, as imported rows keep the keys of the database they came from
+    database_id = select(Setting.value).where(Setting.name == DATABASE_ID).scalar_subquery()
+    return lambda: func.coalesce(
+        model.idempotency_key,
+        database_id + f":{model.__tablename__}:" + cast(model.id, Text),
+    )
+
+
+# SQL expressions for schema fields that are not plain model columns
+FIELD_EXPRESSIONS: dict[tuple[type[Schema], str], Callable[[], ColumnElement]] = {
+    (GetPhotoSchema, "filename"): lambda: Photo.storage_filename,
+    (ExportDataEntrySchema, "idempotency_key"): _export_key(DataEntry),
+    (ExportVisitSchema, "idempotency_key"): _export_key(Visit),
+    (ExportBreastfeedingSchema, "idempotency_key"): _export_key(Breastfeeding),
+    (ExportActivitySchema, "idempotency_key"): _export_key(Activity),
+}
+
+
+def _default(o: object) -> object:
+    # The same conversions as Flask's default provider
+    if isinstance(o, datetime.date):
+        return http_date(o)
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    msg = f"Object of type {type(o).__name__} is not JSON serializable"
+    raise TypeError(msg)
+
+
+def encode(obj: object) -> bytes:
+    """Serialize `obj` to compact JSON bytes with sorted keys, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+    return json.dumps(obj, default=_default, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider which encodes responses with `encode`.
+
+    The output is equal as JSON to that of the default provider, but not byte
+    for byte: the default one pretty-prints in debug mode and escapes
+    non-ASCII characters as ``\\uXXXX``, while `encode` writes compact UTF-8.
+    """
+
+    def response(self, *args: object, **kwargs: object) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(encode(obj) + b"\n", mimetype=self.mimetype)
+
+
+def _date(value: datetime.date | None) -> str | None:
+    return None if value is None else value.isoformat()
+
+
+def _identity(value: object) -> object:
+    return value
+
+
+_EPOCH = datetime.datetime(1970, 1, 1)  # noqa: DTZ001
+_MILLISECOND = datetime.timedelta(milliseconds=1)
+
+
+def _epoch_ms(value: datetime.date | None) -> int | None:
+    """Milliseconds since the Unix epoch of a naive UTC datetime (or midnight UTC of a date)."""
+    if value is None:
+        return None
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time.min)
+    return (value - _EPOCH) // _MILLISECOND
+
+
+class FastSerializer:
+    """Dump rows selected with SQLAlchemy Core the same way a `Get*Schema` dumps ORM objects.
+
+    Only the field types used by the read schemas are supported.
+    """
+
+    _cache: ClassVar[dict[type[Schema], "FastSerializer"]] = {}
+
+    def __init__(self, schema: type[Schema], model: type) -> None:
+        declared = schema._declared_fields  # noqa: SLF001
+        self.names = list(declared)
+        self.columns = [self._expression(schema, model, name).label(name) for name in self.names]
+        self.converters = [self._converter(declared[name]) for name in self.names]
+        self.columnar_converters = [
+            _epoch_ms if isinstance(declared[name], fields.Date | fields.DateTime) else _identity for name in self.names
+        ]
+
+    @classmethod
+    def for_schema(cls, schema: type[Schema], model: type) -> "FastSerializer":
+        if schema not in cls._cache:
+            cls._cache[schema] = cls(schema, model)
+        return cls._cache[schema]
+
+    @staticmethod
+    def _expression(schema: type[Schema], model: type, name: str) -> ColumnElement:
+        if (schema, name) in FIELD_EXPRESSIONS:
+            return FIELD_EXPRESSIONS[schema, name]()
+        return getattr(model, name)
+
+    @staticmethod
+    def _converter(field: fields.Field) -> Callable[[object], object]:
+        if isinstance(field, UTCDateTime):
+            return format_utc_datetime
+        if isinstance(field, fields.Date):
+            return _date
+        return _identity
+
+    def select(self) -> Select:
+        return select(*self.columns)
+
+    def dump(self, rows: Sequence[Row]) -> list[dict]:
+        names, converters = self.names, self.converters
+        return [
+            {name: convert(value) for name, convert, value in zip(names, converters, row, strict=True)} for row in rows
+        ]
+
+    def dump_columnar(self, rows: Sequence[Row]) -> dict[str, list]:
+        """Dump rows as one list per field, with timestamps as epoch milliseconds."""
+        result = {"columns": self.names}
+        columns = zip(*rows, strict=True) if rows else ([] for _ in self.names)
+        for name, convert, values in zip(self.names, self.columnar_converters, columns, strict=True):
+            result[name] = [convert(value) for value in values]
+        return result
@@ -0,0 +1,60 @@
+from gunicorn.app.base import BaseApplication
+
+from lucinka.app import create_app
+
+
+class Server(BaseApplication):
+    """Production WSGI server running the app in several gunicorn worker processes.
+
+    The app is created in each worker after forking so that no database
+    connections are shared between processes. On SIGTERM workers finish
+    in-flight requests for up to ``graceful_timeout`` seconds.
+    """
+
+    def __init__(self, options: dict, *, event_streams: int) -> None:
+        self.options = options
+        self.event_streams = event_streams
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        app = create_app(dev=False)
+        # The server adds a thread per event stream, so streams never take the threads for requests
+        app.config["EVENTS_MAX_STREAMS"] = self.event_streams
+        return app
+
+
+def serve(  # noqa: PLR0913
+    *,
+    host: str = "0.0.0.0",  # noqa: S104
+    port: int = 5000,
+    workers: int = 2,
+    threads: int = 4,
+    event_streams: int = 2,
+    keepalive: int = 5,
+    timeout: int = 60,
+    graceful_timeout: int = 30,
+) -> None:
+    """Run the production server until it is stopped.
+
+    Each worker runs `threads` threads for requests plus one for each of up
+    to `event_streams` server-sent event streams.
+    """
+    threads += event_streams
+    Server(
+        {
+            "bind": f"{host}:{port}",
+            "workers": workers,
+            "threads": threads,
+            "worker_class": "gthread" if threads > 1 else "sync",
+            "keepalive": keepalive,
+            "timeout": timeout,
+            "graceful_timeout": graceful_timeout,
+            "accesslog": "-",
+            "errorlog": "-",
+        },
+        event_streams=event_streams,
+    ).run()
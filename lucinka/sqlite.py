@@ -0,0 +1,40 @@
+import sqlite3
+from logging import Logger
+from typing import Any
+
+from flask import Flask
+from sqlalchemy import Engine, event
+from sqlalchemy.pool import ConnectionPoolEntry
+
+from lucinka.models import db
+
+
+def _apply_pragmas(pragmas: dict[str, Any], logger: Logger):
+    logged = False
+
+    def on_connect(dbapi_connection: sqlite3.Connection, connection_record: ConnectionPoolEntry) -> None:  # noqa: ARG001
+        nonlocal logged
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+            if not logged:
+                effective = {name: cursor.execute(f"PRAGMA {name}").fetchone() for name in pragmas}
+                effective = {name: row[0] if row else None for name, row in effective.items()}
+                logger.info("SQLite settings: %s", ", ".join(f"{k}={v}" for k, v in effective.items()))
+                logged = True
+        finally:
+            cursor.close()
+
+    return on_connect
+
+
+def init_sqlite(app: Flask) -> None:
+    """Apply the configured pragmas to every new SQLite connection."""
+    pragmas = app.config["SQLITE_PRAGMAS"]
+    with app.app_context():
+        engines: list[Engine] = list(db.engines.values())
+    for engine in engines:
+        if engine.dialect.name == "sqlite":
+            event.listen(engine, "connect", _apply_pragmas(pragmas, app.logger))
+    app.logger.info("Database engine options: %s", app.config["SQLALCHEMY_ENGINE_OPTIONS"])
@@ -0,0 +1,208 @@
+import datetime
+
+from sqlalchemy import Integer, case, cast, func, literal, select
+from sqlalchemy.sql import ColumnElement
+
+from lucinka.models import Breastfeeding, DailyRollup, db
+from lucinka.pagination import to_naive_utc
+from lucinka.rollups import FEEDING_CATEGORY, rollup_timezone
+
+
+def _local(column: ColumnElement, tz_offset: int, fmt: str) -> ColumnElement:
+    """Format a UTC datetime column in local time, `tz_offset` minutes east of UTC."""
+    return func.strftime(fmt, column, literal(f"{tz_offset:+d} minutes"))
+
+
+def _sum(value: ColumnElement) -> ColumnElement:
+    return func.coalesce(func.sum(value), 0)
+
+
+def _feeding_filters(
+    *,
+    since: datetime.datetime | None,
+    until: datetime.datetime | None,
+    include_pumped: bool = True,
+) -> list[ColumnElement]:
+    filters = []
+    if since is not None:
+        filters.append(Breastfeeding.start_dt >= to_naive_utc(since))
+    if until is not None:
+        filters.append(Breastfeeding.start_dt < to_naive_utc(until))
+    if not include_pumped:
+        filters.append(Breastfeeding.is_pumped.is_(False))
+    return filters
+
+
+def _feeding_query(
+    *group_by: ColumnElement,
+    since: datetime.datetime | None,
+    until: datetime.datetime | None,
+    include_pumped: bool = True,
+):
+    filters = _feeding_filters(since=since, until=until, include_pumped=include_pumped)
+    return select(*group_by).where(*filters).group_by(*group_by).order_by(*group_by)
+
+
+def _aware(value: datetime.datetime) -> datetime.datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=datetime.UTC)
+
+
+def _use_rollups(tz_offset: int, since: datetime.datetime | None, until: datetime.datetime | None) -> bool:
+    """Whether a query can be answered from the daily rollups instead of raw rows.
+
+    Rollups are keyed by local day in the family timezone, so they serve
+    queries whose bounds fall on its local midnight and whose offset is its
+    UTC offset on every queried day that has feedings. Other queries, e.g.
+    ones spanning a daylight saving change, aggregate the raw rows, which
+    gives the same results, only slower.
+    """
+    zone = rollup_timezone()
+    offset = datetime.timedelta(minutes=tz_offset)
+    bounds = [_aware(bound).astimezone(zone) for bound in (since, until) if bound is not None]
+    if any(bound.time() != datetime.time.min or bound.utcoffset() != offset for bound in bounds):
+        return False
+
+    query = select(func.min(DailyRollup.day), func.max(DailyRollup.day)).where(DailyRollup.category == FEEDING_CATEGORY)
+    first, last = db.session.execute(query).one()
+    if first is None:
+        return True
+    end = last + datetime.timedelta(days=1)
+    if since is not None:
+        first = max(first, _aware(since).astimezone(zone).date())
+    if until is not None:
+        end = min(end, _aware(until).astimezone(zone).date())
+    # The midnights before and after every queried day, which differ in offset around a daylight saving change
+    day = first
+    while day <= end:
+        if datetime.datetime.combine(day, datetime.time.min, zone).utcoffset() != offset:
+            return False
+        day += datetime.timedelta(days=1)
+    return True
+
+
+def _rollup_query(*group_by: ColumnElement, since: datetime.datetime | None, until: datetime.datetime | None):
+    query = (
+        select(*group_by)
+        .where(DailyRollup.category == FEEDING_CATEGORY, DailyRollup.count > 0)
+        .group_by(*group_by)
+        .order_by(*group_by)
+        .add_columns(
+            _sum(DailyRollup.count).label("sessions"),
+            _sum(DailyRollup.pumped_count).label("pumped_sessions"),
+            _sum(DailyRollup.left_minutes).label("left"),
+            _sum(DailyRollup.right_minutes).label("right"),
+            _sum(DailyRollup.bottle_ml).label("ml"),
+        )
+    )
+    if since is not None:
+        query = query.where(DailyRollup.day >= _aware(since).astimezone(rollup_timezone()).date())
+    if until is not None:
+        query = query.where(DailyRollup.day < _aware(until).astimezone(rollup_timezone()).date())
+    return query
+
+
+def _breast_minutes(column: ColumnElement) -> ColumnElement:
+    return _sum(case((Breastfeeding.is_pumped.is_(False), func.coalesce(column, 0)), else_=0))
+
+
+def _bottle_ml() -> ColumnElement:
+    return _sum(case((Breastfeeding.is_breast.is_(False), Breastfeeding.ml_amount), else_=0))
+
+
+def _pumped_sessions() -> ColumnElement:
+    return _sum(case((Breastfeeding.is_pumped.is_(True), 1), else_=0))
+
+
+def daily_feeding_stats(
+    *,
+    tz_offset: int = 0,
+    since: datetime.datetime | None = None,
+    until: datetime.datetime | None = None,
+) -> list[dict]:
+    """Feeding totals per local day."""
+    if _use_rollups(tz_offset, since, until):
+        day = func.strftime("%Y-%m-%d", DailyRollup.day).label("date")
+        return [row._asdict() for row in db.session.execute(_rollup_query(day, since=since, until=until))]
+
+    day = _local(Breastfeeding.start_dt, tz_offset, "%Y-%m-%d").label("date")
+    query = _feeding_query(day, since=since, until=until).add_columns(
+        func.count().label("sessions"),
+        _pumped_sessions().label("pumped_sessions"),
+        _breast_minutes(Breastfeeding.left_duration).label("left"),
+        _breast_minutes(Breastfeeding.right_duration).label("right"),
+        _bottle_ml().label("ml"),
+    )
+    return [row._asdict() for row in db.session.execute(query)]
+
+
+def hourly_feeding_stats(
+    *,
+    tz_offset: int = 0,
+    since: datetime.datetime | None = None,
+    until: datetime.datetime | None = None,
+) -> list[dict]:
+    """Number and total duration of non-pumped sessions per local month and hour of day."""
+    month = _local(Breastfeeding.start_dt, tz_offset, "%Y-%m").label("month")
+    hour = cast(_local(Breastfeeding.start_dt, tz_offset, "%H"), Integer).label("hour")
+    duration = func.coalesce(Breastfeeding.left_duration, 0) + func.coalesce(Breastfeeding.right_duration, 0)
+    query = _feeding_query(month, hour, since=since, until=until, include_pumped=False).add_columns(
+        func.count().label("sessions"),
+        _sum(duration).label("duration"),
+    )
+    return [row._asdict() for row in db.session.execute(query)]
+
+
+def timeline_feeding_stats(
+    *,
+    tz_offset: int = 0,
+    since: datetime.datetime | None = None,
+    until: datetime.datetime | None = None,
+) -> list[dict]:
+    """Number of local days per month whose n-th non-pumped session started at a given hour.
+
+    Sessions are numbered from 0 within each local day and their start is
+    rounded to the nearest hour (so up to 24). `next_hour` is the rounded
+    start of the following session of the same day, or ``None`` for the last
+    session of the day.
+    """
+    day = _local(Breastfeeding.start_dt, tz_offset, "%Y-%m-%d")
+    minutes = cast(_local(Breastfeeding.start_dt, tz_offset, "%s"), Integer) % 86400 // 60
+    hour = (minutes + 30) // 60
+    order = {"partition_by": day, "order_by": (Breastfeeding.start_dt, Breastfeeding.id)}
+    sessions = (
+        select(
+            _local(Breastfeeding.start_dt, tz_offset, "%Y-%m").label("month"),
+            (func.row_number().over(**order) - 1).label("position"),
+            hour.label("hour"),
+            func.lead(hour).over(**order).label("next_hour"),
+        )
+        .where(*_feeding_filters(since=since, until=until, include_pumped=False))
+        .subquery()
+    )
+    group_by = (sessions.c.month, sessions.c.position, sessions.c.hour, sessions.c.next_hour)
+    query = select(*group_by, func.count().label("days")).group_by(*group_by).order_by(*group_by)
+    return [row._asdict() for row in db.session.execute(query)]
+
+
+def monthly_feeding_stats(
+    *,
+    tz_offset: int = 0,
+    since: datetime.datetime | None = None,
+    until: datetime.datetime | None = None,
+) -> list[dict]:
+    """Feeding totals per local month."""
+    if _use_rollups(tz_offset, since, until):
+        month = func.strftime("%Y-%m", DailyRollup.day).label("month")
+        query = _rollup_query(month, since=since, until=until).add_columns(func.count().label("days"))
+        return [row._asdict() for row in db.session.execute(query)]
+
+    month = _local(Breastfeeding.start_dt, tz_offset, "%Y-%m").label("month")
+    query = _feeding_query(month, since=since, until=until).add_columns(
+        func.count().label("sessions"),
+        _pumped_sessions().label("pumped_sessions"),
+        _breast_minutes(Breastfeeding.left_duration).label("left"),
+        _breast_minutes(Breastfeeding.right_duration).label("right"),
+        _bottle_ml().label("ml"),
+        func.count(func.distinct(_local(Breastfeeding.start_dt, tz_offset, "%Y-%m-%d"))).label("days"),
+    )
+    return [row._asdict() for row in db.session.execute(query)]
@@ -0,0 +1,178 @@
+import fcntl
+import hashlib
+import os
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO
+
+from lucinka.models import Photo, db
+from lucinka.thumbnails import SIZES, is_variant, variant_filename
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+def blob_filename(sha256: str, ext: str) -> str:
+    """Path of a content-addressed file relative to the upload folder (e.g. ``ab/cd/abcd….jpg``)."""
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}"
+
+
+def hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextmanager
+def blob_lock(folder: Path, sha256: str) -> Iterator[None]:
+    """Hold an exclusive lock, shared by all processes and threads, on the blobs with the given hash.
+
+    Locks are striped over up to 256 files in ``.locks`` by the first two hex
+    digits of the hash.
+    """
+    path = folder / ".locks" / sha256[:2]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+@contextmanager
+def store_file(folder: Path, source: Path, ext: str, sha256: str | None = None) -> Iterator[str]:
+    """Move `source` into the content-addressed store and yield its hash.
+
+    If a file with the same content is already stored, `source` is removed
+    instead. The row referencing the file must be committed inside the
+    block: the blob stays locked until then, so that `release_file` cannot
+    delete a file this upload has just found in the store. If the block
+    raises, the session is rolled back and the file is released again.
+    """
+    sha256 = sha256 or hash_file(source)
+    target = folder / blob_filename(sha256, ext)
+    with blob_lock(folder, sha256):
+        if target.is_file():
+            source.unlink()
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            source.replace(target)
+        try:
+            yield sha256
+        except BaseException:
+            db.session.rollback()
+            _release_blob(folder, sha256, ext)
+            raise
+
+
+@contextmanager
+def store_stream(folder: Path, stream: IO[bytes], ext: str) -> Iterator[str]:
+    """Write `stream` to the content-addressed store, hashing it on the way, and yield the hash.
+
+    See `store_file` for what the block must do.
+    """
+    digest = hashlib.sha256()
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix=".", suffix=".tmp")
+    tmp = Path(tmp)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while chunk := stream.read(CHUNK_SIZE):
+                digest.update(chunk)
+                f.write(chunk)
+        with store_file(folder, tmp, ext, digest.hexdigest()) as sha256:
+            yield sha256
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def iter_photos(folder: Path) -> Iterator[Path]:
+    """Yield every stored upload, skipping temporary files, unfinished uploads and regenerable variants."""
+    for path in sorted(folder.rglob("*")):
+        relative = path.relative_to(folder)
+        if any(part.startswith(".") for part in relative.parts) or not path.is_file() or is_variant(path.name):
+            continue
+        yield path
+
+
+def is_referenced(sha256: str, ext: str) -> bool:
+    """Whether any photo still points at the given blob."""
+    query = Photo.query.filter_by(sha256=sha256, ext=ext)
+    return db.session.query(query.exists()).scalar()
+
+
+def _remove_with_variants(folder: Path, filename: str) -> None:
+    (folder / filename).unlink(missing_ok=True)
+    for size in SIZES:
+        (folder / variant_filename(filename, size)).unlink(missing_ok=True)
+
+
+def _release_blob(folder: Path, sha256: str, ext: str) -> bool:
+    # The caller holds the blob lock, so no row referencing the blob can be committed meanwhile
+    if is_referenced(sha256, ext):
+        return False
+    _remove_with_variants(folder, blob_filename(sha256, ext))
+    return True
+
+
+def release_file(folder: Path, photo: Photo) -> bool:
+    """Delete the file (and its variants) of a deleted photo unless another photo shares it.
+
+    Returns whether the file was removed.
+    """
+    if photo.sha256 is None:
+        _remove_with_variants(folder, photo.storage_filename)
+        return True
+    with blob_lock(folder, photo.sha256):
+        return _release_blob(folder, photo.sha256, photo.ext)
+
+
+def _remove_legacy(folder: Path, legacy: Path, photo: Photo) -> None:
+    for size in SIZES:
+        variant = folder / variant_filename(legacy.name, size)
+        if not variant.is_file():
+            continue
+        new_variant = folder / variant_filename(photo.storage_filename, size)
+        if new_variant.is_file():
+            variant.unlink()
+        else:
+            variant.replace(new_variant)
+    legacy.unlink()
+
+
+def rehome_photos(folder: Path) -> tuple[int, list[int]]:
+    """Hash photos stored under their id and move them into the content-addressed layout.
+
+    Safe to interrupt and re-run: the blob is hard-linked in place before the
+    row is updated, and the legacy file is only removed afterwards. Legacy
+    files left behind by an interrupted run are removed by the next one.
+
+    Returns the number of rehomed photos and the ids of photos whose file is missing.
+    """
+    count = 0
+    missing = []
+    for photo in Photo.query.filter(Photo.sha256.is_(None)).order_by(Photo.id).all():
+        legacy = folder / photo.storage_filename
+        if not legacy.is_file():
+            missing.append(photo.id)
+            continue
+
+        sha256 = hash_file(legacy)
+        target = folder / blob_filename(sha256, photo.ext)
+        with blob_lock(folder, sha256):
+            if not target.is_file():
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.link(legacy, target)
+            photo.sha256 = sha256
+            db.session.commit()
+        _remove_legacy(folder, legacy, photo)
+        count += 1
+
+    # Legacy files are named by the photo id and stored at the top level
+    leftovers = {int(path.stem): path for path in folder.glob("[0-9]*.*") if path.stem.isdigit() and path.is_file()}
+    if leftovers:
+        for photo in Photo.query.filter(Photo.id.in_(leftovers), Photo.sha256.is_not(None)):
+            if (folder / photo.storage_filename).is_file():
+                _remove_legacy(folder, leftovers[photo.id], photo)
+    return count, missing
@@ -0,0 +1,65 @@
+from flask import current_app
+from marshmallow import Schema
+from sqlalchemy import func, select
+
+from lucinka.models import Activity, Breastfeeding, Change, DataEntry, Photo, Visit, db
+from lucinka.schemas import (
+    GetActivitySchema,
+    GetBreastfeedingSchema,
+    GetDataEntrySchema,
+    GetPhotoSchema,
+    GetVisitSchema,
+)
+from lucinka.serialization import FastSerializer
+
+
+SYNC_SCHEMAS: dict[str, tuple[type, type[Schema]]] = {
+    "data": (DataEntry, GetDataEntrySchema),
+    "visits": (Visit, GetVisitSchema),
+    "breastfeeding": (Breastfeeding, GetBreastfeedingSchema),
+    "activities": (Activity, GetActivitySchema),
+    "photos": (Photo, GetPhotoSchema),
+}
+
+
+def _dump_rows(model: type, schema: type[Schema], row_ids: list[int]) -> list[dict]:
+    if current_app.config["FAST_JSON"]:
+        serializer = FastSerializer.for_schema(schema, model)
+        query = serializer.select().where(model.id.in_(row_ids)).order_by(model.id)
+        return serializer.dump(db.session.execute(query).all())
+    return schema(many=True).dump(model.query.filter(model.id.in_(row_ids)).order_by(model.id))
+
+
+def current_version() -> int:
+    """Return the version of the most recent change."""
+    return db.session.scalar(select(func.coalesce(func.max(Change.id), 0)))
+
+
+def changes_since(since: int, *, limit: int) -> dict:
+    """Return up to `limit` changes made after version `since`, grouped by table.
+
+    Every table lists the current state of written rows and the ids of deleted
+    ones. ``version`` is the version to ask for next time and ``more`` tells
+    whether further changes remain. A version lower than `since` means the
+    database was replaced and the client has to sync again from 0.
+
+    Must run in a single read transaction (see ``read_snapshot``). Otherwise
+    a change committed between reading the page and reading the current
+    version would be skipped by the version returned for an empty page.
+    """
+    query = select(Change.id, Change.table_name, Change.row_id, Change.deleted).where(Change.id > since)
+    changes = db.session.execute(query.order_by(Change.id).limit(limit + 1)).all()
+    more = len(changes) > limit
+    changes = changes[:limit]
+
+    written = {table: [] for table in SYNC_SCHEMAS}
+    deleted = {table: [] for table in SYNC_SCHEMAS}
+    for change in changes:
+        (deleted if change.deleted else written)[change.table_name].append(change.row_id)
+
+    result = {}
+    for table, (model, schema) in SYNC_SCHEMAS.items():
+        rows = _dump_rows(model, schema, written[table]) if written[table] else []
+        result[table] = {"written": rows, "deleted": sorted(deleted[table])}
+    version = changes[-1].id if changes else current_version()
+    return {"version": version, "more": more, "changes": result}
@@ -0,0 +1,110 @@
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+
+# Longest side in pixels of each generated variant
+SIZES = {"thumb": 320, "medium": 1280}
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
+WEBP_QUALITY = 80
+
+_executor: Executor | None = None
+
+
+def is_variant(filename: str) -> bool:
+    """Whether a file is a generated variant rather than an upload."""
+    return any(filename.endswith(f".{size}.webp") for size in SIZES)
+
+
+def supports_variants(filename: str) -> bool:
+    """Whether resized variants can be generated for the given upload."""
+    return Image is not None and Path(filename).suffix.lower() in IMAGE_EXTENSIONS and not is_variant(filename)
+
+
+def variant_filename(filename: str, size: str) -> str:
+    """File name of a resized variant, stored next to the original (e.g. ``ab/cd/abcd….thumb.webp``)."""
+    path = Path(filename)
+    return str(path.with_name(f"{path.stem}.{size}.webp"))
+
+
+def generate_variants(source: Path, sizes: list[str] | None = None) -> list[Path]:
+    """Write WebP variants of an image next to it. Returns the written paths."""
+    written = []
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in {"RGB", "RGBA"}:
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        for size in sizes or SIZES:
+            variant = image.copy()
+            variant.thumbnail((SIZES[size], SIZES[size]))
+            target = source.with_name(variant_filename(source.name, size))
+            # Write to a temporary file first so concurrent readers never see a partial image
+            tmp = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            variant.save(tmp, "WEBP", quality=WEBP_QUALITY, method=4)
+            tmp.replace(target)
+            written.append(target)
+    return written
+
+
+def ensure_variant(source: Path, size: str) -> Path | None:
+    """Return the path of a variant, generating it first if it does not exist yet.
+
+    Returns ``None`` if no variant can be generated for this file, e.g. because
+    it is a variant itself, is not a readable image or exceeds Pillow's
+    decompression bomb limit.
+    """
+    if not supports_variants(source.name):
+        return None
+    target = source.with_name(variant_filename(source.name, size))
+    if not target.is_file():
+        try:
+            generate_variants(source, [size])
+        except (OSError, Image.DecompressionBombError):
+            return None
+    return target
+
+
+def submit_variants(source: Path) -> None:
+    """Generate all variants of a new upload in a background thread."""
+    global _executor  # noqa: PLW0603
+    if not supports_variants(source.name):
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="thumbnails")
+    _executor.submit(generate_variants, source)
+
+
+def _try_generate_variants(source: Path) -> bool:
+    try:
+        generate_variants(source)
+    except (OSError, Image.DecompressionBombError):
+        return False
+    return True
+
+
+def build_all_variants(folder: Path, *, force: bool = False, workers: int | None = None) -> tuple[int, list[Path]]:
+    """Generate missing variants for every image below `folder` using one process per core.
+
+    Images which cannot be read (corrupt files, decompression bombs) are
+    skipped. Returns the number of images processed and the skipped paths.
+    """
+    sources = [
+        path
+        for path in folder.rglob("*")
+        if path.is_file()
+        and not any(part.startswith(".") for part in path.relative_to(folder).parts)
+        and supports_variants(path.name)
+        and path.stem.count(".") == 0
+        and (force or any(not path.with_name(variant_filename(path.name, size)).is_file() for size in SIZES))
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_try_generate_variants, sources, chunksize=8))
+    skipped = [source for source, ok in zip(sources, results, strict=True) if not ok]
+    return len(sources) - len(skipped), skipped
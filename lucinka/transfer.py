@@ -0,0 +1,143 @@
+import csv
+import json
+from collections.abc import Iterable, Iterator
+from typing import IO
+
+from marshmallow import EXCLUDE, Schema, ValidationError
+
+from lucinka.bulk import bulk_insert
+from lucinka.models import Activity, Breastfeeding, DataEntry, Visit, db, get_database_id
+from lucinka.schemas import (
+    BulkAddActivitySchema,
+    BulkAddBreastfeedingSchema,
+    BulkAddDataEntrySchema,
+    BulkAddVisitSchema,
+    ExportActivitySchema,
+    ExportBreastfeedingSchema,
+    ExportDataEntrySchema,
+    ExportVisitSchema,
+)
+from lucinka.serialization import FastSerializer
+
+
+FORMATS = ("csv", "jsonl")
+
+# Table name -> (model, schema used for export, schema used for import)
+TABLES: dict[str, tuple[type, type[Schema], type[Schema]]] = {
+    "data": (DataEntry, ExportDataEntrySchema, BulkAddDataEntrySchema),
+    "visits": (Visit, ExportVisitSchema, BulkAddVisitSchema),
+    "breastfeeding": (Breastfeeding, ExportBreastfeedingSchema, BulkAddBreastfeedingSchema),
+    "activities": (Activity, ExportActivitySchema, BulkAddActivitySchema),
+}
+
+
+def export_rows(serializer: FastSerializer, model: type, batch_size: int) -> Iterator[dict]:
+    """Dump every row of `model` in id order, fetching `batch_size` rows at a time."""
+    query = serializer.select().order_by(model.id).execution_options(yield_per=batch_size)
+    for rows in db.session.execute(query).partitions():
+        yield from serializer.dump(rows)
+
+
+def export_table(table: str, output: IO[str], output_format: str, *, batch_size: int = 1000) -> int:
+    """Write every row of `table`, dumped like the API does, as CSV or JSON lines.
+
+    Each row also gets an idempotency key, the stored one or one derived from
+    the database id and the row id, which makes importing the same export
+    again insert nothing.
+
+    Rows are fetched `batch_size` at a time, so memory use does not grow with
+    the table. Returns the number of rows written.
+    """
+    model, schema, _ = TABLES[table]
+    get_database_id()
+    serializer = FastSerializer.for_schema(schema, model)
+    rows = export_rows(serializer, model, batch_size)
+    return _write_rows(rows, output, output_format, serializer.names)
+
+
+def _write_rows(rows: Iterable[dict], output: IO[str], output_format: str, fieldnames: list[str]) -> int:
+    count = 0
+    if output_format == "csv":
+        writer = csv.DictWriter(output, fieldnames=fieldnames)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    else:
+        for row in rows:
+            output.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def read_rows(source: IO[str], input_format: str) -> Iterator[tuple[int, dict]]:
+    """Yield ``(line number, row)`` pairs from a CSV or JSON lines file.
+
+    Empty CSV cells are left out so that the schema defaults apply. Lines
+    which are not valid JSON are yielded as ``None``.
+    """
+    if input_format == "csv":
+        reader = csv.DictReader(source)
+        for row in reader:
+            yield reader.line_num, {key: value for key, value in row.items() if value != ""}
+    else:
+        for line_num, line in enumerate(source, 1):
+            if not line.strip():
+                continue
+            try:
+                yield line_num, json.loads(line)
+            except json.JSONDecodeError:
+                yield line_num, None
+
+
+def _batches(rows: Iterable[tuple[int, dict]], size: int) -> Iterator[list[tuple[int, dict]]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_rows(
+    table: str,
+    rows: Iterable[tuple[int, dict]],
+    *,
+    user_id: int,
+    batch_size: int = 5000,
+    dry_run: bool = False,
+) -> tuple[int, int, list[tuple[int, dict]]]:
+    """Validate rows with the table's add schema and insert them in one transaction per batch.
+
+    Fields the schema does not know (such as exported ids) are ignored. Rows
+    with an idempotency key that is already stored are skipped.
+    Importing stops at the first batch containing invalid rows; batches
+    before it stay committed. With `dry_run`, all rows are validated and
+    nothing is written.
+
+    Returns the number of valid rows processed, the number of inserted rows
+    (valid rows with a known idempotency key are skipped) and the
+    ``(line number, errors)`` of invalid rows.
+    """
+    model, _, add_schema = TABLES[table]
+    schema = add_schema(unknown=EXCLUDE)
+    valid = inserted = 0
+    errors = []
+    for batch in _batches(rows, batch_size):
+        entries = []
+        for line_num, row in batch:
+            if row is None:
+                errors.append((line_num, {"_schema": ["Invalid JSON."]}))
+                continue
+            try:
+                entries.append(schema.load(row))
+            except ValidationError as e:
+                errors.append((line_num, e.messages))
+        if errors and not dry_run:
+            break
+        valid += len(entries)
+        if not dry_run:
+            inserted += bulk_insert(model, entries, user_id=user_id)
+    return valid, inserted, errors
@@ -0,0 +1,160 @@
+import datetime
+import fcntl
+import json
+import os
+import re
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO
+
+from lucinka.storage import store_file
+
+
+CHUNK_SIZE = 64 * 1024
+_upload_id_re = re.compile(r"^[0-9a-f]{32}$")
+
+
+class OffsetMismatchError(Exception):
+    """Raised when a chunk does not start where the previous one ended."""
+
+    def __init__(self, offset: int) -> None:
+        super().__init__(f"Expected offset {offset}")
+        self.offset = offset
+
+
+class UploadBusyError(Exception):
+    """Raised when another request is currently writing to the same upload."""
+
+
+def _uploads_folder(folder: Path) -> Path:
+    path = folder / ".uploads"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _paths(folder: Path, upload_id: str) -> tuple[Path, Path]:
+    base = _uploads_folder(folder) / upload_id
+    return base.with_suffix(".json"), base.with_suffix(".part")
+
+
+def start_upload(  # noqa: PLR0913
+    folder: Path,
+    *,
+    user_id: int,
+    ext: str,
+    size: int,
+    date: datetime.datetime,
+    notes: str,
+) -> str:
+    """Create an empty resumable upload and return its id."""
+    upload_id = uuid.uuid4().hex
+    meta_path, part_path = _paths(folder, upload_id)
+    part_path.touch()
+    meta = {"user_id": user_id, "ext": ext, "size": size, "date": date.isoformat(), "notes": notes}
+    meta_path.write_text(json.dumps(meta))
+    return upload_id
+
+
+def load_upload(folder: Path, upload_id: str) -> dict | None:
+    """Return the metadata and current offset of an upload, or ``None`` if it does not exist."""
+    if not _upload_id_re.match(upload_id):
+        return None
+    meta_path, part_path = _paths(folder, upload_id)
+    try:
+        meta = json.loads(meta_path.read_text())
+        meta["offset"] = part_path.stat().st_size
+    except FileNotFoundError:
+        return None
+    meta["date"] = datetime.datetime.fromisoformat(meta["date"])
+    return meta
+
+
+@contextmanager
+def _locked(path: Path, mode: str):
+    with path.open(mode) as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError as e:
+            raise UploadBusyError from e
+        yield f
+
+
+def write_chunk(folder: Path, upload: dict, upload_id: str, offset: int, stream: IO[bytes]) -> int:
+    """Append the request body stream to the upload at `offset` without buffering it in memory.
+
+    Returns the new offset. Data beyond the declared size is rejected.
+    """
+    _, part_path = _paths(folder, upload_id)
+    with _locked(part_path, "r+b") as f:
+        current = os.fstat(f.fileno()).st_size
+        if offset != current:
+            raise OffsetMismatchError(current)
+        f.seek(offset)
+        remaining = upload["size"] - offset
+        while chunk := stream.read(CHUNK_SIZE):
+            if len(chunk) > remaining:
+                f.truncate(offset)
+                msg = "Upload exceeds declared size"
+                raise ValueError(msg)
+            f.write(chunk)
+            remaining -= len(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+        return f.tell()
+
+
+@contextmanager
+def finish_upload(folder: Path, upload_id: str, ext: str) -> Iterator[str]:
+    """Move a complete upload into the content-addressed store, yield its hash and remove its metadata.
+
+    The photo must be committed inside the block, see `store_file`.
+    """
+    meta_path, part_path = _paths(folder, upload_id)
+    with _locked(part_path, "rb"), store_file(folder, part_path, ext) as sha256:
+        try:
+            yield sha256
+        finally:
+            # The data was moved out of the upload either way
+            meta_path.unlink(missing_ok=True)
+
+
+def discard_upload(folder: Path, upload_id: str) -> None:
+    """Delete an unfinished upload."""
+    for path in _paths(folder, upload_id):
+        path.unlink(missing_ok=True)
+
+
+def _last_write(*paths: Path) -> float | None:
+    mtimes = [path.stat().st_mtime for path in paths if path.exists()]
+    return max(mtimes, default=None)
+
+
+def expire_uploads(folder: Path, max_age: float) -> int:
+    """Delete unfinished uploads that were not written to for `max_age` seconds.
+
+    Uploads currently being written are skipped. Returns the number of deleted uploads.
+    """
+    deadline = time.time() - max_age
+    upload_ids = {path.stem for path in _uploads_folder(folder).iterdir() if _upload_id_re.match(path.stem)}
+    expired = 0
+    for upload_id in sorted(upload_ids):
+        paths = _paths(folder, upload_id)
+        try:
+            with _locked(paths[1], "rb"):
+                # Checked under the lock, so an upload written to meanwhile is kept
+                last_write = _last_write(*paths)
+                if last_write is not None and last_write < deadline:
+                    discard_upload(folder, upload_id)
+                    expired += 1
+        except UploadBusyError:
+            continue
+        except FileNotFoundError:
+            # Metadata left behind without data
+            last_write = _last_write(*paths)
+            if last_write is not None and last_write < deadline:
+                discard_upload(folder, upload_id)
+                expired += 1
+    return expired
@@ -1,8 +1,17 @@
+import time
+from pathlib import Path
+
+from flask import current_app, g, session
 from werkzeug.security import generate_password_hash
 
 from lucinka.models import User, db
 
 
+# user id -> (expiry, is_admin), where is_admin is None for users that do not exist
+_roles: dict[int, tuple[float, bool | None]] = {}
+_marker_mtime: int | None = None
+
+
 def create_user(username: str, password: str, *, is_admin: bool = False) -> User:
     """Create a new user."""
     password_hash = generate_password_hash(password)
@@ -10,3 +19,58 @@ def create_user(username: str, password: str, *, is_admin: bool = False) -> User
     db.session.add(user)
     db.session.commit()
     return user
+
+
+def current_user() -> User | None:
+    """Return the logged in user, loading it at most once per request."""
+    if "user" not in g:
+        user_id = session.get("user_id")
+        g.user = db.session.get(User, user_id) if user_id is not None else None
+    return g.user
+
+
+def _marker_path() -> Path | None:
+    # Other processes (e.g. the CLI) signal changes to users by touching a file next to the database
+    database = db.engine.url.database
+    if not database or database == ":memory:":
+        return None
+    return Path(database).with_name(f".{Path(database).name}.users")
+
+
+def _check_marker() -> None:
+    global _marker_mtime  # noqa: PLW0603
+    if (path := _marker_path()) is None:
+        return
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    if mtime != _marker_mtime:
+        _roles.clear()
+        _marker_mtime = mtime
+
+
+def get_user_role(user_id: int) -> bool | None:
+    """Return whether a user is an admin, or ``None`` if the user does not exist.
+
+    The answer is cached in the process for ``USER_CACHE_TTL`` seconds.
+    """
+    _check_marker()
+    now = time.monotonic()
+    cached = _roles.get(user_id)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    if "user" in g and g.user is not None and g.user.id == user_id:
+        is_admin = g.user.is_admin
+    else:
+        is_admin = db.session.execute(db.select(User.is_admin).filter_by(id=user_id)).scalar()
+    _roles[user_id] = (now + current_app.config["USER_CACHE_TTL"], is_admin)
+    return is_admin
+
+
+def invalidate_user_cache() -> None:
+    """Forget cached user roles in this and all other processes using the same database."""
+    _roles.clear()
+    if (path := _marker_path()) is not None:
+        path.touch()
@@ -0,0 +1,137 @@
+import datetime
+import hashlib
+from collections.abc import Callable
+from functools import wraps
+from http import HTTPStatus
+
+from flask import current_app, jsonify, make_response, request, session
+from marshmallow import Schema
+from sqlalchemy import text
+from sqlalchemy.orm import InstrumentedAttribute
+
+from lucinka.compression import etag_variants
+from lucinka.models import db, get_table_versions
+from lucinka.pagination import paginate
+from lucinka.serialization import FastSerializer
+from lucinka.users import get_user_role
+
+
+ALLOWED_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".mp4", ".mov", ".avi", ".mkv"}
+
+
+def utcnow():
+    return datetime.datetime.now(datetime.UTC)
+
+
+def dump_list(
+    schema: type[Schema],
+    column: InstrumentedAttribute,
+    *,
+    output_format: str = "json",
+    **list_args: object,
+) -> tuple[list[dict] | dict[str, list], str | None]:
+    """Query and serialize a page of rows ordered by `column`.
+
+    With ``FAST_JSON`` enabled, plain column tuples are selected and dumped
+    without going through the ORM and marshmallow. The ``columnar`` format
+    always takes that path and returns one list per field.
+    """
+    model = column.class_
+    if output_format == "columnar":
+        serializer = FastSerializer.for_schema(schema, model)
+        rows, next_cursor = paginate(serializer.select(), column, **list_args)
+        return serializer.dump_columnar(rows), next_cursor
+    if current_app.config["FAST_JSON"]:
+        serializer = FastSerializer.for_schema(schema, model)
+        rows, next_cursor = paginate(serializer.select(), column, **list_args)
+        return serializer.dump(rows), next_cursor
+    rows, next_cursor = paginate(model.query, column, **list_args)
+    return schema(many=True).dump(rows), next_cursor
+
+
+def list_response(items: list | dict, next_cursor: str | None):
+    """Return a JSON list, advertising the next page cursor in a header."""
+    response = jsonify(items)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+
+def login_required(f):
+    """Decorator to require login for certain routes."""
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if "user_id" not in session:
+            return jsonify({"error": "Authentication required"}), 401
+        return f(*args, **kwargs)
+
+    return decorated_function
+
+
+def admin_required(f):
+    """Decorator to require admin privileges."""
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if "user_id" not in session:
+            return jsonify({"error": "Authentication required"}), 401
+
+        if not get_user_role(session["user_id"]):
+            return jsonify({"error": "Admin privileges required"}), 403
+
+        return f(*args, **kwargs)
+
+    return decorated_function
+
+
+def read_snapshot(f: Callable) -> Callable:
+    """Decorator to run all queries of a view in one read transaction.
+
+    pysqlite only opens a transaction before a write, so every SELECT otherwise
+    reads the latest commit and a response built from several queries can mix
+    states. A deferred BEGIN makes them share the snapshot taken by the first
+    query, including the table versions read by `conditional` when applied
+    above it.
+    """
+
+    @wraps(f)
+    def decorated_function(*args: object, **kwargs: object):
+        db.session.execute(text("BEGIN"))
+        try:
+            return f(*args, **kwargs)
+        finally:
+            db.session.rollback()
+
+    return decorated_function
+
+
+def conditional(*tables: str):
+    """Decorator to answer GET requests conditionally based on the change counters of `tables`.
+
+    The ETag is derived from the table versions, the current user and the full
+    request path, so a matching If-None-Match is answered with 304 without
+    running the view.
+    """
+
+    def decorator(f: Callable) -> Callable:
+        @wraps(f)
+        def decorated_function(*args: object, **kwargs: object):
+            versions = get_table_versions(list(tables))
+            key = f"{session.get('user_id')}|{request.full_path}|{sorted(versions.items())}"
+            etag = hashlib.sha1(key.encode(), usedforsecurity=False).hexdigest()
+            if matched := next((e for e in etag_variants(etag) if e in request.if_none_match), None):
+                response = make_response("", 304)
+                response.set_etag(matched)
+                response.headers["Cache-Control"] = "no-cache"
+                return response
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != HTTPStatus.OK:
+                return response
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "no-cache"
+            return response
+
+        return decorated_function
+
+    return decorator
@@ -10,17 +10,19 @@ import {
 } from "recharts";
 import { useTranslation } from "react-i18next";
 import { useTheme } from "./theme.jsx";
+import { parseLocalDate, useFeedingStats } from "./util";
 
-export default function BarFeeding({ dailyData }) {
+export default function BarFeeding() {
   const { t, i18n } = useTranslation();
   const { darkMode } = useTheme();
+  const { data: dailyData } = useFeedingStats("daily");
 
   const monthlyCharts = useMemo(() => {
     // Group daily data by month
     const monthlyGroups = {};
     dailyData.forEach(day => {
-      const date = new Date(day.date);
-      const monthKey = `${date.getFullYear()}-${String(date.getMonth() + 1).padStart(2, '0')}`;
+      const date = parseLocalDate(day.date);
+      const monthKey = day.date.slice(0, 7);
       const monthLabel = date.toLocaleDateString(i18n.language || "en", {
         year: "numeric",
         month: "long",
@@ -33,8 +35,8 @@ export default function BarFeeding({ dailyData }) {
           days: [],
         };
       }
-      if (day.sessions[0].is_pumped) {
-        return; // Skip pumped days
+      if (day.sessions === day.pumped_sessions) {
+        return; // Skip days with only pumping
       }
 
       monthlyGroups[monthKey].days.push({
@@ -42,8 +44,8 @@ export default function BarFeeding({ dailyData }) {
           month: "short",
           day: "numeric",
         }),
-        Left: Math.floor(day.leftTotal),
-        Right: Math.floor(day.rightTotal),
+        Left: day.left,
+        Right: day.right,
         fullDate: date,
       });
     });
@@ -348,7 +348,7 @@ export default function BreastfeedingPage() {
   };
   const dailyData = aggregateByDay();
 
-  // Filter out pumped sessions for all displays and plots
+  // Filter out pumped sessions for the last session card
   const nonPumpedSessions = sessions.filter(session => !session.is_pumped);
 
   // Get last non-pumped session for the card display
@@ -549,11 +549,12 @@ export default function BreastfeedingPage() {
               <h2 className="text-xl font-bold dark:text-white text-gray-800 mb-4">
                 {t("Breastfeeding Overview")}
               </h2>
-              <BarFeeding dailyData={dailyData} />
+              {/* The charts fetch totals aggregated by the server */}
+              <BarFeeding />
 
-              <BreastfeedingPolarChart sessions={nonPumpedSessions} />
+              <BreastfeedingPolarChart />
 
-              <ParallelTimelinePlot sessions={nonPumpedSessions} />
+              <ParallelTimelinePlot />
             </div>
 
             {/* Daily Sessions */}
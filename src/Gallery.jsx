@@ -3,7 +3,7 @@ import { useTranslation } from "react-i18next";
 import { useNavigate, useParams } from "react-router";
 
 import Header from "./Header";
-import { useData } from "./util";
+import { uploadResumable, useData } from "./util";
 
 import { Upload, X, Trash2, Calendar, FileText, Trash } from "lucide-react";
 
@@ -75,17 +75,11 @@ export default function PhotoGallery() {
     if (!uploadForm.file) return;
 
     setUploading(true);
-    const formData = new FormData();
-    formData.append("photo", uploadForm.file);
-    formData.append("date", uploadForm.date);
-    formData.append("notes", uploadForm.notes);
     try {
-      const response = await fetch("/api/photos", {
-        method: "POST",
-        body: formData,
+      await uploadResumable(uploadForm.file, {
+        date: uploadForm.date,
+        notes: uploadForm.notes,
       });
-
-      if (!response.ok) throw new Error("Upload failed");
       await refetch();
       // Reset form
       setUploadForm({
@@ -187,7 +181,7 @@ export default function PhotoGallery() {
                       />
                     ) : isImage(photo.filename) ? (
                       <img
-                        src={`/api/photos/${photo.filename}`}
+                        src={`/api/photos/${photo.filename}?size=thumb`}
                         alt={photo.notes || "Photo"}
                         className="w-full h-64 object-contain p-4 dark:bg-gray-700 bg-white dark:border-gray-300"
                         loading="lazy"
@@ -239,7 +233,7 @@ export default function PhotoGallery() {
                   >
                     {/* Large Image */}
                     <img
-                      src={`/api/photos/${selectedPhoto.filename}`}
+                      src={`/api/photos/${selectedPhoto.filename}?size=medium`}
                       className="max-w-full max-h-screen object-contain rounded-lg"
                     />
 
@@ -1,137 +1,66 @@
-import React, { useState, useEffect } from "react";
+import React, { useMemo } from "react";
 import { useTranslation } from "react-i18next";
-import { useData } from "./util";
+import { parseLocalDate, useFeedingStats } from "./util";
 
-export default function ParallelTimelinePlot({ sessions }) {
-  const {
-    data: { user },
-    loading,
-    refetch,
-  } = useData("breastfeeding");
+export default function ParallelTimelinePlot() {
+  const { data: timelineStats, loading } = useFeedingStats("timeline");
   const { t, i18n } = useTranslation();
 
-  const [monthlyData, setMonthlyData] = useState([]);
-
-  useEffect(() => {
-    // Group sessions by month and organize by day
-    const monthlyGroups = {};
-
-    // First, organize sessions by month and day
-    const sessionsByMonthDay = {};
-
-    sessions.forEach(session => {
-      const startDate = new Date(session.start_dt);
-      const monthKey = `${startDate.getFullYear()}-${String(
-        startDate.getMonth() + 1
-      ).padStart(2, "0")}`;
-      const dayKey = `${startDate.getFullYear()}-${String(startDate.getMonth() + 1).padStart(2, '0')}-${String(startDate.getDate()).padStart(2, '0')}`;
-
-      if (!sessionsByMonthDay[monthKey]) {
-        sessionsByMonthDay[monthKey] = {};
-      }
-      if (!sessionsByMonthDay[monthKey][dayKey]) {
-        sessionsByMonthDay[monthKey][dayKey] = [];
+  const monthlyData = useMemo(() => {
+    // Each row counts the days of a month whose n-th session (position)
+    // started at `hour` and the following one at `next_hour`
+    const rowsByMonth = {};
+    timelineStats.forEach(row => {
+      if (!rowsByMonth[row.month]) {
+        rowsByMonth[row.month] = [];
       }
-
-      const startHour = Math.round(startDate.getHours() + startDate.getMinutes() / 60);
-      const duration = session.right_duration + session.left_duration;
-
-      sessionsByMonthDay[monthKey][dayKey].push({
-        time: startHour,
-        duration,
-        date: startDate,
-        side: session.right_duration > 0 && session.left_duration > 0
-          ? 'both'
-          : session.right_duration > 0
-            ? 'right'
-            : 'left',
-      });
-    });
-
-    // Sort sessions within each day by time
-    Object.values(sessionsByMonthDay).forEach(month => {
-      Object.keys(month).forEach(dayKey => {
-        month[dayKey].sort((a, b) => a.time - b.time);
-      });
+      rowsByMonth[row.month].push(row);
     });
 
     // Process each month
-    const processedData = Object.entries(sessionsByMonthDay).map(([monthKey, days]) => {
-      // Get all days sorted chronologically
-      const sortedDays = Object.entries(days).sort((a, b) =>
-        new Date(a[0]) - new Date(b[0])
-      );
-
+    return Object.entries(rowsByMonth).map(([monthKey, rows]) => {
       // Find max sessions per day to determine how many axes we need
-      const maxSessionsPerDay = Math.max(...sortedDays.map(([_, sessions]) => sessions.length));
+      const maxSessionsPerDay = Math.max(...rows.map(row => row.position + 1));
 
       // Create parallel coordinates data structure
       // Each axis represents a session position (1st session, 2nd session, etc.)
-      const parallelData = [];
-
-      // For each session position (axis)
-      for (let sessionIdx = 0; sessionIdx < maxSessionsPerDay; sessionIdx++) {
-        // Count frequency of each hour at this session position
-        const hourFrequency = {};
-
-        sortedDays.forEach(([dayKey, daySessions]) => {
-          if (daySessions[sessionIdx]) {
-            const hour = daySessions[sessionIdx].time;
-            if (!hourFrequency[hour]) {
-              hourFrequency[hour] = { count: 0 };
-            }
-            hourFrequency[hour].count++;
-          }
-        });
-
-        parallelData.push({
-          sessionIndex: sessionIdx,
-          hourFrequency, // { hour: { count: number } }
-        });
-      }
+      const parallelData = Array.from({ length: maxSessionsPerDay }, (_, sessionIdx) => ({
+        sessionIndex: sessionIdx,
+        hourFrequency: {}, // { hour: { count: number } }
+      }));
 
       // Create connections between consecutive axes
-      const connections = [];
-      for (let axisIdx = 0; axisIdx < parallelData.length - 1; axisIdx++) {
-        // For each transition from axis[i] to axis[i+1]
-        const transitionFrequency = {}; // { "hour1->hour2": { count } }
-
-        sortedDays.forEach(([dayKey, daySessions]) => {
-          if (daySessions[axisIdx] && daySessions[axisIdx + 1]) {
-            const fromHour = daySessions[axisIdx].time;
-            const toHour = daySessions[axisIdx + 1].time;
-            const key = `${fromHour}->${toHour}`;
+      const connections = Array.from({ length: maxSessionsPerDay - 1 }, (_, axisIdx) => ({
+        fromAxis: axisIdx,
+        toAxis: axisIdx + 1,
+        transitions: [], // [{ count, fromHour, toHour }]
+      }));
 
-            if (!transitionFrequency[key]) {
-              transitionFrequency[key] = { count: 0, fromHour, toHour };
-            }
-            transitionFrequency[key].count++;
-          }
-        });
-
-        connections.push({
-          fromAxis: axisIdx,
-          toAxis: axisIdx + 1,
-          transitions: Object.values(transitionFrequency),
-        });
-      }
+      rows.forEach(({ position, hour, next_hour: nextHour, days }) => {
+        // Count frequency of each hour at this session position
+        const hourFrequency = parallelData[position].hourFrequency;
+        if (!hourFrequency[hour]) {
+          hourFrequency[hour] = { count: 0 };
+        }
+        hourFrequency[hour].count += days;
+
+        if (nextHour !== null) {
+          connections[position].transitions.push({ count: days, fromHour: hour, toHour: nextHour });
+        }
+      });
 
-      const firstSession = sortedDays[0]?.[1]?.[0];
       return {
         monthKey,
-        monthLabel: firstSession?.date.toLocaleDateString(i18n.language || "en", {
+        monthLabel: parseLocalDate(monthKey).toLocaleDateString(i18n.language || "en", {
           year: "numeric",
           month: "long",
-        }) || monthKey,
+        }),
         parallelData,
         connections,
-        totalDays: sortedDays.length,
+        totalDays: rows.filter(row => row.position === 0).reduce((sum, row) => sum + row.days, 0),
       };
     }).sort((a, b) => b.monthKey.localeCompare(a.monthKey));
-
-    setMonthlyData(processedData);
-    refetch();
-  }, [sessions, i18n.language]);
+  }, [timelineStats, i18n.language]);
 
   if (loading) {
     return (
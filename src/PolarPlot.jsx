@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from "react";
+import React, { useMemo } from "react";
 import {
   PolarGrid,
   PolarAngleAxis,
@@ -9,34 +9,21 @@ import {
   Legend,
 } from "recharts";
 import { useTranslation } from "react-i18next";
-import { useData } from "./util";
+import { parseLocalDate, useFeedingStats } from "./util";
 
-export default function BreastfeedingPolarChart({ sessions }) {
-  const {
-    data: { user },
-    loading,
-    refetch,
-  } = useData("breastfeeding");
+export default function BreastfeedingPolarChart() {
+  const { data: hourlyStats, loading } = useFeedingStats("hourly");
   const { t, i18n } = useTranslation();
 
-  const [monthlyData, setMonthlyData] = useState([]);
-
-  useEffect(() => {
-    // Group sessions by month and hour
+  const monthlyData = useMemo(() => {
+    // Group the hourly totals by month
     const monthlyGroups = {};
 
-    sessions.forEach(session => {
-      // Create date object
-      const date = new Date(session.start_dt);
-      const monthKey = `${date.getFullYear()}-${String(
-        date.getMonth() + 1
-      ).padStart(2, "0")}`;
-      const hour = date.getHours();
-
+    hourlyStats.forEach(({ month: monthKey, hour, sessions, duration }) => {
       if (!monthlyGroups[monthKey]) {
         monthlyGroups[monthKey] = {
           monthKey,
-          monthLabel: date.toLocaleDateString("en-US", {
+          monthLabel: parseLocalDate(monthKey).toLocaleDateString("en-US", {
             year: "numeric",
             month: "long",
           }),
@@ -49,13 +36,12 @@ export default function BreastfeedingPolarChart({ sessions }) {
         };
       }
 
-      monthlyGroups[monthKey].hourlyData[hour].sessions += 1;
-      monthlyGroups[monthKey].hourlyData[hour].totalDuration +=
-        session.right_duration + session.left_duration;
+      monthlyGroups[monthKey].hourlyData[hour].sessions = sessions;
+      monthlyGroups[monthKey].hourlyData[hour].totalDuration = duration;
     });
 
     // Calculate average duration and sort by month (newest first)
-    const processedData = Object.values(monthlyGroups)
+    return Object.values(monthlyGroups)
       .map(month => {
         month.hourlyData.forEach(item => {
           item.avgDuration =
@@ -66,10 +52,7 @@ export default function BreastfeedingPolarChart({ sessions }) {
         return month;
       })
       .sort((a, b) => b.monthKey.localeCompare(a.monthKey));
-
-    setMonthlyData(processedData);
-    refetch();
-  }, [sessions]);
+  }, [hourlyStats]);
 
   if (loading) {
     return (
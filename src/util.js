@@ -1,14 +1,74 @@
 import { useEffect, useState, useCallback } from "react";
 import { useNavigate } from "react-router";
 
-const dataMap = {
-  user: "/api/current-user",
-  data: "/api/data",
-  visits: "/api/visits",
-  breastfeeding: "/api/breastfeeding",
-  photos: "/api/photos",
-  activities: "/api/activities",
-};
+const dataKeys = [
+  "user",
+  "data",
+  "visits",
+  "breastfeeding",
+  "photos",
+  "activities",
+];
+
+// One event stream is shared by all components; it notifies about changes
+// made by other devices so that their data can be refetched. Listeners get
+// `null` when changes may have been missed while the stream was down.
+let eventSource = null;
+let reconnectTimer = null;
+let reconnectDelay = 1000;
+const maxReconnectDelay = 60000;
+const changeListeners = new Set();
+
+function notifyChanges(changes) {
+  changeListeners.forEach(callback => callback(changes));
+}
+
+function openEventSource(reopened) {
+  const source = new EventSource("/api/events");
+  eventSource = source;
+  source.addEventListener("open", () => {
+    reconnectDelay = 1000;
+    if (reopened) {
+      reopened = false;
+      notifyChanges(null);
+    }
+  });
+  source.addEventListener("change", event => {
+    const { changes } = JSON.parse(event.data);
+    notifyChanges(changes);
+  });
+  source.addEventListener("error", () => {
+    // The browser reconnects by itself after a dropped connection, but gives
+    // up for good after an error response, e.g. 503 when all streams are taken
+    if (source.readyState !== EventSource.CLOSED) {
+      return;
+    }
+    source.close();
+    eventSource = null;
+    const delay = reconnectDelay * (0.5 + Math.random() / 2);
+    reconnectDelay = Math.min(reconnectDelay * 2, maxReconnectDelay);
+    reconnectTimer = setTimeout(() => {
+      reconnectTimer = null;
+      openEventSource(true);
+    }, delay);
+  });
+}
+
+function subscribeChanges(listener) {
+  changeListeners.add(listener);
+  if (!eventSource && !reconnectTimer) {
+    openEventSource(false);
+  }
+  return () => {
+    changeListeners.delete(listener);
+    if (changeListeners.size === 0) {
+      clearTimeout(reconnectTimer);
+      reconnectTimer = null;
+      eventSource?.close();
+      eventSource = null;
+    }
+  };
+}
 
 export function useData(...args) {
   const navigate = useNavigate();
@@ -20,22 +80,16 @@ export function useData(...args) {
 
   const fetchData = useCallback(async () => {
     const args = identifier.split("-");
-    const endpoints = args.map(arg => dataMap[arg]);
-    if (endpoints.includes(undefined)) {
+    if (args.some(arg => !dataKeys.includes(arg))) {
       throw new Error("Invalid data key");
     }
     try {
-      const responses = await Promise.all(
-        endpoints.map(endpoint => fetch(endpoint))
-      );
-      if (responses.some(res => !res.ok)) {
+      const response = await fetch(`/api/bundle?keys=${args.join(",")}`);
+      if (!response.ok) {
         navigate("/login");
         return;
       }
-      const jsonData = await Promise.all(responses.map(res => res.json()));
-      const data = Object.fromEntries(
-        args.map((arg, index) => [arg, jsonData[index]])
-      );
+      const data = await response.json();
       setData({ loading: false, data });
     } catch (error) {
       console.error(error);
@@ -52,5 +106,114 @@ export function useData(...args) {
     fetchData();
   }, [fetchData]);
 
+  useEffect(() => {
+    const keys = identifier.split("-");
+    return subscribeChanges(changes => {
+      if (changes === null || changes.some(change => keys.includes(change.table))) {
+        fetchData();
+      }
+    });
+  }, [identifier, fetchData]);
+
   return { ...data, refetch };
 }
+
+// Feeding totals aggregated by the server (`/api/breastfeeding/stats/<kind>`),
+// bucketed into local days and hours with the browser's current UTC offset.
+export function useFeedingStats(kind) {
+  const navigate = useNavigate();
+  const [stats, setStats] = useState({ loading: true, data: [] });
+
+  const fetchStats = useCallback(async () => {
+    const tzOffset = -new Date().getTimezoneOffset();
+    try {
+      const response = await fetch(`/api/breastfeeding/stats/${kind}?tz_offset=${tzOffset}`);
+      if (!response.ok) {
+        navigate("/login");
+        return;
+      }
+      const data = await response.json();
+      setStats({ loading: false, data });
+    } catch (error) {
+      console.error(error);
+      navigate("/login");
+    }
+  }, [kind, navigate]);
+
+  useEffect(() => {
+    fetchStats();
+  }, [fetchStats]);
+
+  useEffect(() => {
+    return subscribeChanges(changes => {
+      if (changes === null || changes.some(change => change.table === "breastfeeding")) {
+        fetchStats();
+      }
+    });
+  }, [fetchStats]);
+
+  return stats;
+}
+
+// Parse a "YYYY-MM" or "YYYY-MM-DD" key of the stats endpoints as a local date
+export function parseLocalDate(key) {
+  const [year, month, day = 1] = key.split("-").map(Number);
+  return new Date(year, month - 1, day);
+}
+
+async function uploadRequest(url, options) {
+  const response = await fetch(url, options);
+  const body = response.status === 204 ? {} : await response.json();
+  return { ok: response.ok, status: response.status, body };
+}
+
+// Upload a file in chunks through the resumable upload API, retrying
+// failed chunks from the offset the server reports.
+export async function uploadResumable(file, { date, notes }, retries = 5) {
+  const start = await uploadRequest("/api/uploads", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ filename: file.name, size: file.size, date, notes }),
+  });
+  if (!start.ok) {
+    throw new Error(start.body.error || "Upload failed");
+  }
+  const { id, chunk_size: chunkSize } = start.body;
+  let offset = 0;
+  let failures = 0;
+  while (offset < file.size) {
+    try {
+      const res = await uploadRequest(`/api/uploads/${id}?offset=${offset}`, {
+        method: "PUT",
+        headers: { "Content-Type": "application/octet-stream" },
+        body: file.slice(offset, offset + chunkSize),
+      });
+      if (res.ok) {
+        offset = res.body.offset;
+        failures = 0;
+        continue;
+      }
+      if (res.status === 409 && res.body.offset !== offset) {
+        offset = res.body.offset;
+        continue;
+      }
+      throw new Error(res.body.error || "Upload failed");
+    } catch (error) {
+      if (++failures > retries) {
+        throw error;
+      }
+      await new Promise(resolve => setTimeout(resolve, 1000 * failures));
+      const status = await uploadRequest(`/api/uploads/${id}`);
+      if (status.ok) {
+        offset = status.body.offset;
+      }
+    }
+  }
+  const done = await uploadRequest(`/api/uploads/${id}/finalize`, {
+    method: "POST",
+  });
+  if (!done.ok) {
+    throw new Error(done.body.error || "Upload failed");
+  }
+  return done.body;
+}
@@ -0,0 +1,47 @@
+import pytest
+
+from lucinka.app import create_app
+from lucinka.models import db
+from lucinka.users import create_user, invalidate_user_cache
+
+
+def _app(*, testing: bool):
+    app = create_app(dev=True, testing=testing)
+    with app.app_context():
+        db.create_all()
+        create_user("admin", "password", is_admin=True)
+        yield app
+        db.session.remove()
+        invalidate_user_cache()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv("UPLOAD_FOLDER", str(tmp_path / "photos"))
+    yield from _app(testing=True)
+
+
+@pytest.fixture
+def file_app(tmp_path, monkeypatch):
+    """An app with its database in a file, for tests that need several connections."""
+    monkeypatch.setenv("UPLOAD_FOLDER", str(tmp_path / "photos"))
+    monkeypatch.setenv("SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'app.db'}")
+    yield from _app(testing=False)
+
+
+def _login(app):
+    client = app.test_client()
+    response = client.post("/api/login", json={"username": "admin", "password": "password"})
+    assert response.status_code == 200
+    return client
+
+
+@pytest.fixture
+def client(app):
+    return _login(app)
+
+
+@pytest.fixture
+def file_client(file_app):
+    return _login(file_app)
@@ -0,0 +1,38 @@
+from pathlib import Path
+
+from lucinka.backup import create_snapshot, restore_snapshot
+
+
+def _add(client, date: str) -> int:
+    response = client.post("/api/data", json={"date": date, "weight": 4})
+    assert response.status_code == 201
+    return client.get("/api/data").get_json()[-1]["id"]
+
+
+def _sync(client, since: int) -> dict:
+    response = client.get(f"/api/sync?since={since}")
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_restore_moves_versions_forward(file_app, file_client, tmp_path):
+    database = Path(file_app.config["SQLALCHEMY_DATABASE_URI"].removeprefix("sqlite:///"))
+    kept = _add(file_client, "2025-01-01")
+    snapshot, _ = create_snapshot(database, tmp_path / "backups")
+    dropped = [_add(file_client, "2025-01-02"), _add(file_client, "2025-01-03")]
+    etag = file_client.get("/api/data").headers["ETag"]
+    version = _sync(file_client, 0)["version"]
+
+    restore_snapshot(snapshot, database)
+
+    response = file_client.get("/api/data", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [row["id"] for row in response.get_json()] == [kept]
+    page = _sync(file_client, version)
+    assert page["version"] > version
+    assert [row["id"] for row in page["changes"]["data"]["written"]] == [kept]
+    assert page["changes"]["data"]["deleted"] == dropped
+    # New changes continue after the old versions as well
+    new = _add(file_client, "2025-01-04")
+    page = _sync(file_client, page["version"])
+    assert [row["id"] for row in page["changes"]["data"]["written"]] == [new]
@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+
+ROOT = Path(__file__).parents[1]
+# Print (on the last line) which modules of lucinka and its heavy dependencies got imported
+LIST_MODULES = """
+import sys
+print(*sorted(m for m in sys.modules if m.partition(".")[0] in {"lucinka", "flask", "sqlalchemy", "marshmallow"}))
+"""
+
+
+def _imported_modules(code: str, env: dict[str, str] | None = None) -> set[str]:
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code + LIST_MODULES],
+        env={**os.environ, "PYTHONPATH": str(ROOT), **(env or {})},
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(result.stdout.splitlines()[-1].split())
+
+
+def test_help_imports_nothing_else():
+    code = """
+from lucinka.__main__ import cli
+try:
+    cli(["--help"])
+except SystemExit:
+    pass
+"""
+    assert _imported_modules(code) == {"lucinka", "lucinka.__main__"}
+
+
+def test_migrations_import_no_models(tmp_path):
+    code = """
+from alembic.config import main
+main(["-q", "upgrade", "head"])
+"""
+    modules = _imported_modules(code, {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'app.db'}"})
+    assert "lucinka.models" not in modules
+    assert "flask" not in modules
@@ -0,0 +1,32 @@
+import threading
+import time
+
+from lucinka.events import notifier, stream_changes
+from lucinka.models import db
+
+
+def test_heartbeat_despite_notifications(app):
+    # Commits without synced changes wake the stream without resetting the heartbeat
+    stop = threading.Event()
+
+    def notify():
+        while not stop.is_set():
+            notifier.notify()
+            time.sleep(0.01)
+
+    thread = threading.Thread(target=notify)
+    with app.app_context():
+        thread.start()
+        try:
+            events = list(stream_changes(db.engine, None, heartbeat=0.1, duration=0.55))
+        finally:
+            stop.set()
+            thread.join()
+    assert events.count(": heartbeat\n\n") >= 4
+
+
+def test_stream_limit(app, client):
+    app.config["EVENTS_MAX_STREAMS"] = 0
+    response = client.get("/api/events")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(app.config["EVENTS_HEARTBEAT"])
@@ -0,0 +1,103 @@
+import re
+
+import pytest
+from werkzeug.http import http_date
+
+from lucinka.media import MAX_RANGES
+
+
+CONTENT = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def clip(app):
+    folder = app.config["UPLOAD_FOLDER"]
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / "clip.mp4"
+    path.write_bytes(CONTENT)
+    return path
+
+
+def _parts(response) -> list[tuple[str, bytes]]:
+    boundary = response.mimetype_params["boundary"].encode()
+    parts = []
+    for part in response.get_data().split(b"--" + boundary)[1:-1]:
+        headers, body = part.removeprefix(b"\r\n").split(b"\r\n\r\n", 1)
+        content_range = re.search(rb"Content-Range: (.*)", headers).group(1).decode().strip()
+        parts.append((content_range, body.removesuffix(b"\r\n")))
+    return parts
+
+
+@pytest.mark.usefixtures("clip")
+def test_full(client):
+    response = client.get("/api/photos/clip.mp4")
+    assert response.status_code == 200
+    assert response.get_data() == CONTENT
+    assert response.accept_ranges == "bytes"
+    assert response.cache_control.immutable
+    assert response.cache_control.private
+
+
+@pytest.mark.usefixtures("clip")
+@pytest.mark.parametrize(
+    ("header", "start", "stop"),
+    [("bytes=0-99", 0, 100), ("bytes=100-", 100, len(CONTENT)), ("bytes=-50", len(CONTENT) - 50, len(CONTENT))],
+)
+def test_single_range(client, header, start, stop):
+    response = client.get("/api/photos/clip.mp4", headers={"Range": header})
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == f"bytes {start}-{stop - 1}/{len(CONTENT)}"
+    assert response.get_data() == CONTENT[start:stop]
+
+
+@pytest.mark.usefixtures("clip")
+def test_multiple_ranges(client):
+    response = client.get("/api/photos/clip.mp4", headers={"Range": "bytes=0-9, 100-199, -5"})
+    assert response.status_code == 206
+    assert response.mimetype == "multipart/byteranges"
+    assert response.content_length == len(response.get_data())
+    size = len(CONTENT)
+    assert _parts(response) == [
+        (f"bytes 0-9/{size}", CONTENT[:10]),
+        (f"bytes 100-199/{size}", CONTENT[100:200]),
+        (f"bytes {size - 5}-{size - 1}/{size}", CONTENT[-5:]),
+    ]
+
+
+@pytest.mark.usefixtures("clip")
+def test_unsatisfiable_ranges(client):
+    size = len(CONTENT)
+    response = client.get("/api/photos/clip.mp4", headers={"Range": f"bytes={size}-, {size + 10}-"})
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == f"bytes */{size}"
+
+
+@pytest.mark.usefixtures("clip")
+def test_too_many_ranges(client):
+    ranges = ", ".join(f"{i * 10}-{i * 10 + 4}" for i in range(MAX_RANGES + 1))
+    assert client.get("/api/photos/clip.mp4", headers={"Range": f"bytes={ranges}"}).status_code == 416
+    ranges = ", ".join(f"{i * 10}-{i * 10 + 4}" for i in range(MAX_RANGES))
+    assert client.get("/api/photos/clip.mp4", headers={"Range": f"bytes={ranges}"}).status_code == 206
+
+
+@pytest.mark.parametrize("ranges", ["0-9", "0-9, 20-29"])
+def test_not_modified(client, clip, ranges):
+    etag = client.get("/api/photos/clip.mp4").headers["ETag"]
+    headers = {"Range": f"bytes={ranges}", "If-None-Match": etag}
+    assert client.get("/api/photos/clip.mp4", headers=headers).status_code == 304
+    headers = {"Range": f"bytes={ranges}", "If-Modified-Since": http_date(clip.stat().st_mtime + 1)}
+    assert client.get("/api/photos/clip.mp4", headers=headers).status_code == 304
+    headers = {"Range": f"bytes={ranges}", "If-Modified-Since": http_date(clip.stat().st_mtime - 60)}
+    assert client.get("/api/photos/clip.mp4", headers=headers).status_code == 206
+
+
+@pytest.mark.usefixtures("clip")
+@pytest.mark.parametrize("ranges", ["0-9", "0-9, 20-29"])
+def test_if_range(client, ranges):
+    etag = client.get("/api/photos/clip.mp4").headers["ETag"]
+    headers = {"Range": f"bytes={ranges}", "If-Range": etag}
+    assert client.get("/api/photos/clip.mp4", headers=headers).status_code == 206
+    headers = {"Range": f"bytes={ranges}", "If-Range": '"stale"'}
+    response = client.get("/api/photos/clip.mp4", headers=headers)
+    assert response.status_code == 200
+    assert response.get_data() == CONTENT
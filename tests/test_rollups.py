@@ -0,0 +1,118 @@
+import datetime
+
+import pytest
+
+from lucinka import stats
+from lucinka.models import Activity, Breastfeeding, DailyRollup, db
+from lucinka.rollups import rebuild_rollups
+from lucinka.stats import daily_feeding_stats, monthly_feeding_stats
+
+
+def _feeding(start_dt: datetime.datetime, **kwargs: object) -> Breastfeeding:
+    values = {"left_duration": 10, "right_duration": 5, "ml_amount": 0} | kwargs
+    return Breastfeeding(user_id=1, start_dt=start_dt, end_dt=start_dt + datetime.timedelta(minutes=20), **values)
+
+
+def _rollups() -> list[tuple]:
+    rows = db.session.execute(db.select(DailyRollup).order_by(DailyRollup.day, DailyRollup.category)).scalars()
+    return [(row.day, row.category, row.count, row.minutes) for row in rows]
+
+
+@pytest.fixture
+def feedings(app):
+    start = datetime.datetime(2025, 1, 1, 8)
+    feedings = [
+        _feeding(start + datetime.timedelta(hours=12 * i), is_pumped=i % 3 == 0, ml_amount=60) for i in range(10)
+    ]
+    db.session.add_all(feedings)
+    db.session.commit()
+    return feedings
+
+
+def test_deleted_day_matches_raw_stats(feedings):
+    # Both feedings of 2025-01-02
+    db.session.delete(feedings[2])
+    db.session.delete(feedings[3])
+    db.session.commit()
+
+    assert datetime.date(2025, 1, 2) not in {row[0] for row in _rollups()}
+    # Midnight bounds with tz_offset=0 are served from the rollups, a one-minute offset from the raw rows
+    since = datetime.datetime(2025, 1, 1, tzinfo=datetime.UTC)
+    assert daily_feeding_stats(since=since) == daily_feeding_stats(since=since, tz_offset=1)
+    rollup_months = monthly_feeding_stats(since=since)
+    assert rollup_months == monthly_feeding_stats(since=since, tz_offset=1)
+    assert rollup_months[0]["days"] == 4
+
+
+@pytest.mark.parametrize("timezone", ["UTC", "Europe/Prague"])
+def test_incremental_rollups_match_rebuild(app, timezone):
+    app.config["FAMILY_TIMEZONE"] = timezone
+    start = datetime.datetime(2025, 1, 1, 23, 59, 59, 900000)
+    db.session.add_all(
+        [
+            _feeding(start),
+            Activity(
+                user_id=1,
+                activity_type="sleeping",
+                start_dt=start,
+                # 59.2 seconds, but a whole minute between the truncated timestamps
+                end_dt=start + datetime.timedelta(seconds=59.2),
+            ),
+            Activity(
+                user_id=1,
+                activity_type="walking",
+                start_dt=start + datetime.timedelta(hours=2),
+                end_dt=start + datetime.timedelta(hours=2, minutes=30),
+            ),
+        ],
+    )
+    db.session.commit()
+    incremental = _rollups()
+    rebuild_rollups()
+    assert _rollups() == incremental
+
+
+def test_offsets_use_local_days(feedings):
+    # The evening feedings at 20:00 UTC fall on the next day in UTC+5
+    utc = {row["date"]: row["sessions"] for row in daily_feeding_stats()}
+    local = {row["date"]: row["sessions"] for row in daily_feeding_stats(tz_offset=5 * 60)}
+    assert utc == dict.fromkeys(["2025-01-01", "2025-01-02", "2025-01-03", "2025-01-04", "2025-01-05"], 2)
+    assert local == {
+        "2025-01-01": 1,
+        "2025-01-02": 2,
+        "2025-01-03": 2,
+        "2025-01-04": 2,
+        "2025-01-05": 2,
+        "2025-01-06": 1,
+    }
+
+
+def test_family_timezone_offsets_use_rollups(app, monkeypatch):
+    app.config["FAMILY_TIMEZONE"] = "Europe/Prague"
+    # 23:30 UTC is already the next day in Prague, both in winter (UTC+1) and in summer (UTC+2)
+    db.session.add_all([_feeding(datetime.datetime(2025, month, 1, 23, 30)) for month in (1, 7)])
+    db.session.commit()
+    winter = datetime.timezone(datetime.timedelta(hours=1))
+    summer = datetime.timezone(datetime.timedelta(hours=2))
+    since = datetime.datetime(2025, 1, 1, tzinfo=winter)
+    queries = [
+        {"tz_offset": 60, "since": since, "until": datetime.datetime(2025, 2, 1, tzinfo=winter)},
+        {"tz_offset": 120, "since": datetime.datetime(2025, 7, 1, tzinfo=summer)},
+    ]
+
+    def run_queries():
+        return [(daily_feeding_stats(**query), monthly_feeding_stats(**query)) for query in queries]
+
+    with monkeypatch.context() as m:
+        m.setattr(stats, "_use_rollups", lambda *_: False)
+        raw = run_queries()
+    assert [day["date"] for daily, _ in raw for day in daily] == ["2025-01-02", "2025-07-02"]
+
+    def no_raw_rows(*_: object, **__: object):
+        raise AssertionError
+
+    monkeypatch.setattr(stats, "_feeding_query", no_raw_rows)
+    assert run_queries() == raw
+    # Without an end the days from January on span the daylight saving change
+    with pytest.raises(AssertionError):
+        daily_feeding_stats(tz_offset=60, since=since)
@@ -0,0 +1,86 @@
+import datetime
+import decimal
+import json
+import uuid
+
+import pytest
+
+from lucinka.models import Activity, Breastfeeding, DataEntry, LoginRecord, Photo, Visit, db
+from lucinka.serialization import FastJSONProvider
+
+
+@pytest.fixture
+def rows(app):
+    start = datetime.datetime(2025, 1, 1, 8, 30, 15, 123456)
+    for i in range(5):
+        day = start + datetime.timedelta(days=i)
+        db.session.add_all(
+            [
+                DataEntry(user_id=1, date=day.date(), weight=3.5 + i / 10, height=50 if i else None, notes="Váha"),
+                Visit(user_id=1, date=day, doctor="Dr. Nováková", location="Praha", type="checkup"),
+                Breastfeeding(
+                    user_id=1,
+                    start_dt=day,
+                    end_dt=day + datetime.timedelta(minutes=20),
+                    left_duration=None if i % 2 else 10,
+                    right_duration=5,
+                    is_pumped=i == 3,
+                    is_breast=i != 4,
+                    ml_amount=60 * i,
+                ),
+                Activity(
+                    user_id=1,
+                    activity_type="sleeping",
+                    start_dt=day,
+                    end_dt=None if i == 0 else day + datetime.timedelta(hours=1),
+                    notes=None if i % 2 else "💤",
+                ),
+                Photo(user_id=1, date=day, ext=".jpg", sha256=None if i % 2 else f"{i:064x}", notes=""),
+                LoginRecord(user_id=1, login_dt=day),
+            ],
+        )
+    db.session.commit()
+
+
+@pytest.mark.usefixtures("rows")
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/api/data",
+        "/api/visits",
+        "/api/breastfeeding",
+        "/api/breastfeeding?limit=2",
+        "/api/activities",
+        "/api/photos",
+        "/api/login-stats",
+        "/api/bundle?keys=user,data,visits,breastfeeding,photos,activities",
+    ],
+)
+@pytest.mark.parametrize("fast_provider", [False, True])
+def test_fast_json_matches_marshmallow(app, client, path, fast_provider):
+    # With FAST_JSON set at startup the app also uses `FastJSONProvider`
+    if fast_provider:
+        app.json = FastJSONProvider(app)
+    app.config["FAST_JSON"] = False
+    expected = client.get(path)
+    app.config["FAST_JSON"] = True
+    response = client.get(path)
+    assert response.status_code == expected.status_code == 200
+    assert expected.get_json()
+    assert response.data == expected.data
+    assert response.headers.get("X-Next-Cursor") == expected.headers.get("X-Next-Cursor")
+
+
+def test_fast_json_provider_is_equal_as_json(app):
+    # Equal as JSON but not byte for byte: the default provider pretty-prints in debug mode and escapes non-ASCII
+    obj = {
+        "notes": "Nováková 💤",
+        "when": datetime.datetime(2025, 1, 1, 8, tzinfo=datetime.UTC),
+        "n": [1, None],
+        "ml": decimal.Decimal("60.5"),
+        "id": uuid.UUID(int=1),
+    }
+    expected = app.json.response(obj).get_data()
+    data = FastJSONProvider(app).response(obj).get_data()
+    assert json.loads(data) == json.loads(expected)
+    assert "Nováková 💤".encode() in data
@@ -0,0 +1,34 @@
+import datetime
+
+from lucinka.models import Breastfeeding, db
+
+
+def _feeding(start_dt: datetime.datetime, **kwargs: object) -> Breastfeeding:
+    values = {"left_duration": 10, "right_duration": 5, "ml_amount": 0} | kwargs
+    return Breastfeeding(user_id=1, start_dt=start_dt, end_dt=start_dt + datetime.timedelta(minutes=20), **values)
+
+
+def test_timeline_stats(client):
+    db.session.add_all(
+        [
+            # 23:40 in UTC+1 rounds up to 24
+            _feeding(datetime.datetime(2025, 1, 1, 5, 29)),
+            _feeding(datetime.datetime(2025, 1, 1, 9, 50)),
+            _feeding(datetime.datetime(2025, 1, 1, 22, 40)),
+            _feeding(datetime.datetime(2025, 1, 2, 6, 10)),
+            _feeding(datetime.datetime(2025, 1, 2, 7, 0), is_pumped=True),
+            _feeding(datetime.datetime(2025, 1, 2, 11, 0)),
+        ],
+    )
+    db.session.commit()
+
+    response = client.get("/api/breastfeeding/stats/timeline?tz_offset=60")
+    assert response.status_code == 200
+    keys = ("month", "position", "hour", "next_hour", "days")
+    assert [tuple(row[key] for key in keys) for row in response.json] == [
+        ("2025-01", 0, 6, 11, 1),
+        ("2025-01", 0, 7, 12, 1),
+        ("2025-01", 1, 11, 24, 1),
+        ("2025-01", 1, 12, None, 1),
+        ("2025-01", 2, 24, None, 1),
+    ]
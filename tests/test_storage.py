@@ -0,0 +1,107 @@
+import datetime
+import io
+import os
+import threading
+
+import pytest
+
+from lucinka.models import Photo, db
+from lucinka.storage import blob_filename, hash_file, rehome_photos, release_file, store_file, store_stream
+
+
+DATE = datetime.datetime(2025, 1, 1, 10)
+
+
+@pytest.fixture
+def folder(app):
+    folder = app.config["UPLOAD_FOLDER"]
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder
+
+
+def _add_photo(sha256: str | None, ext: str = ".jpg") -> Photo:
+    photo = Photo(user_id=1, date=DATE, ext=ext, sha256=sha256)
+    db.session.add(photo)
+    db.session.commit()
+    return photo
+
+
+def test_shared_blob(folder):
+    photos = []
+    for _ in range(2):
+        with store_stream(folder, io.BytesIO(b"photo"), ".jpg") as sha256:
+            photos.append(_add_photo(sha256))
+    path = folder / photos[0].storage_filename
+    for photo, removed in zip(photos, [False, True], strict=True):
+        db.session.delete(photo)
+        db.session.commit()
+        assert release_file(folder, photo) is removed
+        assert path.is_file() is not removed
+
+
+def test_failed_commit_releases_blob(folder):
+    stored = []
+
+    def store() -> None:
+        with store_stream(folder, io.BytesIO(b"photo"), ".jpg") as sha256:
+            stored.append(sha256)
+            db.session.add(Photo(user_id=1, date=DATE, ext=".jpg", sha256=sha256))
+            raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        store()
+    assert not (folder / blob_filename(stored[0], ".jpg")).exists()
+    assert db.session.query(Photo).count() == 0
+
+
+def test_release_waits_for_store(app, folder, tmp_path):
+    with store_stream(folder, io.BytesIO(b"photo"), ".jpg") as sha256:
+        old = _add_photo(sha256)
+    db.session.delete(old)
+    db.session.commit()
+
+    def release() -> None:
+        with app.app_context():
+            released.append(release_file(folder, old))
+
+    # Another upload of the same content finds the blob, which is then no longer referenced
+    source = tmp_path / "upload"
+    source.write_bytes(b"photo")
+    released = []
+    with store_file(folder, source, ".jpg"):
+        thread = threading.Thread(target=release)
+        thread.start()
+        thread.join(0.2)
+        assert thread.is_alive()
+        _add_photo(sha256)
+    thread.join()
+    assert released == [False]
+    assert (folder / blob_filename(sha256, ".jpg")).is_file()
+
+
+def test_rehome(folder):
+    photo = _add_photo(None)
+    legacy = folder / "1.jpg"
+    legacy.write_bytes(b"legacy")
+    (folder / "1.thumb.webp").write_bytes(b"thumb")
+    assert rehome_photos(folder) == (1, [])
+    sha256 = hash_file(folder / photo.storage_filename)
+    assert photo.storage_filename == blob_filename(sha256, ".jpg")
+    assert (folder / photo.storage_filename).with_suffix(".thumb.webp").read_bytes() == b"thumb"
+    assert not [path for path in folder.iterdir() if path.is_file()]
+
+
+def test_rehome_interrupted_after_commit(folder):
+    photo = _add_photo(None)
+    legacy = folder / "1.jpg"
+    legacy.write_bytes(b"legacy")
+    sha256 = hash_file(legacy)
+    target = folder / blob_filename(sha256, ".jpg")
+    target.parent.mkdir(parents=True)
+    os.link(legacy, target)
+    photo.sha256 = sha256
+    db.session.commit()
+
+    assert rehome_photos(folder) == (0, [])
+    assert not legacy.exists()
+    assert target.read_bytes() == b"legacy"
@@ -0,0 +1,58 @@
+import sqlite3
+
+from lucinka import sync
+
+
+def _sync(client, since: int) -> dict:
+    response = client.get(f"/api/sync?since={since}&limit=2")
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def _add(client, date: str) -> int:
+    response = client.post("/api/data", json={"date": date, "weight": 4})
+    assert response.status_code == 201
+    return client.get("/api/data").get_json()[-1]["id"]
+
+
+def test_sync(client):
+    ids = [_add(client, f"2025-01-0{day}") for day in range(1, 4)]
+    page = _sync(client, 0)
+    assert page["more"] is True
+    assert [row["id"] for row in page["changes"]["data"]["written"]] == ids[:2]
+    page = _sync(client, page["version"])
+    assert page["more"] is False
+    assert [row["id"] for row in page["changes"]["data"]["written"]] == ids[2:]
+
+    assert client.delete(f"/api/data/{ids[0]}").status_code == 204
+    version = page["version"]
+    page = _sync(client, version)
+    assert page["changes"]["data"] == {"written": [], "deleted": [ids[0]]}
+    assert _sync(client, page["version"])["version"] == page["version"]
+
+
+def test_empty_page_is_consistent(file_app, file_client, monkeypatch):
+    _add(file_client, "2025-01-01")
+    version = _sync(file_client, 0)["version"]
+    database = file_app.config["SQLALCHEMY_DATABASE_URI"].removeprefix("sqlite:///")
+    current_version = sync.current_version
+
+    def commit_meanwhile() -> int:
+        # Another worker commits a change after the empty page was read
+        with sqlite3.connect(database) as connection:
+            connection.execute("INSERT INTO changes (table_name, row_id, deleted) VALUES ('data', 42, 0)")
+        connection.close()
+        return current_version()
+
+    monkeypatch.setattr(sync, "current_version", commit_meanwhile)
+    assert _sync(file_client, version)["version"] == version
+    monkeypatch.undo()
+    page = _sync(file_client, version)
+    assert page["version"] == version + 1
+    assert page["changes"]["data"]["written"] == []
+
+
+def test_replaced_database(client):
+    _add(client, "2025-01-01")
+    # A version ahead of the database tells the client to start over
+    assert _sync(client, 1000)["version"] == 1
@@ -0,0 +1,51 @@
+import pytest
+
+from lucinka.thumbnails import build_all_variants, ensure_variant, variant_filename
+
+
+Image = pytest.importorskip("PIL.Image")
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / "photo.jpg"
+    Image.new("RGB", (800, 600), "red").save(path)
+    return path
+
+
+def test_ensure_variant(image):
+    variant = ensure_variant(image, "thumb")
+    assert variant == image.with_name("photo.thumb.webp")
+    with Image.open(variant) as thumb:
+        assert max(thumb.size) == 320
+
+
+def test_variant_of_variant(image):
+    variant = ensure_variant(image, "thumb")
+    assert ensure_variant(variant, "thumb") is None
+    assert ensure_variant(variant, "medium") is None
+    assert not image.with_name(variant_filename(variant.name, "thumb")).exists()
+
+
+def test_decompression_bomb(image, monkeypatch):
+    # Pillow refuses images with more than twice this many pixels
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1000)
+    assert ensure_variant(image, "thumb") is None
+
+
+def test_build_all_variants_skips_corrupt(image):
+    corrupt = image.with_name("corrupt.jpg")
+    corrupt.write_bytes(b"not an image")
+    assert build_all_variants(image.parent, workers=1) == (1, [corrupt])
+    assert image.with_name("photo.thumb.webp").is_file()
+    assert image.with_name("photo.medium.webp").is_file()
+
+
+def test_serve_variant_of_variant(app, client, image):
+    folder = app.config["UPLOAD_FOLDER"]
+    folder.mkdir(parents=True, exist_ok=True)
+    image.replace(folder / image.name)
+    assert client.get("/api/photos/photo.jpg?size=thumb").mimetype == "image/webp"
+    response = client.get("/api/photos/photo.thumb.webp?size=thumb")
+    assert response.status_code == 200
+    assert sorted(path.name for path in folder.iterdir()) == ["photo.jpg", "photo.thumb.webp"]
@@ -0,0 +1,71 @@
+import datetime
+import io
+
+import pytest
+from sqlalchemy import delete, func, select
+
+from lucinka.app import create_app
+from lucinka.bulk import KEY_LOOKUP_CHUNK, bulk_insert
+from lucinka.models import DataEntry, Visit, db, get_database_id
+from lucinka.transfer import export_table, import_rows, read_rows
+from lucinka.users import create_user, invalidate_user_cache
+
+
+@pytest.mark.parametrize("output_format", ["csv", "jsonl"])
+def test_import_export_twice(app, output_format):
+    db.session.add_all(
+        [
+            DataEntry(user_id=1, date=datetime.date(2026, 1, 1), weight=3.5),
+            DataEntry(user_id=1, date=datetime.date(2026, 1, 8), weight=3.8, idempotency_key="client-key"),
+            Visit(user_id=1, date=datetime.datetime(2026, 1, 2, 9), doctor="Dr. A", location="Praha", type="checkup"),
+        ],
+    )
+    db.session.commit()
+
+    for table, model in (("data", DataEntry), ("visits", Visit)):
+        output = io.StringIO()
+        count = export_table(table, output, output_format)
+        db.session.execute(delete(model))
+        db.session.commit()
+
+        for inserted in (count, 0):
+            rows = read_rows(io.StringIO(output.getvalue()), output_format)
+            valid, actual, errors = import_rows(table, rows, user_id=1)
+            assert (valid, actual, errors) == (count, inserted, [])
+        assert db.session.scalar(select(func.count()).select_from(model)) == count
+
+    keys = set(db.session.scalars(select(DataEntry.idempotency_key)))
+    assert keys == {f"{get_database_id()}:data:1", "client-key"}
+
+
+def _export_import(rows, output_format):
+    """Import `rows` into a new database with three entries of its own and return its export."""
+    app = create_app(dev=True, testing=True)
+    with app.app_context():
+        db.create_all()
+        create_user("admin", "password", is_admin=True)
+        db.session.add_all([DataEntry(user_id=1, date=datetime.date(2026, 2, day), weight=4.0) for day in (1, 2, 3)])
+        db.session.commit()
+        valid, inserted, errors = import_rows("data", read_rows(io.StringIO(rows), output_format), user_id=1)
+        output = io.StringIO()
+        count = export_table("data", output, output_format)
+        db.session.remove()
+        invalidate_user_cache()
+        db.engine.dispose()
+    return (valid, inserted, errors), count, output.getvalue()
+
+
+@pytest.mark.parametrize("output_format", ["csv", "jsonl"])
+def test_export_keys_unique_across_databases(output_format):
+    rows = ""
+    results = []
+    for _ in range(3):
+        result, count, rows = _export_import(rows, output_format)
+        results.append((result, count))
+    assert results == [((0, 0, []), 3), ((3, 3, []), 6), ((6, 6, []), 9)]
+
+
+def test_bulk_insert_many_keys(app):
+    entries = [{"date": datetime.date(2026, 1, 1), "idempotency_key": str(i)} for i in range(KEY_LOOKUP_CHUNK * 3)]
+    assert bulk_insert(DataEntry, entries, user_id=1) == len(entries)
+    assert bulk_insert(DataEntry, entries, user_id=1) == 0
@@ -0,0 +1,76 @@
+import hashlib
+import os
+import time
+
+import pytest
+
+from lucinka.models import Photo, db
+from lucinka.storage import iter_photos
+from lucinka.uploads import _locked, _paths, expire_uploads
+
+
+CONTENT = os.urandom(100_000)
+
+
+def _start(client, size: int = len(CONTENT)) -> str:
+    response = client.post("/api/uploads", json={"filename": "clip.mp4", "size": size, "date": "2025-01-01T10:00:00Z"})
+    assert response.status_code == 201
+    return response.get_json()["id"]
+
+
+def _age(app, upload_id: str, seconds: float) -> None:
+    for path in _paths(app.config["UPLOAD_FOLDER"], upload_id):
+        if path.exists():
+            os.utime(path, (time.time() - seconds, time.time() - seconds))
+
+
+def test_chunked_upload(app, client):
+    upload_id = _start(client)
+    for offset in range(0, len(CONTENT), 30_000):
+        response = client.put(f"/api/uploads/{upload_id}?offset={offset}", data=CONTENT[offset : offset + 30_000])
+        assert response.status_code == 200
+    response = client.put(f"/api/uploads/{upload_id}?offset=0", data=b"x")
+    assert response.status_code == 409
+    assert response.get_json()["offset"] == len(CONTENT)
+
+    response = client.post(f"/api/uploads/{upload_id}/finalize")
+    assert response.status_code == 201
+    sha256 = hashlib.sha256(CONTENT).hexdigest()
+    assert response.get_json()["filename"] == f"{sha256[:2]}/{sha256[2:4]}/{sha256}.mp4"
+    assert (app.config["UPLOAD_FOLDER"] / response.get_json()["filename"]).read_bytes() == CONTENT
+    assert not any(path.exists() for path in _paths(app.config["UPLOAD_FOLDER"], upload_id))
+
+
+def test_failed_commit_removes_file(app, client, monkeypatch):
+    upload_id = _start(client)
+    client.put(f"/api/uploads/{upload_id}?offset=0", data=CONTENT)
+
+    def fail() -> None:
+        raise RuntimeError
+
+    monkeypatch.setattr(db.session, "commit", fail)
+    with pytest.raises(RuntimeError):
+        client.post(f"/api/uploads/{upload_id}/finalize")
+    monkeypatch.undo()
+    assert db.session.query(Photo).count() == 0
+    assert list(iter_photos(app.config["UPLOAD_FOLDER"])) == []
+    assert not any(path.exists() for path in _paths(app.config["UPLOAD_FOLDER"], upload_id))
+
+
+def test_expire_uploads(app, client):
+    folder = app.config["UPLOAD_FOLDER"]
+    abandoned, recent, busy = _start(client), _start(client), _start(client)
+    _age(app, abandoned, 8 * 24 * 60 * 60)
+    _age(app, busy, 8 * 24 * 60 * 60)
+    with _locked(_paths(folder, busy)[1], "r+b"):
+        assert expire_uploads(folder, 7 * 24 * 60 * 60) == 1
+    assert client.get(f"/api/uploads/{abandoned}").status_code == 404
+    assert client.get(f"/api/uploads/{recent}").status_code == 200
+    assert client.get(f"/api/uploads/{busy}").status_code == 200
+
+    # Starting an upload expires abandoned ones too
+    _paths(folder, recent)[1].unlink()
+    _age(app, recent, 8 * 24 * 60 * 60)
+    _start(client)
+    assert client.get(f"/api/uploads/{busy}").status_code == 404
+    assert len(list((folder / ".uploads").iterdir())) == 2